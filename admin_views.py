@@ -0,0 +1,162 @@
+"""
+Panel administratora (mecze i wyniki)
+Ładowany przy pierwszym żądaniu do /admin (LazyView w app.py)
+"""
+
+from datetime import datetime
+
+from flask import Response, abort, flash, jsonify, redirect, render_template, request, \
+    stream_with_context, url_for
+
+import fixture_cache
+import fixture_io
+import match_list
+import scores
+from auth import admin_required
+from db import get_db
+
+
+@admin_required
+def admin():
+    """Panel administratora"""
+    conn = get_db()
+    
+    # Wszystkie mecze (wspólna lista z cache)
+    matches = match_list.all_matches(conn)
+    
+    return render_template('admin.html', matches=matches, cache_stats=fixture_cache.cache.summary())
+
+
+@admin_required
+def add_match():
+    """Dodaj nowy mecz"""
+    home_team = request.form.get('home_team', '').strip()
+    away_team = request.form.get('away_team', '').strip()
+    match_date = request.form.get('match_date', '').strip()
+    
+    if not home_team or not away_team or not match_date:
+        flash('Wszystkie pola są wymagane.', 'danger')
+        return redirect(url_for('admin'))
+    
+    # Konwersja datetime-local do formatu ISO
+    try:
+        # datetime-local zwraca format: YYYY-MM-DDTHH:MM
+        # Konwertujemy do ISO: YYYY-MM-DDTHH:MM:SS
+        if 'T' in match_date:
+            parts = match_date.split('T')
+            if len(parts) == 2 and parts[1].count(':') == 1:
+                match_date = match_date + ':00'  # Dodaj sekundy jeśli brakuje
+        datetime.fromisoformat(match_date)
+    except ValueError:
+        flash('Nieprawidłowy format daty.', 'danger')
+        return redirect(url_for('admin'))
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        INSERT INTO matches (home_team, away_team, match_date, home_score, away_score, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (home_team, away_team, match_date, None, None, datetime.now().isoformat()))
+    
+    conn.commit()
+    
+    flash('Mecz został dodany!', 'success')
+    return redirect(url_for('admin'))
+
+
+@admin_required
+def set_result(match_id):
+    """Ustaw wynik meczu"""
+    home_score = request.form.get('home_score', '').strip()
+    away_score = request.form.get('away_score', '').strip()
+    
+    if home_score == '' or away_score == '':
+        flash('Wszystkie pola są wymagane.', 'danger')
+        return redirect(url_for('admin'))
+    
+    try:
+        home_score = int(home_score)
+        away_score = int(away_score)
+        
+        if home_score < 0 or away_score < 0:
+            raise ValueError('Wynik nie może być ujemny')
+    except ValueError:
+        flash('Wprowadź poprawne wartości liczbowe (>= 0).', 'danger')
+        return redirect(url_for('admin'))
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    # Sprawdź czy mecz istnieje
+    cursor.execute('SELECT id FROM matches WHERE id = ?', (match_id,))
+    if not cursor.fetchone():
+        flash('Mecz nie istnieje.', 'danger')
+        return redirect(url_for('admin'))
+    
+    cursor.execute('''
+        UPDATE matches 
+        SET home_score = ?, away_score = ?
+        WHERE id = ?
+    ''', (home_score, away_score, match_id))
+    
+    # Przelicz punktację typów tego meczu w tej samej transakcji
+    scores.apply_match_result(conn, match_id)
+    
+    conn.commit()
+    
+    flash('Wynik meczu został zaktualizowany!', 'success')
+    return redirect(url_for('admin'))
+
+
+@admin_required
+def import_matches():
+    """
+    Import meczów i wyników z pliku CSV lub JSON (fixture_io)
+    Formularz panelu - komunikat i powrót do panelu; plik wysłany jako treść
+    żądania (Content-Type text/csv lub application/json) - podsumowanie w JSON
+    """
+    from_form = request.mimetype == 'multipart/form-data'
+    if from_form:
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            flash('Wybierz plik CSV lub JSON.', 'danger')
+            return redirect(url_for('admin'))
+        stream = upload.stream
+        fmt = fixture_io.detect_format(upload.filename, upload.mimetype)
+    else:
+        # Treść żądania czytana strumieniowo, bez buforowania całego pliku
+        stream = request.stream
+        fmt = fixture_io.detect_format(None, request.mimetype)
+
+    if fmt is None:
+        message = 'Obsługiwane formaty: CSV, JSON, JSON Lines.'
+        if from_form:
+            flash(message, 'danger')
+            return redirect(url_for('admin'))
+        return jsonify({'error': message}), 415
+
+    summary = fixture_io.import_file(get_db(), stream, fmt)
+    if not from_form:
+        return jsonify(summary), 400 if summary['failed'] else 200
+
+    flash(f"Import: wierszy {summary['rows']}, dodano {summary['added']}, "
+          f"zaktualizowano {summary['updated']}, przeliczono wyników {summary['rescored']}.",
+          'success' if summary['added'] or summary['updated'] else 'info')
+    if summary['errors']:
+        flash(f"Pominięte błędne wiersze: {summary['errors']} "
+              f"({'; '.join(summary['error_samples'][:5])}).", 'warning')
+    if summary['failed']:
+        flash(f"Import przerwany: {summary['failed']}", 'danger')
+    return redirect(url_for('admin'))
+
+
+@admin_required
+def export(kind, fmt):
+    """Eksport meczów lub typów (CSV/JSON) wysyłany w trakcie czytania z bazy"""
+    if kind not in fixture_io.EXPORTS or fmt not in fixture_io.MIMETYPES:
+        abort(404)
+    # stream_with_context - połączenie z bazą (get_db) żyje do końca generatora
+    chunks = fixture_io.EXPORTS[kind](get_db(), fmt)
+    return Response(stream_with_context(chunks), mimetype=fixture_io.MIMETYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={kind}.{fmt}'})
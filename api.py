@@ -0,0 +1,237 @@
+"""
+REST API v1 (JSON) - mecze, typy i statystyki zalogowanego użytkownika
+Odpowiedzi GET mają silne ETagi wyliczane z wersji danych (data_version),
+więc If-None-Match zwraca 304 bez odczytu danych; duże odpowiedzi są kompresowane gzip
+"""
+
+import gzip
+import hashlib
+import json
+from datetime import datetime
+from functools import wraps
+
+from flask import Blueprint, Response, request, session
+
+import match_list
+import predictions
+from auth import session_valid
+from db import get_db
+from fixture_cache import data_version
+
+api_v1 = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+# Maksymalna liczba meczów na stronę w API
+MAX_PER_PAGE = 200
+# Odpowiedzi mniejsze niż próg nie są kompresowane
+GZIP_MIN_SIZE = 500
+
+
+def _json(data, status=200):
+    """Zwarta odpowiedź JSON (bez spacji i wcięć)"""
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _error(message, status):
+    return _json({'error': message}, status)
+
+
+def api_login_required(f):
+    """Jak login_required, ale zamiast przekierowania zwraca 401 JSON"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session_valid():
+            return _error('Wymagane logowanie.', 401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _accepts_gzip():
+    return request.accept_encodings['gzip'] > 0
+
+
+def _etag(conn):
+    """
+    Silny ETag: wersja meczów, wersja typów użytkownika, adres z parametrami,
+    kodowanie odpowiedzi (inna treść po kompresji = inny ETag) i bieżąca minuta
+    (pole locked zmienia się w chwili rozpoczęcia meczu bez zapisu w bazie)
+    """
+    user_id = session['user_id']
+    key = (request.full_path, user_id, data_version(conn, 'matches'),
+           data_version(conn, f'predictions:{user_id}'), _accepts_gzip(),
+           predictions.utc_now()[:16])
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:24]
+
+
+def conditional(f):
+    """Obsługa If-None-Match dla widoków GET (304 bez wywołania widoku)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        etag = _etag(get_db())
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = f(*args, **kwargs)
+        if response.status_code in (200, 304):
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
+
+@api_v1.after_request
+def compress(response):
+    """Kompresja gzip odpowiedzi JSON"""
+    response.vary.add('Accept-Encoding')
+    if (response.status_code == 200 and response.mimetype == 'application/json'
+            and not response.direct_passthrough and _accepts_gzip()
+            and 'Content-Encoding' not in response.headers):
+        body = response.get_data()
+        if len(body) >= GZIP_MIN_SIZE:
+            response.set_data(gzip.compress(body, compresslevel=6))
+            response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def _match_json(match):
+    return {
+        'id': match['id'],
+        'home_team': match['home_team'],
+        'away_team': match['away_team'],
+        'match_date': match['match_date'],
+        'competition': match['competition'],
+        'score': ([match['home_score'], match['away_score']]
+                  if match['home_score'] is not None else None),
+    }
+
+
+@api_v1.route('/matches')
+@api_login_required
+@conditional
+def matches():
+    """Strona meczów z typami użytkownika (parametry jak /matches + per_page)"""
+    try:
+        per_page = min(max(int(request.args.get('per_page', match_list.PER_PAGE)), 1), MAX_PER_PAGE)
+    except ValueError:
+        return _error('Parametr per_page musi być liczbą.', 400)
+
+    filters = {}
+    for name in ('competition', 'date_from', 'date_to'):
+        value = request.args.get(name, '').strip()
+        if value:
+            filters[name] = value
+    for name in ('date_from', 'date_to'):
+        if name in filters:
+            try:
+                datetime.strptime(filters[name], '%Y-%m-%d')
+            except ValueError:
+                return _error(f'Nieprawidłowy format {name} (RRRR-MM-DD).', 400)
+
+    page = match_list.get_page(
+        get_db(), session['user_id'], per_page=per_page,
+        after=match_list.decode_cursor(request.args.get('after')),
+        before=match_list.decode_cursor(request.args.get('before')),
+        **filters)
+
+    return _json({
+        'matches': [dict(_match_json(match),
+                         prediction=([match['predicted_home'], match['predicted_away']]
+                                     if match['prediction_id'] else None),
+                         locked=match['locked'])
+                    for match in page['matches']],
+        'next': page['next_cursor'],
+        'prev': page['prev_cursor'],
+    })
+
+
+@api_v1.route('/predictions')
+@api_login_required
+@conditional
+def prediction_list():
+    """Typy użytkownika ze statusem i punktami"""
+    rows = get_db().execute('''
+        SELECT p.id, p.match_id, p.predicted_home, p.predicted_away, p.status, p.points,
+               m.home_team, m.away_team, m.match_date, m.competition,
+               m.home_score, m.away_score
+        FROM predictions p
+        JOIN matches m ON p.match_id = m.id
+        WHERE p.user_id = ?
+        ORDER BY m.match_date ASC
+    ''', (session['user_id'],)).fetchall()
+
+    return _json({'predictions': [{
+        'id': row['id'],
+        'prediction': [row['predicted_home'], row['predicted_away']],
+        'status': row['status'],
+        'points': row['points'],
+        'match': _match_json(dict(row, id=row['match_id'])),
+    } for row in rows]})
+
+
+@api_v1.route('/predictions', methods=['POST'])
+@api_login_required
+def post_predictions():
+    """
+    Zapis wielu typów w jednej transakcji:
+    {"predictions": [{"match_id": 1, "predicted_home": 2, "predicted_away": 1}, ...]}
+    Odpowiedź zawiera wynik lub błąd dla każdego meczu
+    """
+    data = request.get_json(silent=True)
+    items = data.get('predictions') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return _error('Oczekiwano {"predictions": [{"match_id", "predicted_home", "predicted_away"}]}.', 400)
+
+    conn = get_db()
+    results = predictions.save_predictions(conn, session['user_id'], [
+        (item.get('match_id'), item.get('predicted_home'), item.get('predicted_away'))
+        for item in items])
+    conn.commit()
+
+    return _json({
+        'results': [{'match_id': item['match_id'], 'result': item['result'], 'error': item['error']}
+                    for item in results],
+        'saved': sum(1 for item in results if item['result'] in (predictions.CREATED, predictions.UPDATED)),
+        'failed': sum(1 for item in results if item['error']),
+        'locked': [item['match_id'] for item in results if item['locked']],
+    })
+
+
+@api_v1.route('/predictions/<int:match_id>', methods=['PUT'])
+@api_login_required
+def put_prediction(match_id):
+    """Dodaje lub aktualizuje typ: {"predicted_home": 2, "predicted_away": 1}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return _error('Oczekiwano obiektu JSON.', 400)
+
+    conn = get_db()
+    try:
+        result = predictions.save_prediction(conn, session['user_id'], match_id,
+                                             data.get('predicted_home'), data.get('predicted_away'))
+    except predictions.PredictionError as e:
+        return _error(str(e), e.status)
+    conn.commit()
+
+    return _json({
+        'match_id': match_id,
+        'prediction': [predictions.parse_score(data['predicted_home']),
+                       predictions.parse_score(data['predicted_away'])],
+        'result': result,
+    }, 201 if result == predictions.CREATED else 200)
+
+
+@api_v1.route('/stats')
+@api_login_required
+@conditional
+def stats():
+    """Statystyki użytkownika (jak /stats, bez listy typów)"""
+    score = get_db().execute('SELECT total, correct, points FROM user_scores WHERE user_id = ?',
+                             (session['user_id'],)).fetchone()
+    total = score['total'] if score else 0
+    correct = score['correct'] if score else 0
+    return _json({
+        'total': total,
+        'correct': correct,
+        'points': score['points'] if score else 0,
+        'success_rate': round(correct / total * 100, 2) if total else 0,
+    })
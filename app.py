@@ -1,95 +1,126 @@
 """
 Aplikacja do typowania meczów i statystyk drużyn
 MVP - Flask + SQLite + Jinja2
+
+Aplikację tworzy create_app(config); konfiguracja pochodzi ze zmiennych środowiskowych
+(DATABASE_PATH, SECRET_KEY). Schemat bazy przygotowuje init_db() - raz przed startem
+workerów (gunicorn.conf.py), a nie przy każdym imporcie
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-import sqlite3
+from flask import Flask, Response, current_app, render_template, request, redirect, url_for, flash, session, jsonify
+from werkzeug.security import generate_password_hash
+from werkzeug.utils import cached_property, import_string
 import os
+import secrets
 from datetime import datetime
-from functools import wraps
 
-app = Flask(__name__)
-app.secret_key = 'your-secret-key-change-in-production'  # Zmień w produkcji!
+import api
+import db
+import leaderboard
+import live
+import match_list
+import metrics
+import migrations
+import passwords
+import predictions
+import scores
+import season_archive
+from auth import login_required, login_user
+from db import get_db
 
 DATABASE = 'football_predictions.db'
 
-
-def get_db():
-    """Pobiera połączenie z bazą danych"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def init_db():
-    """Inicjalizuje bazę danych i tworzy tabele"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Tabela users
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'USER',
-            created_at TEXT NOT NULL
-        )
-    ''')
-    
-    # Tabela matches
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS matches (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            home_team TEXT NOT NULL,
-            away_team TEXT NOT NULL,
-            match_date TEXT NOT NULL,
-            home_score INTEGER NULL,
-            away_score INTEGER NULL,
-            created_at TEXT NOT NULL,
-            api_match_id INTEGER NULL UNIQUE
-        )
-    ''')
-    
-    # Dodaj kolumnę api_match_id jeśli tabela już istnieje (migracja)
+# Widoki rejestrowane przez create_app (endpoint = nazwa funkcji, jak przy @app.route)
+_routes = []
+
+# Rzadko używane widoki - moduł importowany przy pierwszym żądaniu
+LAZY_ROUTES = [
+    ('/admin', 'admin_views.admin', {}),
+    ('/admin/add_match', 'admin_views.add_match', {'methods': ['POST']}),
+    ('/admin/set_result/<int:match_id>', 'admin_views.set_result', {'methods': ['POST']}),
+    ('/admin/import', 'admin_views.import_matches', {'methods': ['POST']}),
+    ('/admin/export/<any(matches, predictions):kind>.<any(csv, json):fmt>', 'admin_views.export', {}),
+]
+
+
+def route(rule, **options):
+    """Dekorator rejestrujący widok aplikacji (odpowiednik @app.route)"""
+    def decorator(f):
+        _routes.append((rule, f, options))
+        return f
+    return decorator
+
+
+class LazyView:
+    """Widok importowany dopiero przy pierwszym wywołaniu"""
+
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def load_config():
+    """Konfiguracja ze zmiennych środowiskowych"""
+    return {
+        'DATABASE': os.getenv('DATABASE_PATH', DATABASE),
+        'SECRET_KEY': os.getenv('SECRET_KEY'),
+    }
+
+
+def create_app(config=None):
+    """
+    Tworzy aplikację Flask
+
+    Args:
+        config: Słownik nadpisujący konfigurację ze środowiska (np. DATABASE w testach)
+    """
+    app = Flask(__name__)
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+
+    if not app.config['SECRET_KEY']:
+        # Przy preload_app klucz jest losowany raz w procesie głównym i wspólny dla workerów
+        app.config['SECRET_KEY'] = secrets.token_hex(32)
+        app.logger.warning('Brak SECRET_KEY - użyto losowego klucza, sesje wygasną po restarcie')
+
+    db.init_app(app)
+    metrics.init_app(app)
+    app.register_blueprint(api.api_v1)
+    for rule, view, options in _routes:
+        app.add_url_rule(rule, view.__name__, view, **options)
+    for rule, import_name, options in LAZY_ROUTES:
+        view = LazyView(import_name)
+        app.add_url_rule(rule, view.__name__, view, **options)
+    return app
+
+
+def init_db(database=None):
+    """Inicjalizuje bazę danych i wykonuje brakujące migracje schematu (idempotentne)"""
+    conn = db.connect(database or load_config()['DATABASE'])
     try:
-        cursor.execute('ALTER TABLE matches ADD COLUMN api_match_id INTEGER NULL UNIQUE')
-    except sqlite3.OperationalError:
-        pass  # Kolumna już istnieje
-    
-    # Tabela predictions
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS predictions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            match_id INTEGER NOT NULL,
-            predicted_home INTEGER NOT NULL,
-            predicted_away INTEGER NOT NULL,
-            created_at TEXT NOT NULL,
-            updated_at TEXT NULL,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (match_id) REFERENCES matches(id),
-            UNIQUE(user_id, match_id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+        migrations.migrate(conn)
+    finally:
+        conn.close()
 
 
-def seed_db():
+def seed_db(database=None):
     """Dodaje przykładowe dane do bazy"""
-    conn = get_db()
+    conn = db.connect(database or load_config()['DATABASE'])
     cursor = conn.cursor()
     
     # Sprawdź czy admin już istnieje
     cursor.execute('SELECT id FROM users WHERE username = ?', ('admin',))
     if not cursor.fetchone():
         # Utwórz konto admina
-        admin_password_hash = generate_password_hash('admin123')
+        admin_password_hash = generate_password_hash('admin123', passwords.METHOD)
         cursor.execute('''
             INSERT INTO users (username, password_hash, role, created_at)
             VALUES (?, ?, ?, ?)
@@ -147,45 +178,15 @@ def seed_db():
     conn.close()
 
 
-def login_required(f):
-    """Dekorator wymagający zalogowania"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Musisz się zalogować, aby uzyskać dostęp do tej strony.', 'warning')
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
-    return decorated_function
-
-
-def admin_required(f):
-    """Dekorator wymagający roli ADMIN"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Musisz się zalogować.', 'warning')
-            return redirect(url_for('login'))
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT role FROM users WHERE id = ?', (session['user_id'],))
-        user = cursor.fetchone()
-        conn.close()
-        if not user or user['role'] != 'ADMIN':
-            flash('Brak uprawnień administratora.', 'danger')
-            return redirect(url_for('index'))
-        return f(*args, **kwargs)
-    return decorated_function
-
-
 # Routes
 
-@app.route('/')
+@route('/')
 def index():
     """Strona główna"""
     return render_template('index.html')
 
 
-@app.route('/register', methods=['GET', 'POST'])
+@route('/register', methods=['GET', 'POST'])
 def register():
     """Rejestracja użytkownika"""
     if request.method == 'POST':
@@ -206,19 +207,21 @@ def register():
         # Sprawdź czy użytkownik już istnieje
         cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
         if cursor.fetchone():
-            conn.close()
             flash('Użytkownik o tej nazwie już istnieje.', 'danger')
             return render_template('register.html')
         
-        # Utwórz nowego użytkownika
-        password_hash = generate_password_hash(password)
+        # Utwórz nowego użytkownika (hash w puli procesów)
+        try:
+            password_hash = passwords.hash_password(password)
+        except passwords.PasswordHashBusy:
+            flash('Serwer jest przeciążony. Spróbuj ponownie za chwilę.', 'warning')
+            return render_template('register.html'), 503, {'Retry-After': str(passwords.RETRY_AFTER)}
         cursor.execute('''
             INSERT INTO users (username, password_hash, role, created_at)
             VALUES (?, ?, ?, ?)
         ''', (username, password_hash, 'USER', datetime.now().isoformat()))
         
         conn.commit()
-        conn.close()
         
         flash('Rejestracja zakończona pomyślnie! Możesz się teraz zalogować.', 'success')
         return redirect(url_for('login'))
@@ -226,7 +229,7 @@ def register():
     return render_template('register.html')
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@route('/login', methods=['GET', 'POST'])
 def login():
     """Logowanie użytkownika"""
     if request.method == 'POST':
@@ -239,14 +242,26 @@ def login():
         
         conn = get_db()
         cursor = conn.cursor()
-        cursor.execute('SELECT id, username, password_hash, role FROM users WHERE username = ?', (username,))
+        cursor.execute('''
+            SELECT id, username, password_hash, role, token_version FROM users WHERE username = ?
+        ''', (username,))
         user = cursor.fetchone()
-        conn.close()
         
-        if user and check_password_hash(user['password_hash'], password):
-            session['user_id'] = user['id']
-            session['username'] = user['username']
-            session['role'] = user['role']
+        valid = False
+        if user:
+            try:
+                valid, new_hash = passwords.verify_password(user['password_hash'], password)
+            except passwords.PasswordHashBusy:
+                flash('Zbyt wiele logowań naraz. Spróbuj ponownie za chwilę.', 'warning')
+                return render_template('login.html'), 503, {'Retry-After': str(passwords.RETRY_AFTER)}
+        
+        if valid:
+            if new_hash:
+                # Hasło zapisane ze starszymi parametrami hashowania
+                cursor.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                               (new_hash, user['id'], user['password_hash']))
+                conn.commit()
+            login_user(user)
             flash(f'Witaj, {username}!', 'success')
             return redirect(url_for('matches'))
         else:
@@ -256,7 +271,7 @@ def login():
     return render_template('login.html')
 
 
-@app.route('/logout')
+@route('/logout')
 def logout():
     """Wylogowanie użytkownika"""
     session.clear()
@@ -264,44 +279,41 @@ def logout():
     return redirect(url_for('index'))
 
 
-@app.route('/matches')
+@route('/matches')
 @login_required
 def matches():
-    """Lista meczów z możliwością dodania/edycji typów"""
+    """Lista meczów z możliwością dodania/edycji typów (stronicowana kluczem)"""
     conn = get_db()
-    cursor = conn.cursor()
     
-    # Pobierz wszystkie mecze - najpierw bez wyników (nowe), potem zakończone
-    cursor.execute('''
-        SELECT m.*, 
-               p.id as prediction_id, 
-               p.predicted_home, 
-               p.predicted_away
-        FROM matches m
-        LEFT JOIN predictions p ON m.id = p.match_id AND p.user_id = ?
-        ORDER BY 
-            CASE WHEN m.home_score IS NULL AND m.away_score IS NULL THEN 0 ELSE 1 END,
-            m.match_date ASC
-    ''', (session['user_id'],))
-    
-    matches = cursor.fetchall()
-    
-    # Pobierz typy użytkownika dla wszystkich meczów
-    cursor.execute('''
-        SELECT match_id, predicted_home, predicted_away
-        FROM predictions
-        WHERE user_id = ?
-    ''', (session['user_id'],))
-    
-    user_predictions = {row['match_id']: (row['predicted_home'], row['predicted_away']) 
-                        for row in cursor.fetchall()}
-    
-    conn.close()
-    
-    return render_template('matches.html', matches=matches, user_predictions=user_predictions)
-
-
-@app.route('/predict', methods=['POST'])
+    # Filtry: rozgrywki i zakres dat (YYYY-MM-DD)
+    filters = {}
+    competition = request.args.get('competition', '').strip()
+    if competition:
+        filters['competition'] = competition
+    for name in ('date_from', 'date_to'):
+        value = request.args.get(name, '').strip()
+        if not value:
+            continue
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            flash('Nieprawidłowy format daty (RRRR-MM-DD).', 'danger')
+            continue
+        filters[name] = value
+    
+    page = match_list.get_page(
+        conn, session['user_id'],
+        after=match_list.decode_cursor(request.args.get('after')),
+        before=match_list.decode_cursor(request.args.get('before')),
+        **filters)
+    
+    return render_template('matches.html',
+                         filters=filters,
+                         competitions=match_list.competitions(conn),
+                         **page)
+
+
+@route('/predict', methods=['POST'])
 @login_required
 def predict():
     """Dodaj lub zaktualizuj typ użytkownika"""
@@ -313,64 +325,110 @@ def predict():
         flash('Wszystkie pola są wymagane.', 'danger')
         return redirect(url_for('matches'))
     
+    conn = get_db()
     try:
-        predicted_home = int(predicted_home)
-        predicted_away = int(predicted_away)
-        match_id = int(match_id)
-        
-        if predicted_home < 0 or predicted_away < 0:
-            raise ValueError('Wynik nie może być ujemny')
-    except ValueError:
-        flash('Wprowadź poprawne wartości liczbowe (>= 0).', 'danger')
+        result = predictions.save_prediction(conn, session['user_id'], match_id,
+                                             predicted_home, predicted_away)
+    except predictions.PredictionError as e:
+        flash(str(e), 'danger')
         return redirect(url_for('matches'))
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Sprawdź czy mecz istnieje i czy nie ma jeszcze wyniku
-    cursor.execute('SELECT home_score, away_score FROM matches WHERE id = ?', (match_id,))
-    match = cursor.fetchone()
-    
-    if not match:
-        conn.close()
-        flash('Mecz nie istnieje.', 'danger')
-        return redirect(url_for('matches'))
+    conn.commit()
+    flash('Typ został dodany!' if result == predictions.CREATED else 'Typ został zaktualizowany!',
+          'success')
     
-    if match['home_score'] is not None or match['away_score'] is not None:
-        conn.close()
-        flash('Nie można zmienić typu dla meczu, który już się zakończył.', 'danger')
-        return redirect(url_for('matches'))
+    return redirect(url_for('matches'))
+
+
+@route('/predict_batch', methods=['POST'])
+@login_required
+def predict_batch():
+    """Zapis typów całej strony meczów (pola home_<id> / away_<id>, puste są pomijane)"""
+    items = []
+    for key in request.form:
+        if not key.startswith('home_'):
+            continue
+        match_id = key[len('home_'):]
+        predicted_home = request.form.get(key, '').strip()
+        predicted_away = request.form.get(f'away_{match_id}', '').strip()
+        if predicted_home or predicted_away:
+            items.append((match_id, predicted_home, predicted_away))
+    
+    # Powrót na tę samą stronę listy (filtry, kursor)
+    return_to = request.form.get('return_to', '')
+    if not return_to.startswith(url_for('matches')):
+        return_to = url_for('matches')
+    
+    if not items:
+        flash('Nie wpisano żadnego typu.', 'warning')
+        return redirect(return_to)
     
-    # Sprawdź czy typ już istnieje
-    cursor.execute('SELECT id FROM predictions WHERE user_id = ? AND match_id = ?', 
-                   (session['user_id'], match_id))
-    existing = cursor.fetchone()
+    conn = get_db()
+    results = predictions.save_predictions(conn, session['user_id'], items)
+    conn.commit()
     
-    current_time = datetime.now().isoformat()
+    saved = [item for item in results if item['result'] in (predictions.CREATED, predictions.UPDATED)]
+    if saved:
+        created = sum(1 for item in saved if item['result'] == predictions.CREATED)
+        flash(f'Zapisano typy: {len(saved)} (nowe: {created}, zmienione: {len(saved) - created}).',
+              'success')
+    
+    failed = [item for item in results if item['error']]
+    if failed:
+        match_ids = [item['match_id'] for item in failed if isinstance(item['match_id'], int)]
+        labels = {}
+        if match_ids:
+            labels = {row['id']: f"{row['home_team']} - {row['away_team']}" for row in conn.execute(
+                f"SELECT id, home_team, away_team FROM matches WHERE id IN ({','.join('?' * len(match_ids))})",
+                match_ids)}
+        
+        # Mecze zablokowane od rozpoczęcia - jeden komunikat z listą
+        locked = [labels.get(item['match_id'], f"Mecz {item['match_id']}") for item in failed if item['locked']]
+        if locked:
+            flash(f"Mecze już się rozpoczęły - typy nie zostały zapisane: {', '.join(locked)}.", 'warning')
+        
+        for item in failed:
+            if item['locked']:
+                continue
+            label = labels.get(item['match_id'], f"Mecz {item['match_id']}")
+            flash(f"{label}: {item['error']}", 'danger')
     
-    if existing:
-        # Aktualizuj istniejący typ
-        cursor.execute('''
-            UPDATE predictions 
-            SET predicted_home = ?, predicted_away = ?, updated_at = ?
-            WHERE id = ?
-        ''', (predicted_home, predicted_away, current_time, existing['id']))
-        flash('Typ został zaktualizowany!', 'success')
-    else:
-        # Dodaj nowy typ
-        cursor.execute('''
-            INSERT INTO predictions (user_id, match_id, predicted_home, predicted_away, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (session['user_id'], match_id, predicted_home, predicted_away, current_time))
-        flash('Typ został dodany!', 'success')
+    if not saved and not failed:
+        flash('Typy bez zmian.', 'info')
     
-    conn.commit()
-    conn.close()
+    return redirect(return_to)
+
+
+@route('/live')
+@login_required
+def live_stream():
+    """Strumień SSE ze zmianami wyników i rankingu (wznowienie przez Last-Event-ID)"""
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_seq = None
     
-    return redirect(url_for('matches'))
+    broadcaster = live.get_broadcaster(current_app.config['DATABASE'])
+    try:
+        # Każdy strumień zajmuje wątek workera - powyżej limitu klient odpytuje /live/events
+        subscriber = broadcaster.subscribe(last_seq, limit=live.MAX_SUBSCRIBERS)
+    except live.LiveBusy as e:
+        return Response(str(e), 503, mimetype='text/plain',
+                        headers={'Retry-After': str(live.RETRY_AFTER)})
+    return Response(live.stream(broadcaster, subscriber), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
-@app.route('/my_predictions')
+@route('/live/events')
+@login_required
+def live_events():
+    """Zdarzenia nowsze niż ?after=seq (gdy strumień /live odpowiada 503)"""
+    after = request.args.get('after', type=int)
+    events, last_seq = live.events_after(get_db(), after)
+    return jsonify({'events': events, 'last': last_seq})
+
+
+@route('/my_predictions')
 @login_required
 def my_predictions():
     """Lista typów użytkownika"""
@@ -390,213 +448,122 @@ def my_predictions():
         ORDER BY m.match_date ASC
     ''', (session['user_id'],))
     
-    predictions = cursor.fetchall()
-    
-    # Oblicz status dla każdego typu
-    predictions_with_status = []
-    for pred in predictions:
-        status = 'oczekiwanie'
-        if pred['home_score'] is not None and pred['away_score'] is not None:
-            if (pred['predicted_home'] == pred['home_score'] and 
-                pred['predicted_away'] == pred['away_score']):
-                status = 'trafiony'
-            else:
-                status = 'nietrafiony'
-        
-        pred_dict = dict(pred)
-        pred_dict['status'] = status
-        predictions_with_status.append(pred_dict)
+    # Status typu jest zapisywany przy ustawieniu wyniku meczu (scores.py)
+    user_predictions = cursor.fetchall()
     
-    conn.close()
-    
-    return render_template('my_predictions.html', predictions=predictions_with_status)
+    return render_template('my_predictions.html', predictions=user_predictions,
+                           now=predictions.utc_now())
 
 
-@app.route('/delete_prediction/<int:prediction_id>', methods=['POST'])
+@route('/delete_prediction/<int:prediction_id>', methods=['POST'])
 @login_required
 def delete_prediction(prediction_id):
     """Usuń typ użytkownika"""
     conn = get_db()
-    cursor = conn.cursor()
-    
-    # Sprawdź czy typ należy do użytkownika i czy mecz się jeszcze nie zakończył
-    cursor.execute('''
-        SELECT p.id, m.home_score, m.away_score
-        FROM predictions p
-        JOIN matches m ON p.match_id = m.id
-        WHERE p.id = ? AND p.user_id = ?
-    ''', (prediction_id, session['user_id']))
-    
-    pred = cursor.fetchone()
-    
-    if not pred:
-        conn.close()
-        flash('Typ nie istnieje lub nie masz uprawnień do jego usunięcia.', 'danger')
-        return redirect(url_for('my_predictions'))
-    
-    if pred['home_score'] is not None or pred['away_score'] is not None:
-        conn.close()
-        flash('Nie można usunąć typu dla meczu, który już się zakończył.', 'danger')
+    try:
+        # Warunek (właściciel, mecz przed rozpoczęciem) jest częścią samego DELETE
+        predictions.delete_prediction(conn, session['user_id'], prediction_id)
+    except predictions.PredictionError as e:
+        flash(str(e), 'danger')
         return redirect(url_for('my_predictions'))
-    
-    cursor.execute('DELETE FROM predictions WHERE id = ?', (prediction_id,))
     conn.commit()
-    conn.close()
     
     flash('Typ został usunięty.', 'success')
     return redirect(url_for('my_predictions'))
 
 
-@app.route('/stats')
+@route('/stats')
 @login_required
 def stats():
     """Statystyki użytkownika"""
     conn = get_db()
     cursor = conn.cursor()
     
-    # Pobierz tylko zakończone mecze z typami użytkownika
-    cursor.execute('''
-        SELECT p.predicted_home, 
-               p.predicted_away,
-               m.home_score,
-               m.away_score,
-               m.home_team,
-               m.away_team,
-               m.match_date
-        FROM predictions p
-        JOIN matches m ON p.match_id = m.id
-        WHERE p.user_id = ? 
-          AND m.home_score IS NOT NULL 
-          AND m.away_score IS NOT NULL
-        ORDER BY m.match_date ASC
-    ''', (session['user_id'],))
-    
-    finished_predictions = cursor.fetchall()
-    
-    # Oblicz statystyki
-    total = len(finished_predictions)
-    correct = 0
-    
-    for pred in finished_predictions:
-        if (pred['predicted_home'] == pred['home_score'] and 
-            pred['predicted_away'] == pred['away_score']):
-            correct += 1
+    # Zagregowane wyniki użytkownika - jeden wiersz
+    cursor.execute('SELECT total, correct, points FROM user_scores WHERE user_id = ?',
+                   (session['user_id'],))
+    score = cursor.fetchone()
+    total = score['total'] if score else 0
+    correct = score['correct'] if score else 0
+    points = score['points'] if score else 0
     
     success_rate = (correct / total * 100) if total > 0 else 0
     
-    conn.close()
+    # Sezony przeniesione do archiwum (season_archive.py) - punkty wyliczone przy przenoszeniu
+    archived_seasons = season_archive.user_seasons(conn, session['user_id'])
+    season = request.args.get('season')
+    if season in {row['season'] for row in archived_seasons}:
+        # Typy sezonu archiwalnego (baza dołączona przez ATTACH)
+        finished_predictions = season_archive.user_predictions(conn, session['user_id'], season)
+    else:
+        season = None
+        # Szczegóły - tylko ocenione typy użytkownika
+        cursor.execute('''
+            SELECT p.predicted_home, 
+                   p.predicted_away,
+                   p.status,
+                   p.points,
+                   m.home_score,
+                   m.away_score,
+                   m.home_team,
+                   m.away_team,
+                   m.match_date
+            FROM predictions p
+            JOIN matches m ON p.match_id = m.id
+            WHERE p.user_id = ? 
+              AND p.status != ?
+            ORDER BY m.match_date ASC
+        ''', (session['user_id'], scores.STATUS_PENDING))
+        finished_predictions = cursor.fetchall()
     
     return render_template('stats.html', 
                          total=total, 
                          correct=correct, 
+                         points=points,
                          success_rate=round(success_rate, 2),
+                         archived_seasons=archived_seasons,
+                         season=season,
                          predictions=finished_predictions)
 
 
-@app.route('/admin')
-@admin_required
-def admin():
-    """Panel administratora"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Pobierz wszystkie mecze
-    cursor.execute('SELECT * FROM matches ORDER BY match_date ASC')
-    matches = cursor.fetchall()
-    
-    conn.close()
-    
-    return render_template('admin.html', matches=matches)
-
-
-@app.route('/admin/add_match', methods=['POST'])
-@admin_required
-def add_match():
-    """Dodaj nowy mecz"""
-    home_team = request.form.get('home_team', '').strip()
-    away_team = request.form.get('away_team', '').strip()
-    match_date = request.form.get('match_date', '').strip()
-    
-    if not home_team or not away_team or not match_date:
-        flash('Wszystkie pola są wymagane.', 'danger')
-        return redirect(url_for('admin'))
-    
-    # Konwersja datetime-local do formatu ISO
+def _leaderboard_data():
+    """Strona rankingu i pozycja zalogowanego użytkownika"""
     try:
-        # datetime-local zwraca format: YYYY-MM-DDTHH:MM
-        # Konwertujemy do ISO: YYYY-MM-DDTHH:MM:SS
-        if 'T' in match_date:
-            parts = match_date.split('T')
-            if len(parts) == 2 and parts[1].count(':') == 1:
-                match_date = match_date + ':00'  # Dodaj sekundy jeśli brakuje
-        datetime.fromisoformat(match_date)
+        page = max(int(request.args.get('page', 1)), 1)
     except ValueError:
-        flash('Nieprawidłowy format daty.', 'danger')
-        return redirect(url_for('admin'))
+        page = 1
     
     conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO matches (home_team, away_team, match_date, home_score, away_score, created_at)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (home_team, away_team, match_date, None, None, datetime.now().isoformat()))
-    
-    conn.commit()
-    conn.close()
-    
-    flash('Mecz został dodany!', 'success')
-    return redirect(url_for('admin'))
+    total_users = leaderboard.count_users(conn)
+    return {
+        'page': page,
+        'per_page': leaderboard.PER_PAGE,
+        'pages': max((total_users + leaderboard.PER_PAGE - 1) // leaderboard.PER_PAGE, 1),
+        'total_users': total_users,
+        'entries': leaderboard.get_page(conn, page),
+        'me': leaderboard.get_user_position(conn, session['user_id']),
+    }
+
+
+@route('/leaderboard')
+@login_required
+def leaderboard_page():
+    """Ranking użytkowników"""
+    return render_template('leaderboard.html', **_leaderboard_data())
 
 
-@app.route('/admin/set_result/<int:match_id>', methods=['POST'])
-@admin_required
-def set_result(match_id):
-    """Ustaw wynik meczu"""
-    home_score = request.form.get('home_score', '').strip()
-    away_score = request.form.get('away_score', '').strip()
-    
-    if home_score == '' or away_score == '':
-        flash('Wszystkie pola są wymagane.', 'danger')
-        return redirect(url_for('admin'))
-    
-    try:
-        home_score = int(home_score)
-        away_score = int(away_score)
-        
-        if home_score < 0 or away_score < 0:
-            raise ValueError('Wynik nie może być ujemny')
-    except ValueError:
-        flash('Wprowadź poprawne wartości liczbowe (>= 0).', 'danger')
-        return redirect(url_for('admin'))
-    
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Sprawdź czy mecz istnieje
-    cursor.execute('SELECT id FROM matches WHERE id = ?', (match_id,))
-    if not cursor.fetchone():
-        conn.close()
-        flash('Mecz nie istnieje.', 'danger')
-        return redirect(url_for('admin'))
-    
-    cursor.execute('''
-        UPDATE matches 
-        SET home_score = ?, away_score = ?
-        WHERE id = ?
-    ''', (home_score, away_score, match_id))
-    
-    conn.commit()
-    conn.close()
-    
-    flash('Wynik meczu został zaktualizowany!', 'success')
-    return redirect(url_for('admin'))
+@route('/leaderboard/json')
+@login_required
+def leaderboard_json():
+    """Ranking użytkowników (JSON)"""
+    return jsonify(_leaderboard_data())
 
 
 if __name__ == '__main__':
     # Inicjalizuj bazę danych przy starcie
-    init_db()
-    seed_db()
+    app = create_app()
+    init_db(app.config['DATABASE'])
+    seed_db(app.config['DATABASE'])
     
     print("=" * 50)
     print("Aplikacja uruchomiona!")
@@ -608,5 +575,6 @@ if __name__ == '__main__':
     print("  http://127.0.0.1:5000/")
     print("=" * 50)
     
-    app.run(debug=True)
+    # Serwer deweloperski - w produkcji gunicorn z wsgi.py / asgi.py (DEPLOYMENT.md)
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
 
@@ -0,0 +1,287 @@
+"""
+Punkt wejścia ASGI (uvicorn lub gunicorn z workerem uvicorna, DEPLOYMENT.md)
+Widoki Flask (synchroniczne, z dostępem do SQLite) są wykonywane w ograniczonej
+puli wątków, więc pętla zdarzeń nie blokuje się na bazie. Treść żądania jest
+czytana przyrostowo, gdy widok jej potrzebuje, a odpowiedź wysyłana porcjami
+w miarę jej generowania (import i eksport fixture_io.py nie trafiają w całości
+do pamięci). Strumień /live jest obsługiwany natywnie w asyncio - otwarte
+połączenia SSE nie zajmują wątków
+
+    uvicorn asgi:application --workers 4
+"""
+
+import asyncio
+import io
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import session
+
+import live
+from app import create_app, init_db
+from auth import session_valid
+
+# Liczba wątków wykonujących widoki (równoczesne połączenia z bazą na proces)
+DB_THREADS = int(os.getenv('ASGI_DB_THREADS', '16'))
+# Maksymalna liczba żądań wykonywanych i czekających na wątek; powyżej - 503
+MAX_PENDING = int(os.getenv('ASGI_MAX_PENDING', '256'))
+
+app = create_app()
+executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix='db')
+_pending = 0
+
+
+class AsyncSubscriber:
+    """
+    Kolejka ramek klienta obsługiwanego w pętli asyncio - oczekiwanie
+    na zdarzenia nie zajmuje wątku
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def put_nowait(self, frame):
+        """Wywoływane z wątku rozgłaszającego (queue.Full - klient nie nadąża)"""
+        with self._lock:
+            if self._pending >= live.QUEUE_SIZE:
+                raise queue.Full
+            self._pending += 1
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, frame)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    async def get(self, timeout):
+        """Następna ramka (asyncio.TimeoutError po timeout sekundach)"""
+        frame = await asyncio.wait_for(self.queue.get(), timeout)
+        if frame is not None:
+            with self._lock:
+                self._pending -= 1
+        return frame
+
+
+async def stream_async(broadcaster, subscriber, heartbeat=live.HEARTBEAT):
+    """Asynchroniczny odpowiednik live.stream() dla AsyncSubscriber"""
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                frame = await subscriber.get(heartbeat)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if frame is None:
+                return
+            yield frame
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+class RequestBody(io.RawIOBase):
+    """
+    Treść żądania ASGI jako wsgi.input: kolejne komunikaty http.request są
+    pobierane z receive() dopiero przy odczycie (w wątku puli). Rozłączenie
+    klienta kończy treść
+    """
+
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self.disconnected = False
+        self._chunk = memoryview(b'')
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk and not self._done:
+            message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            if message['type'] == 'http.disconnect':
+                self.disconnected = self._done = True
+            else:
+                self._chunk = memoryview(message.get('body', b''))
+                self._done = not message.get('more_body', False)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+def _environ(scope, body):
+    """Środowisko WSGI dla żądania ASGI (body - strumień treści żądania)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BufferedReader(body),
+        # Koniec treści wyznacza strumień (także przy Transfer-Encoding: chunked)
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _call_wsgi(environ, send, loop):
+    """
+    Wykonuje żądanie w aplikacji Flask (w wątku puli) i wysyła odpowiedź porcjami,
+    w miarę jak zwraca je widok; każda porcja czeka na wysłanie (przepływ
+    ograniczony przez klienta)
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+
+    def send_message(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    started = False
+
+    def send_start():
+        nonlocal started
+        if not started:
+            send_message({'type': 'http.response.start', 'status': response['status'],
+                          'headers': _headers(response['headers'])})
+            started = True
+
+    result = app(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                # start_response może zostać wywołane dopiero przy pierwszej porcji
+                send_start()
+                send_message({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        send_start()
+        send_message({'type': 'http.response.body', 'body': b''})
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+
+def _session_user(environ):
+    """Id zalogowanego użytkownika z ciasteczka sesji (None - brak lub nieważna sesja)"""
+    with app.request_context(environ):
+        return session['user_id'] if session_valid() else None
+
+
+def _headers(headers):
+    return [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+
+async def _send_response(send, status, headers, body):
+    await send({'type': 'http.response.start', 'status': status, 'headers': _headers(headers)})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _live(scope, receive, send, environ):
+    """Strumień SSE bez wątku na klienta (AsyncSubscriber)"""
+    loop = asyncio.get_running_loop()
+    try:
+        last_seq = int(environ.get('HTTP_LAST_EVENT_ID', ''))
+    except ValueError:
+        last_seq = None
+
+    broadcaster = live.get_broadcaster(app.config['DATABASE'])
+    subscriber = AsyncSubscriber(loop)
+    # subscribe przy pierwszym kliencie łączy się z bazą - w puli wątków
+    await loop.run_in_executor(executor, broadcaster.subscribe, last_seq, subscriber)
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]})
+
+    async def pump():
+        async for frame in stream_async(broadcaster, subscriber):
+            await send({'type': 'http.response.body', 'body': frame.encode('utf-8'),
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    pump_task = asyncio.ensure_future(pump())
+    disconnect_task = asyncio.ensure_future(_wait_disconnect(receive))
+    done, pending = await asyncio.wait({pump_task, disconnect_task},
+                                       return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    # Anulowanie pump() wykonuje finally w stream_async (wyrejestrowanie klienta)
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _lifespan(receive, send):
+    loop = asyncio.get_running_loop()
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Pod gunicornem schemat jest już gotowy (on_starting) - tu tylko sprawdzenie wersji
+            await loop.run_in_executor(executor, init_db, app.config['DATABASE'])
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    global _pending
+
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    loop = asyncio.get_running_loop()
+    environ = _environ(scope, RequestBody(receive, loop))
+
+    if scope['path'] == '/live' and scope['method'] == 'GET':
+        if await loop.run_in_executor(executor, _session_user, environ):
+            await _live(scope, receive, send, environ)
+            return
+        # Bez sesji - przekierowanie do logowania jak w login_required
+
+    if _pending >= MAX_PENDING:
+        await _send_response(send, 503, [('Content-Type', 'text/plain; charset=utf-8'),
+                                         ('Retry-After', '1')],
+                             'Serwer przeciążony, spróbuj ponownie.'.encode('utf-8'))
+        return
+
+    _pending += 1
+    try:
+        await loop.run_in_executor(executor, _call_wsgi, environ, send, loop)
+    finally:
+        _pending -= 1
@@ -0,0 +1,272 @@
+"""
+Uwierzytelnianie i uprawnienia (dekoratory widoków)
+
+Sesja (podpisane ciasteczko Flask) przechowuje claims: user_id, username, role
+i token_version. Rola jest sprawdzana z sesji, bez zapytania do bazy. Zmiana roli
+lub unieważnienie sesji (python auth.py set-role / revoke) zwiększa
+users.token_version - sesje z poprzednią wersją przestają być ważne. Bieżąca
+wersja użytkownika jest trzymana w cache workera przez TOKEN_CACHE_TTL sekund,
+więc zmiana działa najpóźniej po tym czasie
+"""
+
+import os
+import sys
+import time
+from functools import wraps
+
+from flask import current_app, flash, redirect, session, url_for
+
+from db import get_db
+from fixture_cache import LocalBackend
+
+DATABASE = 'football_predictions.db'
+
+ROLES = ('USER', 'ADMIN')
+# Czas (s), przez jaki worker ufa zapamiętanej wersji tokenu użytkownika
+TOKEN_CACHE_TTL = float(os.getenv('AUTH_TOKEN_CACHE_TTL', '30'))
+TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+
+# (plik bazy, user_id) -> bieżąca token_version (LRU + TTL, per worker)
+token_versions = LocalBackend(TOKEN_CACHE_SIZE)
+
+
+def login_user(user):
+    """Zapisuje claims zalogowanego użytkownika w sesji (wiersz z id, username, role, token_version)"""
+    session.clear()
+    session['user_id'] = user['id']
+    session['username'] = user['username']
+    session['role'] = user['role']
+    session['token_version'] = user['token_version']
+
+
+def current_token_version(user_id):
+    """Bieżąca wersja tokenu użytkownika (z cache; zapytanie tylko po wygaśnięciu wpisu)"""
+    # Baza w kluczu - id użytkowników różnych baz w jednym procesie się powtarzają
+    key = (current_app.config.get('DATABASE', DATABASE), user_id)
+    version = token_versions.get(key)
+    if version is None:
+        row = get_db().execute('SELECT token_version FROM users WHERE id = ?',
+                               (user_id,)).fetchone()
+        # Usunięty użytkownik - żadna wersja z sesji nie pasuje
+        version = row['token_version'] if row else -1
+        if TOKEN_CACHE_TTL > 0:
+            token_versions.set(key, version, TOKEN_CACHE_TTL)
+    return version
+
+
+def session_valid():
+    """
+    Czy sesja należy do zalogowanego użytkownika z aktualną wersją tokenu
+    (nieaktualna sesja jest czyszczona)
+    """
+    user_id = session.get('user_id')
+    if user_id is None:
+        return False
+    # Sesje sprzed wprowadzenia wersji mają wersję 0
+    if session.get('token_version', 0) != current_token_version(user_id):
+        session.clear()
+        return False
+    return True
+
+
+def is_admin():
+    """Czy bieżąca sesja należy do admina (claims z sesji)"""
+    return session_valid() and session.get('role') == 'ADMIN'
+
+
+def login_required(f):
+    """Dekorator wymagający zalogowania"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        had_session = 'user_id' in session
+        if not session_valid():
+            if had_session:
+                flash('Sesja wygasła. Zaloguj się ponownie.', 'warning')
+            else:
+                flash('Musisz się zalogować, aby uzyskać dostęp do tej strony.', 'warning')
+            return redirect(url_for('login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def admin_required(f):
+    """Dekorator wymagający roli ADMIN"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        had_session = 'user_id' in session
+        if not session_valid():
+            if had_session:
+                flash('Sesja wygasła. Zaloguj się ponownie.', 'warning')
+            else:
+                flash('Musisz się zalogować.', 'warning')
+            return redirect(url_for('login'))
+        if session.get('role') != 'ADMIN':
+            flash('Brak uprawnień administratora.', 'danger')
+            return redirect(url_for('index'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def set_role(conn, username, role):
+    """
+    Zmienia rolę użytkownika i unieważnia jego sesje. Nie wykonuje commit.
+
+    Returns:
+        id użytkownika lub None, gdy nie istnieje
+    """
+    if role not in ROLES:
+        raise ValueError(f'Nieznana rola: {role} ({", ".join(ROLES)})')
+    row = conn.execute('''
+        UPDATE users SET role = ?, token_version = token_version + 1
+        WHERE username = ?
+        RETURNING id
+    ''', (role, username)).fetchone()
+    return row[0] if row else None
+
+
+def revoke_sessions(conn, username):
+    """Unieważnia wszystkie sesje użytkownika (wylogowanie wszędzie). Nie wykonuje commit."""
+    row = conn.execute('''
+        UPDATE users SET token_version = token_version + 1
+        WHERE username = ?
+        RETURNING id
+    ''', (username,)).fetchone()
+    return row[0] if row else None
+
+
+def _test_app(database, match_count):
+    """Aplikacja na bazie syntetycznej z kontem admina (benchmark, check)"""
+    import loadtest
+    from app import create_app, seed_db
+    loadtest.build_database(database, match_count=match_count, user_count=10,
+                            predictions_per_user=5)
+    seed_db(database)
+    return create_app({'DATABASE': database, 'SECRET_KEY': 'auth-test'})
+
+
+def benchmark(repeat=2000):
+    """Opóźnienie widoku admina i liczba zapytań: rola z bazy przy każdym żądaniu (TTL 0) i z cache"""
+    global TOKEN_CACHE_TTL
+    import tempfile
+
+    import loadtest
+    import metrics
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _test_app(os.path.join(tmp, 'football_predictions.db'), match_count=20)
+
+        @app.route('/admin/ping')
+        @admin_required
+        def admin_ping():
+            return 'ok'
+
+        client = app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        results = []
+        for label, ttl in (('rola z bazy (TTL 0)', 0), (f'claims + cache (TTL {TOKEN_CACHE_TTL:g} s)',
+                                                        TOKEN_CACHE_TTL)):
+            TOKEN_CACHE_TTL = ttl
+            token_versions.clear()
+            for url in ('/admin', '/admin/ping'):
+                client.get(url)
+                metrics.registry.reset()
+                timings = []
+                for _ in range(repeat if url == '/admin/ping' else repeat // 10):
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.status_code
+                entry = next(iter(metrics.registry.requests.values()))
+                queries = entry[-1] / len(timings)
+                results.append((label, url, loadtest.percentile(timings, 0.5) * 1000,
+                                loadtest.percentile(timings, 0.99) * 1000, queries))
+
+    print(f"\n  {'sprawdzenie roli':<28} {'widok':<12} {'p50 ms':>8} {'p99 ms':>8} {'SQL/żądanie':>12}")
+    for label, url, p50, p99, queries in results:
+        print(f"  {label:<28} {url:<12} {p50:8.3f} {p99:8.3f} {queries:12.2f}")
+
+
+def check(ttl=1.0):
+    """
+    Degradacja admina z innego procesu (jak python auth.py set-role) działa
+    najpóźniej po TOKEN_CACHE_TTL: /admin przestaje być dostępny, a po ponownym
+    zalogowaniu sesja ma rolę USER
+    """
+    global TOKEN_CACHE_TTL
+    import tempfile
+
+    import db
+
+    TOKEN_CACHE_TTL = ttl
+    token_versions.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        app = _test_app(database, match_count=20)
+        client = app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        assert client.get('/admin').status_code == 200
+
+        conn = db.connect(database)
+        set_role(conn, 'admin', 'USER')
+        conn.commit()
+        conn.close()
+        demoted_at = time.monotonic()
+
+        while client.get('/admin').status_code == 200:
+            if time.monotonic() - demoted_at > ttl + 1:
+                print(f"⚠️  Admin nadal ma dostęp {ttl + 1:g} s po degradacji (TTL {ttl:g} s)")
+                sys.exit(1)
+            time.sleep(0.05)
+        elapsed = time.monotonic() - demoted_at
+
+        with client.session_transaction() as flask_session:
+            expired = 'user_id' not in flask_session
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        with client.session_transaction() as flask_session:
+            role = flask_session.get('role')
+        admin_status = client.get('/admin').status_code
+        matches_status = client.get('/matches').status_code
+
+    print(f"Degradacja zadziałała po {elapsed:.2f} s (TTL {ttl:g} s), sesja wyczyszczona: {expired}")
+    print(f"Po ponownym logowaniu: rola {role}, /admin -> {admin_status}, /matches -> {matches_status}")
+    if elapsed <= ttl + 0.2 and expired and role == 'USER' and admin_status == 302 \
+            and matches_status == 200:
+        print("✓ Zmiana roli działa w czasie TTL cache")
+    else:
+        print("⚠️  Nieoczekiwany wynik")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # benchmark i check zmieniają ustawienia modułu używanego przez app.py (a nie __main__)
+    import auth
+    import db
+    import migrations
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command in ("set-role", "revoke") and len(sys.argv) > 2:
+        conn = db.connect(os.getenv('DATABASE_PATH', DATABASE))
+        try:
+            migrations.migrate(conn)
+            if command == "set-role":
+                user_id = set_role(conn, sys.argv[2], sys.argv[3].upper() if len(sys.argv) > 3 else '')
+            else:
+                user_id = revoke_sessions(conn, sys.argv[2])
+            conn.commit()
+        except ValueError as e:
+            print(f"⚠️  {e}")
+            sys.exit(1)
+        finally:
+            conn.close()
+        if user_id is None:
+            print(f"⚠️  Brak użytkownika {sys.argv[2]}")
+            sys.exit(1)
+        print(f"✓ Zmieniono {sys.argv[2]}; sesje tracą ważność najpóźniej po {TOKEN_CACHE_TTL:g} s")
+    elif command == "benchmark":
+        auth.benchmark()
+    elif command == "check":
+        auth.check()
+    else:
+        print("Użycie: python auth.py [set-role <użytkownik> USER|ADMIN | revoke <użytkownik> "
+              "| benchmark | check]")
+        sys.exit(1)
@@ -0,0 +1,451 @@
+"""
+Kopie zapasowe bazy bez zatrzymywania aplikacji i okresowa konserwacja
+Kopia (snapshot) powstaje przez online backup API SQLite, porcjami po
+PAGES_PER_STEP stron z przerwą STEP_SLEEP_MS między porcjami - kopiowanie nie
+zabiera dysku i CPU zapisom aplikacji. Przez całą kopię połączenie trzyma jedną
+transakcję odczytu (snapshot WAL), więc zapisy w trakcie nie wymuszają
+kopiowania od nowa, a baza główna i archiwum sezonów są spójne ze sobą.
+Gotowy plik jest sprawdzany (PRAGMA integrity_check) przed nadaniem mu
+docelowej nazwy; zostaje KEEP najnowszych kopii
+
+Konserwacja (maintain) zwalnia wolne strony przez incremental_vacuum porcjami
+(krótkie transakcje zamiast blokującego VACUUM), odświeża statystyki planera
+(ANALYZE z analysis_limit) i wykonuje checkpoint WAL. Harmonogram
+synchronizacji (python sync_matches.py daemon) wykonuje konserwację i kopię
+raz na pełną synchronizację (dobę)
+
+    python backup.py snapshot [katalog]
+    python backup.py verify <plik>
+    python backup.py maintain [--convert]
+    python backup.py benchmark
+"""
+
+import glob
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import db
+import season_archive
+
+DATABASE = 'football_predictions.db'
+
+# Katalog kopii (względem katalogu roboczego)
+BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+# Dobowa kopia w harmonogramie synchronizacji (python sync_matches.py daemon)
+DAEMON_SNAPSHOTS = os.getenv('BACKUP_IN_DAEMON', '1') == '1'
+# Liczba przechowywanych kopii; starsze są usuwane po udanej kopii
+KEEP = int(os.getenv('BACKUP_KEEP', '7'))
+# Stron kopiowanych w jednym kroku backup API (-1 - cała baza w jednym kroku)
+PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+# Przerwa między krokami kopii i konserwacji (ms) - czas dla zapisów aplikacji
+STEP_SLEEP_MS = float(os.getenv('BACKUP_STEP_SLEEP_MS', '10'))
+# Stron zwalnianych w jednej transakcji incremental_vacuum
+VACUUM_PAGES_PER_STEP = int(os.getenv('MAINTENANCE_VACUUM_PAGES', '512'))
+# Wierszy na indeks czytanych przez ANALYZE (0 - bez limitu, cała tabela)
+ANALYSIS_LIMIT = int(os.getenv('MAINTENANCE_ANALYSIS_LIMIT', '1000'))
+
+# Wartość PRAGMA auto_vacuum dla trybu INCREMENTAL
+INCREMENTAL = 2
+
+
+def copy_database(source, targets, pages=PAGES_PER_STEP, sleep_ms=STEP_SLEEP_MS):
+    """
+    Kopiuje schematy połączenia do plików (online backup API) porcjami po pages
+    stron z przerwą sleep_ms między porcjami
+
+    Wszystkie schematy są kopiowane w jednej transakcji odczytu - w trybie WAL
+    zapisy innych połączeń nie są blokowane ani nie zmieniają kopiowanych stron.
+    Połączenie musi być poza transakcją.
+
+    Args:
+        source: połączenie z bazą (z dołączonym archiwum, jeśli ma być skopiowane)
+        targets: {schemat: ścieżka pliku docelowego}
+
+    Returns:
+        Słownik: pages (skopiowane strony), steps (kroki), restarts (kopie
+        zaczęte od nowa po zmianie źródła), seconds
+    """
+    stats = {'pages': 0, 'steps': 0, 'restarts': 0}
+    remaining_before = [None]
+
+    def progress(status, remaining, total):
+        stats['steps'] += 1
+        if remaining_before[0] is not None and remaining > remaining_before[0]:
+            stats['restarts'] += 1
+        remaining_before[0] = remaining
+        if remaining and sleep_ms > 0:
+            time.sleep(sleep_ms / 1000)
+
+    start = time.perf_counter()
+    # Transakcja odczytu zaczyna się od pierwszego odczytu każdego schematu
+    source.execute('BEGIN')
+    try:
+        for schema in targets:
+            source.execute(f'SELECT COUNT(*) FROM {schema}.sqlite_master').fetchone()
+        for schema, path in targets.items():
+            remaining_before[0] = None
+            target = sqlite3.connect(path)
+            try:
+                source.backup(target, pages=pages, progress=progress, name=schema)
+                # Kopia jako jeden samodzielny plik (bez -wal)
+                target.execute('PRAGMA journal_mode = DELETE')
+                stats['pages'] += target.execute('PRAGMA page_count').fetchone()[0]
+            finally:
+                target.close()
+    finally:
+        source.rollback()
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def verify(path):
+    """
+    Sprawdza plik kopii (PRAGMA integrity_check, tylko do odczytu)
+
+    Returns:
+        Lista opisów problemów (pusta - kopia poprawna)
+    """
+    if not os.path.exists(path):
+        return [f'{path}: brak pliku']
+    try:
+        conn = sqlite3.connect(f'file:{quote(os.path.abspath(path))}?mode=ro', uri=True)
+        try:
+            rows = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return [f'{path}: {e}']
+    return [] if rows == ['ok'] else [f'{path}: {row}' for row in rows]
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def prune(directory, stem, keep=KEEP):
+    """Usuwa najstarsze kopie pliku stem ponad keep najnowszych (nazwy z datą sortują się chronologicznie)"""
+    snapshots = sorted(glob.glob(os.path.join(glob.escape(directory), f'{glob.escape(stem)}-*.db')))
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def snapshot(database=DATABASE, directory=BACKUP_DIR, keep=KEEP, pages=PAGES_PER_STEP,
+             sleep_ms=STEP_SLEEP_MS):
+    """
+    Kopia bazy (i archiwum sezonów, jeśli istnieje) do directory jako
+    <nazwa>-RRRRMMDD-GGMMSS.db. Plik dostaje docelową nazwę dopiero po
+    integrity_check; niepoprawna kopia jest usuwana
+
+    Returns:
+        Słownik jak copy_database oraz paths (zapisane pliki), problems
+        (wynik integrity_check), verify_seconds
+    """
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    conn = db.connect(database)
+    try:
+        targets = {'main': os.path.join(directory, f'{_stem(database)}-{stamp}.db')}
+        if season_archive.attach(conn):
+            archive = season_archive.archive_path(conn)
+            targets[season_archive.SCHEMA] = os.path.join(directory, f'{_stem(archive)}-{stamp}.db')
+        parts = {schema: f'{path}.part' for schema, path in targets.items()}
+        try:
+            result = copy_database(conn, parts, pages, sleep_ms)
+        except BaseException:
+            for part in parts.values():
+                if os.path.exists(part):
+                    os.remove(part)
+            raise
+    finally:
+        conn.close()
+
+    start = time.perf_counter()
+    problems = [problem for part in parts.values() for problem in verify(part)]
+    result['verify_seconds'] = time.perf_counter() - start
+    result['problems'] = problems
+    if problems:
+        for part in parts.values():
+            os.remove(part)
+        result['paths'] = []
+        return result
+
+    for schema, path in targets.items():
+        os.replace(parts[schema], path)
+    result['paths'] = list(targets.values())
+    for path in result['paths']:
+        prune(directory, _stem(path).rsplit('-', 2)[0], keep)
+    return result
+
+
+def _schemas(conn):
+    return ['main'] + ([season_archive.SCHEMA] if db.is_attached(conn, season_archive.SCHEMA) else [])
+
+
+def maintain(conn, pages=VACUUM_PAGES_PER_STEP, sleep_ms=STEP_SLEEP_MS, analysis_limit=ANALYSIS_LIMIT):
+    """
+    Konserwacja bazy (i dołączonego archiwum): zwolnienie wolnych stron porcjami
+    po pages (każda porcja to osobna krótka transakcja zapisu), ANALYZE z limitem
+    wierszy i checkpoint WAL. Połączenie musi być poza transakcją.
+
+    Returns:
+        Słownik: freed (zwolnione strony), steps, unconverted (schematy bez
+        auto_vacuum INCREMENTAL - wolne strony zwolni tylko maintain --convert),
+        free_pages (pozostałe wolne strony), seconds
+    """
+    start = time.perf_counter()
+    result = {'freed': 0, 'steps': 0, 'unconverted': [], 'free_pages': 0}
+    for schema in _schemas(conn):
+        free = conn.execute(f'PRAGMA {schema}.freelist_count').fetchone()[0]
+        if conn.execute(f'PRAGMA {schema}.auto_vacuum').fetchone()[0] != INCREMENTAL:
+            result['unconverted'].append(schema)
+            result['free_pages'] += free
+            continue
+        while free:
+            # incremental_vacuum zwalnia jedną stronę na krok instrukcji, a execute
+            # wykonuje tylko pierwszy krok - executescript wykonuje całą porcję
+            conn.executescript(f'PRAGMA {schema}.incremental_vacuum({int(pages)})')
+            result['steps'] += 1
+            left = conn.execute(f'PRAGMA {schema}.freelist_count').fetchone()[0]
+            result['freed'] += free - left
+            if left >= free:
+                break
+            free = left
+            if free and sleep_ms > 0:
+                time.sleep(sleep_ms / 1000)
+        result['free_pages'] += free
+
+    conn.execute(f'PRAGMA analysis_limit = {int(analysis_limit)}')
+    for schema in _schemas(conn):
+        conn.execute(f'ANALYZE {schema}')
+    conn.commit()
+    # PASSIVE - bez czekania na czytelników i zapisujących
+    conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def convert(conn):
+    """
+    Jednorazowe przełączenie baz bez auto_vacuum INCREMENTAL (VACUUM całego
+    pliku - blokuje zapisy na czas przepisania bazy)
+
+    Returns:
+        Lista przełączonych schematów
+    """
+    converted = []
+    for schema in _schemas(conn):
+        if conn.execute(f'PRAGMA {schema}.auto_vacuum').fetchone()[0] != INCREMENTAL:
+            conn.execute(f'PRAGMA {schema}.auto_vacuum = INCREMENTAL')
+            conn.execute(f'VACUUM {schema}')
+            converted.append(schema)
+    return converted
+
+
+# Proces zapisujący benchmarku (multiprocessing - wykonywany w osobnym procesie)
+
+def _writer(database, interval, stop, results):
+    """Zapisy jak w aplikacji (zmiana typu + commit) co interval s; wysyła (czas, opóźnienie) commitów"""
+    import random
+
+    conn = db.connect(database)
+    rng = random.Random()
+    max_id = conn.execute('SELECT MAX(id) FROM predictions').fetchone()[0]
+    timings = []
+    while not stop.is_set():
+        started = time.time()
+        conn.execute('UPDATE predictions SET predicted_home = ?, updated_at = ? WHERE id = ?',
+                     (rng.randint(0, 4), datetime.now().isoformat(), rng.randint(1, max_id)))
+        conn.commit()
+        timings.append((started, time.time() - started))
+        time.sleep(interval)
+    conn.close()
+    results.send(timings)
+    results.close()
+
+
+def benchmark(match_count=50000, interval=0.005, baseline_seconds=3.0):
+    """
+    Opóźnienie zapisów aplikacji (osobny proces) bez kopii i w trakcie kopii:
+    cała baza w jednym kroku, porcjami z przerwami, porcjami bez trzymanej
+    transakcji odczytu (kopia zaczyna się od nowa po każdym zapisie)
+    """
+    import multiprocessing
+    import tempfile
+
+    import changelog
+    import loadtest
+    import migrations
+    import scores
+
+    context = multiprocessing.get_context('spawn')
+
+    def wal_size(database):
+        path = f'{database}-wal'
+        return os.path.getsize(path) / 2 ** 20 if os.path.exists(path) else 0.0
+
+    def run_phase(database, action):
+        stop = context.Event()
+        receiver, sender = context.Pipe(duplex=False)
+        writer = context.Process(target=_writer, args=(database, interval, stop, sender))
+        writer.start()
+        sender.close()
+        time.sleep(0.5)
+        wal_before = wal_size(database)
+        started = time.time()
+        outcome = action()
+        finished = time.time()
+        wal_after = wal_size(database)
+        stop.set()
+        timings = receiver.recv()
+        writer.join()
+        window = [latency for at, latency in timings if started <= at <= finished]
+        return outcome, finished - started, window, wal_after - wal_before
+
+    def unpinned_backup(database, target, limit=10.0):
+        """Kopia porcjami bez transakcji odczytu (przerwana po limit s)"""
+        stats = {'steps': 0, 'restarts': 0, 'done': False}
+        remaining_before = [None]
+        deadline = time.perf_counter() + limit
+
+        class Timeout(Exception):
+            pass
+
+        def progress(status, remaining, total):
+            stats['steps'] += 1
+            if remaining_before[0] is not None and remaining > remaining_before[0]:
+                stats['restarts'] += 1
+            remaining_before[0] = remaining
+            if time.perf_counter() > deadline:
+                raise Timeout
+            time.sleep(STEP_SLEEP_MS / 1000)
+
+        source = db.connect(database)
+        target = sqlite3.connect(target)
+        try:
+            source.backup(target, pages=PAGES_PER_STEP, progress=progress)
+            stats['done'] = True
+        except Timeout:
+            pass
+        finally:
+            target.close()
+            source.close()
+        return stats
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        print(f"Tworzenie bazy testowej ({match_count} meczów)...")
+        loadtest.build_database(database, match_count)
+        conn = db.connect(database)
+        migrations.migrate(conn)
+        scores.rebuild_scores(conn)
+        conn.commit()
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size = os.path.getsize(database) / 2 ** 20
+        conn.close()
+
+        backups = os.path.join(tmp, 'backups')
+        phases = [
+            ('bez kopii', lambda: time.sleep(baseline_seconds) or None),
+            ('kopia w jednym kroku', lambda: snapshot(database, backups, pages=-1, sleep_ms=0)),
+            (f'porcjami ({PAGES_PER_STEP} stron, {STEP_SLEEP_MS:g} ms)',
+             lambda: snapshot(database, backups)),
+            ('porcjami bez snapshotu',
+             lambda: unpinned_backup(database, os.path.join(tmp, 'unpinned.db'))),
+        ]
+        rows = []
+        for label, action in phases:
+            outcome, seconds, window, wal_growth = run_phase(database, action)
+            rows.append((label, outcome, seconds, window, wal_growth))
+
+        snapshots = sorted(glob.glob(os.path.join(backups, '*.db')))
+        problems = [problem for path in snapshots for problem in verify(path)]
+
+        # Konserwacja po retencji dziennika zmian (wolne strony do zwolnienia)
+        conn = db.connect(database)
+        convert(conn)
+        changelog.compact(conn, retention_days=0)
+        conn.commit()
+        free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        maintenance, maintain_seconds, maintain_window, _ = run_phase(database, lambda: maintain(conn))
+        conn.close()
+
+    print(f"\nBaza {size:.1f} MB, zapis (UPDATE + commit) co {interval * 1000:g} ms w osobnym procesie")
+    print(f"\n  {'faza':<32} {'czas s':>7} {'zapisy':>7} {'p50 ms':>7} {'p99 ms':>7} {'maks ms':>8} "
+          f"{'kroki':>6} {'od nowa':>8} {'WAL +MB':>8}")
+    for label, outcome, seconds, window, wal_growth in rows:
+        latencies = [latency * 1000 for latency in window] or [0.0]
+        steps = outcome['steps'] if outcome else 0
+        restarts = outcome['restarts'] if outcome else 0
+        if outcome and outcome.get('done') is False:
+            label = f'{label} (przerwana)'
+        print(f"  {label:<32} {seconds:7.2f} {len(window):7d} {loadtest.percentile(latencies, 0.5):7.2f} "
+              f"{loadtest.percentile(latencies, 0.99):7.2f} {max(latencies):8.2f} "
+              f"{steps:6d} {restarts:8d} {wal_growth:8.2f}")
+    latencies = [latency * 1000 for latency in maintain_window] or [0.0]
+    print(f"  {'konserwacja (maintain)':<32} {maintain_seconds:7.2f} {len(maintain_window):7d} "
+          f"{loadtest.percentile(latencies, 0.5):7.2f} {loadtest.percentile(latencies, 0.99):7.2f} "
+          f"{max(latencies):8.2f} {maintenance['steps']:6d}")
+    print(f"\n  Konserwacja: zwolniono {maintenance['freed']} z {free_before} wolnych stron")
+    print(f"  Sprawdzenie kopii: {len(snapshots)} plików, integrity_check "
+          f"{rows[2][1]['verify_seconds']:.2f} s")
+    if problems:
+        print(f"⚠️  Niepoprawne kopie: {len(problems)}")
+        for problem in problems[:10]:
+            print(f"   {problem}")
+        sys.exit(1)
+    print("✓ Kopie poprawne (integrity_check)")
+
+
+if __name__ == "__main__":
+    import migrations
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    database = os.getenv('DATABASE_PATH', DATABASE)
+    if command == "snapshot":
+        result = snapshot(database, sys.argv[2] if len(sys.argv) > 2 else BACKUP_DIR)
+        if result['problems']:
+            print("⚠️  Kopia niepoprawna, pliki usunięte:")
+            for problem in result['problems'][:10]:
+                print(f"   {problem}")
+            sys.exit(1)
+        for path in result['paths']:
+            print(f"✓ {path}")
+        print(f"Skopiowano {result['pages']} stron w {result['steps']} krokach "
+              f"({result['seconds']:.2f} s, sprawdzenie {result['verify_seconds']:.2f} s)")
+    elif command == "verify" and len(sys.argv) > 2:
+        problems = [problem for path in sys.argv[2:] for problem in verify(path)]
+        if problems:
+            print(f"⚠️  Znaleziono {len(problems)} problemów:")
+            for problem in problems[:20]:
+                print(f"   {problem}")
+            sys.exit(1)
+        print("✓ Kopia poprawna (integrity_check).")
+    elif command == "maintain":
+        conn = db.connect(database)
+        try:
+            migrations.migrate(conn)
+            season_archive.attach(conn)
+            if "--convert" in sys.argv[2:]:
+                print("VACUUM blokuje zapisy do końca przepisywania bazy...")
+                for schema in convert(conn):
+                    print(f"✓ {schema}: auto_vacuum INCREMENTAL")
+            result = maintain(conn)
+        finally:
+            conn.close()
+        print(f"Zwolniono {result['freed']} stron w {result['steps']} krokach, "
+              f"ANALYZE i checkpoint ({result['seconds']:.2f} s)")
+        if result['unconverted']:
+            print(f"⚠️  {', '.join(result['unconverted'])}: bez auto_vacuum INCREMENTAL, "
+                  f"{result['free_pages']} wolnych stron (python backup.py maintain --convert)")
+    elif command == "benchmark":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+    else:
+        print("Użycie: python backup.py [snapshot [katalog] | verify <plik> ... "
+              "| maintain [--convert] | benchmark [mecze]]")
+        sys.exit(1)
@@ -0,0 +1,158 @@
+"""
+Dziennik zmian tabel matches i predictions (tabela changes, wypełniana triggerami)
+Konsumenci (cache, agregaty, strumienie) zapamiętują ostatni przetworzony seq
+i czytają tylko nowsze zmiany zamiast skanować całe tabele
+
+Wpis oznacza "wiersz się zmienił" - konsument czyta aktualny stan wiersza
+(po kompaktowaniu zostaje tylko ostatnia operacja na danym wierszu)
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import db
+
+DATABASE = 'football_predictions.db'
+
+# Wpisy starsze niż liczba dni są usuwane przy kompaktowaniu
+RETENTION_DAYS = int(os.getenv('CHANGES_RETENTION_DAYS', '7'))
+# Domyślna liczba zmian zwracanych przez jedno wywołanie changes_since
+BATCH_SIZE = 1000
+# Wiersz data_version z ostatnim usuniętym seq (granica retencji)
+PRUNED_KEY = 'changes:pruned'
+
+
+class ChangeLogExpired(ValueError):
+    """Pozycja konsumenta sprzed usuniętych wpisów - potrzebny pełny odczyt tabel"""
+
+
+def latest_seq(conn):
+    """Najwyższy nadany seq (także gdy wpisy zostały już usunięte)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    return row[0] if row else 0
+
+
+def pruned_through(conn):
+    """Najwyższy seq usunięty przez retencję (0 - nic nie usunięto)"""
+    row = conn.execute('SELECT version FROM data_version WHERE name = ?', (PRUNED_KEY,)).fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(conn, seq, limit=BATCH_SIZE, tables=None):
+    """
+    Zmiany nowsze niż seq, w kolejności zapisu
+
+    Args:
+        seq: Ostatni przetworzony seq konsumenta (0 - od początku)
+        limit: Maksymalna liczba zwracanych zmian (kolejna partia: seq ostatniej)
+        tables: Nazwy tabel do uwzględnienia (None - wszystkie)
+
+    Returns:
+        Lista słowników: seq, table, row_id, op (insert/update/delete), payload, changed_at
+
+    Raises:
+        ChangeLogExpired: wpisy po seq zostały już usunięte przez retencję
+    """
+    if seq < pruned_through(conn):
+        raise ChangeLogExpired(f'Zmiany po seq {seq} zostały usunięte (retencja).')
+
+    conditions = ['seq > ?']
+    params = [seq]
+    if tables:
+        conditions.append(f"table_name IN ({','.join('?' * len(tables))})")
+        params.extend(tables)
+
+    rows = conn.execute(f'''
+        SELECT seq, table_name, row_id, op, payload, changed_at
+        FROM changes
+        WHERE {' AND '.join(conditions)}
+        ORDER BY seq
+        LIMIT ?
+    ''', params + [limit]).fetchall()
+
+    return [{
+        'seq': row['seq'],
+        'table': row['table_name'],
+        'row_id': row['row_id'],
+        'op': row['op'],
+        'payload': json.loads(row['payload']) if row['payload'] else None,
+        'changed_at': row['changed_at'],
+    } for row in rows]
+
+
+def compact(conn, retention_days=RETENTION_DAYS, now=None):
+    """
+    Kompaktowanie dziennika. Nie wykonuje commit.
+
+    1. Dla każdego wiersza zostaje tylko najnowszy wpis (bezpieczne dla każdego
+       konsumenta - nowszy wpis tego samego wiersza ma wyższy seq)
+    2. Wpisy starsze niż retention_days są usuwane; konsumenci z wcześniejszą
+       pozycją dostaną ChangeLogExpired
+
+    Returns:
+        Krotka (liczba zwiniętych wpisów, liczba usuniętych przez retencję)
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        DELETE FROM changes
+        WHERE seq < (SELECT MAX(newer.seq) FROM changes AS newer
+                     WHERE newer.table_name = changes.table_name
+                       AND newer.row_id = changes.row_id)
+    ''')
+    collapsed = cursor.rowcount
+
+    cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=retention_days))
+    cursor.execute('SELECT MAX(seq) FROM changes WHERE changed_at < ?',
+                   (cutoff.strftime('%Y-%m-%dT%H:%M:%f'),))
+    expired_through = cursor.fetchone()[0]
+    expired = 0
+    if expired_through:
+        cursor.execute('DELETE FROM changes WHERE seq <= ?', (expired_through,))
+        expired = cursor.rowcount
+        cursor.execute('''
+            INSERT INTO data_version (name, version) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET version = MAX(version, excluded.version)
+        ''', (PRUNED_KEY, expired_through))
+
+    return collapsed, expired
+
+
+def status(conn):
+    """Liczba wpisów per tabela i granice seq"""
+    counts = {row['table_name']: row['entries'] for row in conn.execute('''
+        SELECT table_name, COUNT(*) AS entries FROM changes GROUP BY table_name
+    ''')}
+    return {'latest_seq': latest_seq(conn), 'pruned_through': pruned_through(conn),
+            'entries': counts}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    conn = db.connect(DATABASE)
+    try:
+        if command == "status":
+            info = status(conn)
+            print(f"Ostatni seq: {info['latest_seq']}, usunięte do seq: {info['pruned_through']}")
+            for table, entries in sorted(info['entries'].items()):
+                print(f"  {table:<12} {entries} wpisów")
+        elif command == "since":
+            seq = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+            try:
+                for change in changes_since(conn, seq):
+                    print(f"  {change['seq']:>8} {change['changed_at']} {change['op']:<6} "
+                          f"{change['table']}#{change['row_id']} {change['payload']}")
+            except ChangeLogExpired as e:
+                print(f"⚠️  {e}")
+                sys.exit(1)
+        elif command == "compact":
+            days = int(sys.argv[2]) if len(sys.argv) > 2 else RETENTION_DAYS
+            collapsed, expired = compact(conn, days)
+            conn.commit()
+            print(f"✓ Zwinięto {collapsed} wpisów, usunięto {expired} starszych niż {days} dni")
+        else:
+            print("Użycie: python changelog.py [status | since <seq> | compact [dni]]")
+            sys.exit(1)
+    finally:
+        conn.close()
@@ -5,6 +5,8 @@ Skrypt do czyszczenia bazy danych - usuwa wszystkie dane, zachowuje strukturę t
 import sqlite3
 import os
 
+import changelog
+
 DATABASE = 'football_predictions.db'
 
 
@@ -46,6 +48,24 @@ def clear_database():
         cursor.execute("DELETE FROM users")
         print(f"  ✓ Usunięto {cursor.rowcount} użytkowników")
         
+        # Tabele wyliczane z typów - id użytkowników są nadawane od nowa,
+        # więc nowy użytkownik nie może przejąć punktów poprzedniego
+        cursor.execute("DELETE FROM user_scores")
+        cursor.execute("DELETE FROM leaderboard_buckets")
+        cursor.execute("DELETE FROM score_events")
+        # Stan synchronizacji - kolejny sync_matches.py zapisze mecze od nowa
+        cursor.execute("DELETE FROM sync_state")
+        print("  ✓ Usunięto punktację, ranking i zdarzenia wyników")
+        
+        # Dziennik zmian - konsumenci z wcześniejszą pozycją dostaną ChangeLogExpired
+        # i odczytają tabele w całości (seq zmian i zdarzeń nie jest resetowany)
+        cursor.execute("DELETE FROM changes")
+        cursor.execute("""
+            INSERT INTO data_version (name, version) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET version = MAX(version, excluded.version)
+        """, (changelog.PRUNED_KEY, changelog.latest_seq(conn)))
+        print("  ✓ Wyczyszczono dziennik zmian")
+        
         # Resetuj AUTOINCREMENT
         cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('users', 'matches', 'predictions')")
         
@@ -81,6 +101,7 @@ if __name__ == "__main__":
     print("Czyszczenie bazy danych")
     print("=" * 50)
     
+    print("Kopia przed czyszczeniem: python backup.py snapshot")
     response = input("\nCzy na pewno chcesz usunąć wszystkie dane? (tak/nie): ")
     
     if response.lower() in ['tak', 'yes', 'y', 't']:
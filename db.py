@@ -0,0 +1,132 @@
+"""
+Warstwa połączeń z bazą danych SQLite
+Pula połączeń per worker, połączenie przypięte do flask.g, tryb WAL
+"""
+
+import os
+import sqlite3
+import threading
+
+from flask import current_app, g
+
+import metrics
+
+DATABASE = 'football_predictions.db'
+
+# Konfiguracja SQLite (nadpisywana zmiennymi środowiskowymi)
+BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+CACHED_STATEMENTS = int(os.getenv('SQLITE_CACHED_STATEMENTS', '256'))
+POOL_MAX_IDLE = int(os.getenv('SQLITE_POOL_MAX_IDLE', '8'))
+
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def connect(database=DATABASE):
+    """
+    Tworzy nowe połączenie z bazą danych i ustawia PRAGMA
+
+    Args:
+        database: Ścieżka do pliku bazy danych
+    """
+    if SYNCHRONOUS not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f'Nieprawidłowy poziom SQLITE_SYNCHRONOUS: {SYNCHRONOUS}')
+
+    # cached_statements - cache skompilowanych zapytań (prepared statements)
+    # check_same_thread=False - połączenie może wrócić do puli z innego wątku,
+    # ale w danej chwili używa go zawsze tylko jedno żądanie
+    # factory - połączenie mierzące zapytania (metrics.py, METRICS_ENABLED)
+    conn = sqlite3.connect(database,
+                           timeout=BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=CACHED_STATEMENTS,
+                           check_same_thread=False,
+                           factory=metrics.connection_factory())
+    conn.row_factory = sqlite3.Row
+
+    # WAL - czytelnicy nie czekają na zapisy sync_matches.py
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA synchronous = {SYNCHRONOUS}')
+    return conn
+
+
+def is_attached(conn, name):
+    """Czy do połączenia dołączono bazę o podanej nazwie schematu (ATTACH)"""
+    return any(row[1] == name for row in conn.execute('PRAGMA database_list'))
+
+
+class ConnectionPool:
+    """Pula połączeń SQLite w obrębie jednego procesu (workera gunicorna)"""
+
+    def __init__(self, database, max_idle=POOL_MAX_IDLE):
+        self.database = database
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        """Porzuca połączenia odziedziczone po procesie rodzica (fork)"""
+        if self._pid != os.getpid():
+            self._idle = []
+            self._pid = os.getpid()
+
+    def acquire(self):
+        """Pobiera wolne połączenie z puli lub tworzy nowe"""
+        with self._lock:
+            self._check_fork()
+            if self._idle:
+                return self._idle.pop()
+        return connect(self.database)
+
+    def release(self, conn):
+        """Zwraca połączenie do puli (lub zamyka je, gdy pula jest pełna)"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        """Zamyka wszystkie wolne połączenia"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database=DATABASE):
+    """Zwraca pulę połączeń dla podanego pliku bazy danych"""
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            pool = _pools[database] = ConnectionPool(database)
+        return pool
+
+
+def get_db():
+    """Pobiera połączenie z bazą danych przypięte do bieżącego żądania"""
+    if 'db' not in g:
+        database = current_app.config.get('DATABASE', DATABASE)
+        g.db = get_pool(database).acquire()
+    return g.db
+
+
+def close_db(exception=None):
+    """Zwraca połączenie żądania do puli (teardown)"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        database = current_app.config.get('DATABASE', DATABASE)
+        get_pool(database).release(conn)
+
+
+def init_app(app):
+    """Rejestruje obsługę połączeń w aplikacji Flask"""
+    app.config.setdefault('DATABASE', DATABASE)
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,120 @@
+"""
+Cache wspólnej listy meczów (jednakowej dla wszystkich użytkowników)
+Klucze zawierają numer wersji z tabeli data_version, zwiększany triggerami
+przy każdej zmianie w matches (panel admina, sync_matches.py) - po zapisie
+stare wpisy przestają być czytane i wypadają z cache (LRU/TTL)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Czas życia wpisu w sekundach
+CACHE_TTL = int(os.getenv('FIXTURE_CACHE_TTL', '300'))
+# Maksymalna liczba wpisów w cache procesu
+CACHE_SIZE = int(os.getenv('FIXTURE_CACHE_SIZE', '256'))
+
+
+class LocalBackend:
+    """
+    Cache w pamięci procesu (LRU + TTL)
+
+    Inny backend (np. wspólny dla workerów) musi mieć te same metody:
+    get(key) -> wartość lub None, set(key, value, ttl), clear()
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def data_version(conn, name='matches'):
+    """Bieżąca wersja danych (zwiększana triggerami przy każdej zmianie)"""
+    row = conn.execute('SELECT version FROM data_version WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def database_key(conn):
+    """Ścieżka pliku bazy main - część klucza, gdy proces używa kilku baz (np. benchmarki)"""
+    return next(row[2] for row in conn.execute('PRAGMA database_list') if row[1] == 'main')
+
+
+class FixtureCache:
+    """Cache wyników zapytań wspólnych dla wszystkich użytkowników"""
+
+    def __init__(self, backend=None, ttl=CACHE_TTL):
+        self.backend = backend or LocalBackend()
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def get_or_load(self, conn, key, loader):
+        """
+        Zwraca wartość z cache lub wynik loader() zapisany pod kluczem z bieżącą wersją danych
+
+        Args:
+            key: Krotka opisująca zapytanie (parametry strony, filtry)
+            loader: Funkcja bez argumentów zwracająca wartość (nie None, bez obiektów sqlite3.Row)
+        """
+        # Wersja jest czytana przed danymi - wczytane dane są co najmniej tak nowe jak wersja
+        cache_key = f'matches:{database_key(conn)}:{data_version(conn)}:{key!r}'
+        value = self.backend.get(cache_key)
+        if value is not None:
+            self._count('hits')
+            return value
+
+        self._count('misses')
+        value = loader()
+        self.backend.set(cache_key, value, self.ttl)
+        return value
+
+    def summary(self):
+        """Liczniki do wyświetlenia w panelu admina"""
+        with self.lock:
+            hits, misses = self.stats['hits'], self.stats['misses']
+        requests_count = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(100 * hits / requests_count, 1) if requests_count else 0.0,
+            'entries': len(self.backend) if hasattr(self.backend, '__len__') else None,
+            'evictions': getattr(self.backend, 'evictions', None),
+        }
+
+
+# Cache procesu (każdy worker ma własny; spójność zapewnia wersja w kluczu)
+cache = FixtureCache()
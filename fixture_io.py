@@ -0,0 +1,642 @@
+"""
+Import i eksport meczów w panelu admina (CSV, JSON)
+Plik importu jest czytany przyrostowo - wiersz po wierszu z CSV lub obiekt po
+obiekcie z tablicy JSON / JSON Lines - i zapisywany paczkami po CHUNK_SIZE
+wierszy, każda w osobnej transakcji. Pamięć i czas trzymania blokady zapisu nie
+rosną z rozmiarem pliku. Eksport meczów i typów to generator - odpowiedź jest
+wysyłana w trakcie czytania kursora
+
+Kolumny importu (jak w eksporcie meczów, nadmiarowe są pomijane):
+    id            - istniejący mecz do aktualizacji; pozostałe pola opcjonalne,
+                    puste nie zmieniają meczu (api_match_id jest wtedy pomijane)
+    api_match_id  - klucz zewnętrzny: istniejący mecz jest aktualizowany, nowy dodawany
+    home_team, away_team, match_date - wymagane dla nowych meczów
+    home_score, away_score - oba albo żaden
+    competition
+
+    python fixture_io.py import mecze.csv
+    python fixture_io.py export matches csv > mecze.csv
+    python fixture_io.py check
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+import scores
+
+DATABASE = 'football_predictions.db'
+
+# Wierszy na transakcję importu (dłuższa paczka - dłużej zablokowany zapis innych)
+CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+# Liczba błędnych wierszy opisanych w podsumowaniu (liczone są wszystkie)
+MAX_REPORTED_ERRORS = 20
+# Blok czytany z pliku (znaki)
+READ_SIZE = 64 * 1024
+# Maksymalny rozmiar jednego obiektu JSON - większy oznacza uszkodzony plik
+MAX_OBJECT_SIZE = 64 * 1024
+# Wierszy eksportu w jednym fragmencie odpowiedzi
+EXPORT_BATCH = 500
+
+MATCH_COLUMNS = ('id', 'api_match_id', 'competition', 'match_date', 'home_team', 'away_team',
+                 'home_score', 'away_score')
+PREDICTION_COLUMNS = ('id', 'match_id', 'user_id', 'username', 'predicted_home', 'predicted_away',
+                      'status', 'points', 'created_at', 'updated_at')
+MIMETYPES = {'csv': 'text/csv', 'json': 'application/json'}
+EXTENSIONS = {'.csv': 'csv', '.json': 'json', '.jsonl': 'json', '.ndjson': 'json'}
+CONTENT_TYPES = {'text/csv': 'csv', 'application/json': 'json', 'application/x-ndjson': 'json'}
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+class FixtureImportError(ValueError):
+    """Plik, którego nie da się czytać dalej (nagłówek, składnia JSON)"""
+
+
+def detect_format(filename, content_type):
+    """Format importu z rozszerzenia pliku lub Content-Type (None - nieobsługiwany)"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    return EXTENSIONS.get(extension) or CONTENT_TYPES.get(content_type)
+
+
+def _text_stream(stream):
+    """Strumień tekstowy UTF-8 nad strumieniem bajtów (bez wczytywania całości)"""
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream, READ_SIZE)
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def iter_csv(text):
+    """Wiersze CSV jako (numer linii, słownik kolumn z nagłówka)"""
+    reader = csv.DictReader(text)
+    if not set(reader.fieldnames or ()) & set(MATCH_COLUMNS):
+        raise FixtureImportError('Brak nagłówka CSV z kolumnami: ' + ', '.join(MATCH_COLUMNS))
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except csv.Error as e:
+        raise FixtureImportError(f'Nieprawidłowy CSV w linii {reader.line_num}: {e}')
+
+
+class _JsonReader:
+    """Bufor tekstu JSON obejmujący tylko bieżący obiekt"""
+
+    def __init__(self, text):
+        self.text = text
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if len(self.buffer) - self.pos > MAX_OBJECT_SIZE:
+            raise FixtureImportError('Nieprawidłowy JSON (obiekt zbyt duży lub niedomknięty)')
+        chunk = self.text.read(READ_SIZE)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """Następny znak poza białymi znakami ('' - koniec pliku)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def value(self):
+        """Następna wartość JSON (doczytuje plik, gdy obiekt kończy się za buforem)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise FixtureImportError(f'Nieprawidłowy JSON: {e.msg}')
+                self._fill()
+                continue
+            # Liczba na końcu bufora może mieć dalsze cyfry w następnym bloku
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json(text):
+    """Obiekty tablicy JSON lub pliku JSON Lines jako (numer obiektu, wartość)"""
+    reader = _JsonReader(text)
+    first = reader.peek()
+    number = 0
+    if first == '[':
+        reader.pos += 1
+        if reader.peek() == ']':
+            return
+        while True:
+            number += 1
+            yield number, reader.value()
+            separator = reader.peek()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise FixtureImportError(f'Nieprawidłowy JSON po obiekcie {number}: oczekiwano , lub ]')
+            reader.pos += 1
+    elif first == '{':
+        while reader.peek():
+            number += 1
+            yield number, reader.value()
+    elif first:
+        raise FixtureImportError('Oczekiwano tablicy obiektów JSON lub JSON Lines')
+
+
+def _field(raw, name):
+    value = raw.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value == '' else value
+
+
+def _text_value(raw, name):
+    value = _field(raw, name)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'{name}: oczekiwano tekstu')
+    return value
+
+
+def _integer(raw, name, minimum=None):
+    value = _field(raw, name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'{name}: oczekiwano liczby całkowitej')
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f'{name}: oczekiwano liczby całkowitej, jest {value!r}')
+    if minimum is not None and value < minimum:
+        raise ValueError(f'{name}: wartość mniejsza niż {minimum}')
+    return value
+
+
+def _match_date(raw):
+    value = _text_value(raw, 'match_date')
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'match_date: nieprawidłowa data {value!r}')
+    # Daty w bazie są bez strefy (UTC, jak z football-data.org)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def validate_row(raw):
+    """
+    Sprawdza i normalizuje wiersz importu
+
+    Returns:
+        Krotka (id, api_match_id, home_team, away_team, match_date, home_score,
+        away_score, competition)
+
+    Raises:
+        ValueError: opis błędu wiersza
+    """
+    if not isinstance(raw, dict):
+        raise ValueError('oczekiwano obiektu')
+    match_id = _integer(raw, 'id', minimum=1)
+    api_match_id = None if match_id is not None else _integer(raw, 'api_match_id')
+    home_team = _text_value(raw, 'home_team')
+    away_team = _text_value(raw, 'away_team')
+    match_date = _match_date(raw)
+    home_score = _integer(raw, 'home_score', minimum=0)
+    away_score = _integer(raw, 'away_score', minimum=0)
+    competition = _text_value(raw, 'competition')
+
+    if (home_score is None) != (away_score is None):
+        raise ValueError('podaj oba wyniki albo żaden')
+    if match_id is None:
+        missing = [name for name, value in (('home_team', home_team), ('away_team', away_team),
+                                            ('match_date', match_date)) if value is None]
+        if missing:
+            raise ValueError('brak pól nowego meczu: ' + ', '.join(missing))
+    elif all(value is None for value in (home_team, away_team, match_date, home_score, competition)):
+        raise ValueError('brak pól do zmiany')
+    return (match_id, api_match_id, home_team, away_team, match_date, home_score, away_score,
+            competition)
+
+
+def _stage(cursor, rows):
+    """
+    Ładuje paczkę do tabeli tymczasowej staging_import. Kolejne wiersze tego
+    samego id uzupełniają poprzednie; dla api_match_id wygrywa ostatni (pełny) wiersz
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS staging_import (
+            line INTEGER,
+            id INTEGER UNIQUE,
+            api_match_id INTEGER UNIQUE,
+            home_team TEXT,
+            away_team TEXT,
+            match_date TEXT,
+            home_score INTEGER,
+            away_score INTEGER,
+            competition TEXT
+        )
+    """)
+    cursor.execute("DELETE FROM staging_import")
+    cursor.executemany("""
+        INSERT INTO staging_import VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            line = excluded.line,
+            home_team = COALESCE(excluded.home_team, home_team),
+            away_team = COALESCE(excluded.away_team, away_team),
+            match_date = COALESCE(excluded.match_date, match_date),
+            home_score = COALESCE(excluded.home_score, home_score),
+            away_score = COALESCE(excluded.away_score, away_score),
+            competition = COALESCE(excluded.competition, competition)
+        ON CONFLICT(api_match_id) DO UPDATE SET
+            line = excluded.line,
+            home_team = excluded.home_team,
+            away_team = excluded.away_team,
+            match_date = excluded.match_date,
+            home_score = excluded.home_score,
+            away_score = excluded.away_score,
+            competition = excluded.competition
+    """, rows)
+
+
+def write_chunk(conn, rows):
+    """
+    Zapisuje paczkę poprawnych wierszy (krotki: numer wiersza + validate_row)
+    i przelicza punktację meczów ze zmienionym wynikiem. Nie wykonuje commit.
+
+    Returns:
+        Krotka (dodane, zaktualizowane, zbiór id meczów ze zmienionym wynikiem,
+        błędy [(numer wiersza, opis)])
+    """
+    cursor = conn.cursor()
+    _stage(cursor, rows)
+
+    cursor.execute("""
+        DELETE FROM staging_import
+        WHERE id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM matches WHERE id = staging_import.id)
+        RETURNING line, id
+    """)
+    errors = [(row['line'], f'mecz {row["id"]} nie istnieje') for row in cursor.fetchall()]
+
+    # Wiersze z id: wynik osobno - RETURNING nie widzi poprzednich wartości,
+    # a przeliczenie dotyczy tylko meczów, których wynik się zmienił
+    cursor.execute("""
+        UPDATE matches SET home_score = s.home_score, away_score = s.away_score
+        FROM staging_import AS s
+        WHERE matches.id = s.id AND s.home_score IS NOT NULL
+          AND (matches.home_score IS NOT s.home_score OR matches.away_score IS NOT s.away_score)
+        RETURNING matches.id
+    """)
+    rescored = {row['id'] for row in cursor.fetchall()}
+    cursor.execute("""
+        UPDATE matches SET
+            home_team = COALESCE(s.home_team, matches.home_team),
+            away_team = COALESCE(s.away_team, matches.away_team),
+            match_date = COALESCE(s.match_date, matches.match_date),
+            competition = COALESCE(s.competition, matches.competition)
+        FROM staging_import AS s
+        WHERE matches.id = s.id
+          AND (COALESCE(s.home_team, matches.home_team) IS NOT matches.home_team
+            OR COALESCE(s.away_team, matches.away_team) IS NOT matches.away_team
+            OR COALESCE(s.match_date, matches.match_date) IS NOT matches.match_date
+            OR COALESCE(s.competition, matches.competition) IS NOT matches.competition)
+        RETURNING matches.id
+    """)
+    updated = rescored | {row['id'] for row in cursor.fetchall()}
+
+    # Istniejące mecze z api_match_id, których wynik zmieni upsert (RETURNING upsertu
+    # zwraca też mecze ze zmienionymi tylko drużynami lub datą)
+    cursor.execute("""
+        SELECT m.id FROM staging_import AS s
+        JOIN matches AS m ON m.api_match_id = s.api_match_id
+        WHERE s.id IS NULL
+          AND (m.home_score IS NOT s.home_score OR m.away_score IS NOT s.away_score)
+    """)
+    rescored.update(row['id'] for row in cursor.fetchall())
+
+    # Wiersze z api_match_id: upsert jak w sync_matches.write_fixtures
+    run_time = datetime.now().isoformat()
+    cursor.execute("""
+        INSERT INTO matches (home_team, away_team, match_date, home_score, away_score,
+                             created_at, api_match_id, competition)
+        SELECT home_team, away_team, match_date, home_score, away_score,
+               ?, api_match_id, competition
+        FROM staging_import
+        WHERE id IS NULL AND api_match_id IS NOT NULL
+        ON CONFLICT(api_match_id) DO UPDATE SET
+            home_team = excluded.home_team,
+            away_team = excluded.away_team,
+            match_date = excluded.match_date,
+            home_score = excluded.home_score,
+            away_score = excluded.away_score,
+            competition = excluded.competition
+        WHERE matches.home_team IS NOT excluded.home_team
+           OR matches.away_team IS NOT excluded.away_team
+           OR matches.match_date IS NOT excluded.match_date
+           OR matches.home_score IS NOT excluded.home_score
+           OR matches.away_score IS NOT excluded.away_score
+           OR matches.competition IS NOT excluded.competition
+        RETURNING id, created_at = ? AS inserted
+    """, (run_time, run_time))
+    changed = cursor.fetchall()
+    added = sum(1 for row in changed if row['inserted'])
+    updated.update(row['id'] for row in changed if not row['inserted'])
+
+    # Pozostałe - nowe mecze bez klucza
+    cursor.execute("""
+        INSERT INTO matches (home_team, away_team, match_date, home_score, away_score,
+                             created_at, competition)
+        SELECT home_team, away_team, match_date, home_score, away_score, ?, competition
+        FROM staging_import
+        WHERE id IS NULL AND api_match_id IS NULL
+    """, (run_time,))
+    added += cursor.rowcount
+
+    for match_id in rescored:
+        scores.apply_match_result(conn, match_id)
+    return added, len(updated), rescored, errors
+
+
+def import_rows(conn, records, chunk_size=None):
+    """
+    Importuje wiersze (iterator par (numer wiersza, wartość)) paczkami po
+    chunk_size - każda paczka to osobna transakcja. Błędne wiersze są pomijane
+    i opisane w podsumowaniu; błąd formatu pliku przerywa import po zapisaniu
+    wcześniejszych wierszy (summary['failed'])
+
+    Returns:
+        Słownik podsumowania: rows, added, updated, rescored, errors,
+        error_samples, chunks, longest_chunk_ms, failed
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    summary = {'rows': 0, 'added': 0, 'updated': 0, 'rescored': 0, 'errors': 0,
+               'error_samples': [], 'chunks': 0, 'longest_chunk_ms': 0.0, 'failed': None}
+    # Mecz ze zmienionym wynikiem w kilku paczkach liczy się raz
+    rescored_ids = set()
+
+    def report(errors):
+        summary['errors'] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(summary['error_samples'])
+        summary['error_samples'].extend(f'{number}: {message}' for number, message in errors[:room])
+
+    def flush(chunk):
+        start = time.perf_counter()
+        # Blokada zapisu od początku paczki - bez SQLITE_BUSY przy podnoszeniu
+        # transakcji odczytu, gdy w międzyczasie pisał ktoś inny
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            added, updated, rescored, errors = write_chunk(conn, chunk)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        summary['added'] += added
+        summary['updated'] += updated
+        rescored_ids.update(rescored)
+        summary['rescored'] = len(rescored_ids)
+        summary['chunks'] += 1
+        summary['longest_chunk_ms'] = max(summary['longest_chunk_ms'],
+                                          (time.perf_counter() - start) * 1000)
+        report(errors)
+
+    chunk = []
+    try:
+        for number, raw in records:
+            summary['rows'] += 1
+            try:
+                chunk.append((number, *validate_row(raw)))
+            except ValueError as e:
+                report([(number, str(e))])
+                continue
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+    except FixtureImportError as e:
+        summary['failed'] = str(e)
+    if chunk:
+        flush(chunk)
+    return summary
+
+
+def import_file(conn, stream, fmt, chunk_size=None):
+    """Importuje plik CSV lub JSON ze strumienia bajtów (przyrostowo, import_rows)"""
+    text = _text_stream(stream)
+    try:
+        try:
+            records = iter_csv(text) if fmt == 'csv' else iter_json(text)
+            return import_rows(conn, records, chunk_size)
+        except UnicodeDecodeError:
+            raise FixtureImportError('Plik nie jest w kodowaniu UTF-8')
+    finally:
+        # Strumień należy do wywołującego (żądanie, plik) - bez zamykania przy sprzątaniu
+        text.detach()
+
+
+def _export(cursor, columns, fmt):
+    """Fragmenty odpowiedzi po EXPORT_BATCH wierszy kursora"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(columns)
+        while rows := cursor.fetchmany(EXPORT_BATCH):
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        separator = '[\n'
+        while rows := cursor.fetchmany(EXPORT_BATCH):
+            yield separator + ',\n'.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False)
+                                         for row in rows)
+            separator = ',\n'
+        yield '[]\n' if separator == '[\n' else '\n]\n'
+
+
+def export_matches(conn, fmt):
+    """Generator eksportu wszystkich meczów (kolumny jak w imporcie)"""
+    cursor = conn.execute(f"SELECT {', '.join(MATCH_COLUMNS)} FROM matches ORDER BY id")
+    yield from _export(cursor, MATCH_COLUMNS, fmt)
+
+
+def export_predictions(conn, fmt):
+    """Generator eksportu wszystkich typów z nazwą użytkownika"""
+    cursor = conn.execute('''
+        SELECT p.id, p.match_id, p.user_id, u.username, p.predicted_home, p.predicted_away,
+               p.status, p.points, p.created_at, p.updated_at
+        FROM predictions p
+        JOIN users u ON u.id = p.user_id
+        ORDER BY p.id
+    ''')
+    yield from _export(cursor, PREDICTION_COLUMNS, fmt)
+
+
+EXPORTS = {'matches': export_matches, 'predictions': export_predictions}
+
+
+def _write_file(path, fmt, rows):
+    """Zapisuje wiersze (słowniki) do pliku testowego CSV lub tablicy JSON"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, MATCH_COLUMNS, lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            f.write('[\n')
+            for i, row in enumerate(rows):
+                f.write((',\n' if i else '') + json.dumps(row, ensure_ascii=False))
+            f.write('\n]\n')
+
+
+def _fixture_rows(count, fmt, invalid_every):
+    """Syntetyczne mecze do importu; co invalid_every-ty wiersz jest błędny"""
+    for i in range(count):
+        row = {'home_team': f'Import {i % 97}', 'away_team': f'Import {i % 89 + 1}',
+               'match_date': f'2030-{i % 12 + 1:02d}-{i % 28 + 1:02d}T{i % 24:02d}:00:00',
+               'competition': 'PL'}
+        if fmt == 'json':
+            # JSON: klucz zewnętrzny i wynik (upsert)
+            row.update(api_match_id=2000000 + i, home_score=i % 5, away_score=i % 3)
+        if invalid_every and i % invalid_every == invalid_every - 1:
+            row['match_date'] = 'jutro'
+        yield row
+
+
+def check(rows=100000, import_ceiling_mb=8.0, export_ceiling_mb=4.0):
+    """
+    Import plików CSV i JSON po rows wierszy oraz eksport meczów i typów przez
+    endpointy panelu admina; szczyt pamięci Pythona (tracemalloc) poniżej limitów,
+    niezależnie od rozmiaru pliku
+    """
+    import tempfile
+    import tracemalloc
+
+    import db
+    import loadtest
+    from app import create_app, seed_db
+
+    invalid_every = 10000
+    results = []
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        loadtest.build_database(database, match_count=2000, user_count=200, predictions_per_user=300)
+        seed_db(database)
+        app = create_app({'DATABASE': database, 'SECRET_KEY': 'import-test'})
+        client = app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+        for fmt in ('csv', 'json'):
+            path = os.path.join(tmp, f'import.{fmt}')
+            _write_file(path, fmt, _fixture_rows(rows, fmt, invalid_every))
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                tracemalloc.start()
+                start = time.perf_counter()
+                response = client.post('/admin/import', input_stream=f, content_length=size,
+                                       content_type=MIMETYPES[fmt])
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+            summary = response.get_json()
+            expected_errors = rows // invalid_every
+            results.append((f'import {fmt}', size / 2 ** 20, rows, elapsed, peak, import_ceiling_mb,
+                            f"dodane {summary['added']}, błędy {summary['errors']}, "
+                            f"paczka max {summary['longest_chunk_ms']:.0f} ms"))
+            if summary['added'] != rows - expected_errors or summary['errors'] != expected_errors \
+                    or summary['failed'] or peak > import_ceiling_mb:
+                failed.append(f'import {fmt}')
+
+        conn = db.connect(database)
+        counts = {kind: conn.execute(f'SELECT COUNT(*) FROM {kind}').fetchone()[0] for kind in EXPORTS}
+        conn.close()
+        for kind in EXPORTS:
+            for fmt in ('csv', 'json'):
+                tracemalloc.start()
+                start = time.perf_counter()
+                response = client.get(f'/admin/export/{kind}.{fmt}', buffered=False)
+                size = 0
+                lines = 0
+                for chunk in response.response:
+                    chunk = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                    size += len(chunk)
+                    lines += chunk.count(b'\n')
+                response.close()
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+                # CSV: nagłówek + wiersze; JSON: nawiasy tablicy + wiersze
+                exported = lines - (1 if fmt == 'csv' else 2)
+                results.append((f'eksport {kind} {fmt}', size / 2 ** 20, exported, elapsed, peak,
+                                export_ceiling_mb, f'w bazie {counts[kind]}'))
+                if exported != counts[kind] or peak > export_ceiling_mb:
+                    failed.append(f'eksport {kind} {fmt}')
+
+    print(f"\n  {'operacja':<26} {'MB':>6} {'wiersze':>8} {'s':>6} {'wiersze/s':>10} "
+          f"{'szczyt MB':>10} {'limit':>6}  uwagi")
+    for label, size, count, elapsed, peak, ceiling, note in results:
+        print(f"  {label:<26} {size:6.1f} {count:8d} {elapsed:6.2f} {count / elapsed:10.0f} "
+              f"{peak:10.2f} {ceiling:6.1f}  {note}")
+    print("  (czasy z włączonym tracemalloc)")
+    if failed:
+        print(f"⚠️  Niezgodność lub przekroczony limit pamięci: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"✓ Import i eksport {rows} wierszy w stałej pamięci")
+
+
+if __name__ == "__main__":
+    import db
+    import migrations
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "import" and len(sys.argv) > 2:
+        fmt = detect_format(sys.argv[2], None)
+        if fmt is None:
+            print("⚠️  Obsługiwane pliki: .csv, .json, .jsonl")
+            sys.exit(1)
+        conn = db.connect(os.getenv('DATABASE_PATH', DATABASE))
+        try:
+            migrations.migrate(conn)
+            with open(sys.argv[2], 'rb') as f:
+                summary = import_file(conn, f, fmt)
+        finally:
+            conn.close()
+        print(f"Wiersze: {summary['rows']}, dodane: {summary['added']}, "
+              f"zaktualizowane: {summary['updated']}, przeliczone: {summary['rescored']}, "
+              f"błędy: {summary['errors']}")
+        for sample in summary['error_samples']:
+            print(f"  {sample}")
+        if summary['failed']:
+            print(f"⚠️  {summary['failed']}")
+            sys.exit(1)
+        print("✓ Import zakończony")
+    elif command == "export" and len(sys.argv) > 3 and sys.argv[2] in EXPORTS \
+            and sys.argv[3] in MIMETYPES:
+        conn = db.connect(os.getenv('DATABASE_PATH', DATABASE))
+        try:
+            for chunk in EXPORTS[sys.argv[2]](conn, sys.argv[3]):
+                sys.stdout.write(chunk)
+        finally:
+            conn.close()
+    elif command == "check":
+        check(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    else:
+        print("Użycie: python fixture_io.py [import <plik> | export matches|predictions csv|json "
+              "| check [wiersze]]")
+        sys.exit(1)
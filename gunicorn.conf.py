@@ -0,0 +1,68 @@
+"""
+Konfiguracja gunicorna (DEPLOYMENT.md)
+Tryb wybierany zmienną GUNICORN_MODE:
+    sync     - proces obsługuje jedno żądanie naraz (wsgi.py)
+    threaded - workery gthread, GUNICORN_THREADS żądań naraz na proces (wsgi.py)
+    async    - ASGI przez worker uvicorna, widoki w puli wątków (asgi.py)
+"""
+
+import gc
+import multiprocessing
+import os
+
+mode = os.getenv('GUNICORN_MODE', 'threaded')
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+graceful_timeout = 30
+accesslog = os.getenv('GUNICORN_ACCESSLOG')
+# Aplikacja ładowana raz w procesie głównym, workery dziedziczą ją przez fork
+# (szybszy start, wspólne strony pamięci, jeden SECRET_KEY przy braku zmiennej)
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+if mode == 'sync':
+    wsgi_app = 'wsgi:application'
+    worker_class = 'sync'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count * 2 + 1))
+    # Worker jest zajęty przez całe żądanie - długie połączenia (/live) przerywa timeout
+    timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+elif mode == 'threaded':
+    wsgi_app = 'wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', '8'))
+    timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+elif mode == 'async':
+    wsgi_app = 'asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count))
+    timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+else:
+    raise ValueError(f'Nieznany GUNICORN_MODE: {mode} (sync, threaded, async)')
+
+
+def on_starting(server):
+    """Migracje schematu raz, w procesie głównym przed uruchomieniem workerów"""
+    from app import init_db, load_config
+    init_db(load_config()['DATABASE'])
+    # Liczniki workerów z poprzedniego uruchomienia nie są już aktualne
+    import metrics
+    metrics.clear_snapshots()
+
+
+def when_ready(server):
+    # Obiekty załadowane przed fork nie są śledzone przez GC - jego przebiegi w workerach
+    # nie zapisują do nich, więc strony pamięci pozostają wspólne (copy-on-write)
+    if preload_app:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s gotowy', worker.pid)
+
+
+def worker_exit(server, worker):
+    # Ostatnia migawka metryk - liczniki zakończonego workera zostają w /metrics
+    import metrics
+    metrics.write_snapshot()
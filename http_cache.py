@@ -0,0 +1,112 @@
+"""
+Dyskowy cache odpowiedzi football-data.org
+Przechowuje ETag/Last-Modified i treść odpowiedzi dla ligi i zakresu dat,
+pozwala wysyłać zapytania warunkowe (czy dane trafiły już do bazy - tabela sync_state).
+Zakres dat przesuwa się codziennie, więc pliki nieużywane dłużej niż kilka dni usuwa prune()
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    """Cache odpowiedzi HTTP w plikach JSON (jeden plik na ligę i zakres dat)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'unchanged': 0, 'pruned': 0}
+
+    def _path(self, competition_code, date_from, date_to):
+        key = f'{competition_code}_{date_from or "-"}_{date_to or "-"}'
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, competition_code, date_from, date_to):
+        """Zwraca zapisany wpis lub None"""
+        path = self._path(competition_code, date_from, date_to)
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, entry):
+        """Nagłówki If-None-Match / If-Modified-Since dla zapisanego wpisu"""
+        request_headers = {}
+        if entry and entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            request_headers['If-Modified-Since'] = entry['last_modified']
+        return request_headers
+
+    def store(self, competition_code, date_from, date_to, response):
+        """
+        Zapisuje odpowiedź 200
+
+        Returns:
+            Nowy wpis cache
+        """
+        entry = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body': response.text,
+        }
+        self._write(competition_code, date_from, date_to, entry)
+        return entry
+
+    def touch(self, competition_code, date_from, date_to):
+        """Oznacza wpis jako używany (odpowiedź 304), żeby prune() go nie usunął"""
+        try:
+            os.utime(self._path(competition_code, date_from, date_to))
+        except OSError:
+            pass
+
+    def prune(self, max_age_days):
+        """
+        Usuwa wpisy (i pozostałe pliki tymczasowe) nieużywane od max_age_days dni
+
+        Returns:
+            Liczba usuniętych plików
+        """
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith(('.json', '.tmp')):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                # Plik usunięty lub zastąpiony przez inny wątek/proces
+                continue
+        with self.lock:
+            self.stats['pruned'] += removed
+        return removed
+
+    def _write(self, competition_code, date_from, date_to, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(competition_code, date_from, date_to)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def count(self, name):
+        """Zwiększa licznik statystyk (hits, misses, unchanged, pruned)"""
+        with self.lock:
+            self.stats[name] += 1
+
+    def summary(self):
+        """Podsumowanie liczników do wypisania na koniec przebiegu"""
+        return (f"Cache API: trafienia (304) {self.stats['hits']}, "
+                f"pobrania {self.stats['misses']}, "
+                f"bez zmian w danych {self.stats['unchanged']}, "
+                f"usunięte stare wpisy {self.stats['pruned']}")
@@ -16,25 +16,32 @@ mkdir -p "$SCRIPT_DIR/logs"
 echo "   ✓ Katalog utworzony: $SCRIPT_DIR/logs"
 echo ""
 
-# Skopiuj pliki .plist
-echo "2. Kopiowanie plików konfiguracyjnych..."
-cp "$SCRIPT_DIR/com.footballpredictions.sync.plist" "$LAUNCH_AGENTS_DIR/"
-cp "$SCRIPT_DIR/com.footballpredictions.update.plist" "$LAUNCH_AGENTS_DIR/"
-echo "   ✓ Pliki skopiowane do $LAUNCH_AGENTS_DIR"
+# Harmonogram adaptacyjny zastępuje zadania uruchamiane co stały czas
+if [ -f "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist" ] || [ -f "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist" ]; then
+    echo "   Usuwanie starych zadań (sync/update)..."
+    launchctl unload "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist" 2>/dev/null
+    launchctl unload "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist" 2>/dev/null
+    rm -f "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist"
+    rm -f "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist"
+    echo ""
+fi
+
+# Skopiuj plik .plist
+echo "2. Kopiowanie pliku konfiguracyjnego..."
+cp "$SCRIPT_DIR/com.footballpredictions.daemon.plist" "$LAUNCH_AGENTS_DIR/"
+echo "   ✓ Plik skopiowany do $LAUNCH_AGENTS_DIR"
 echo ""
 
-# Zaktualizuj ścieżki w plikach .plist (na wypadek gdyby były różne)
-echo "3. Aktualizowanie ścieżek w plikach .plist..."
-sed -i '' "s|/Users/aleksanderdrozdowicz/Documents/licencjat|$SCRIPT_DIR|g" "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist"
-sed -i '' "s|/Users/aleksanderdrozdowicz/Documents/licencjat|$SCRIPT_DIR|g" "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist"
+# Zaktualizuj ścieżki w pliku .plist (na wypadek gdyby były różne)
+echo "3. Aktualizowanie ścieżek w pliku .plist..."
+sed -i '' "s|/Users/aleksanderdrozdowicz/Documents/licencjat|$SCRIPT_DIR|g" "$LAUNCH_AGENTS_DIR/com.footballpredictions.daemon.plist"
 echo "   ✓ Ścieżki zaktualizowane"
 echo ""
 
-# Załaduj zadania
-echo "4. Ładowanie zadań do launchd..."
-launchctl load "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist" 2>/dev/null || launchctl load -w "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist"
-launchctl load "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist" 2>/dev/null || launchctl load -w "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist"
-echo "   ✓ Zadania załadowane"
+# Załaduj zadanie
+echo "4. Ładowanie zadania do launchd..."
+launchctl load "$LAUNCH_AGENTS_DIR/com.footballpredictions.daemon.plist" 2>/dev/null || launchctl load -w "$LAUNCH_AGENTS_DIR/com.footballpredictions.daemon.plist"
+echo "   ✓ Zadanie załadowane"
 echo ""
 
 # Sprawdź status
@@ -52,12 +59,11 @@ echo "Instalacja zakończona!"
 echo "=========================================="
 echo ""
 echo "Harmonogram:"
-echo "  • Pełna synchronizacja: Codziennie o 00:00"
-echo "  • Szybka aktualizacja: Co godzinę"
+echo "  • Pełna synchronizacja: Raz na dobę"
+echo "  • Aktualizacja wyników: Co 2 minuty pod koniec meczów, rzadziej po ich zakończeniu"
 echo ""
 echo "Logi:"
-echo "  • $SCRIPT_DIR/logs/sync_full.log"
-echo "  • $SCRIPT_DIR/logs/sync_update.log"
+echo "  • $SCRIPT_DIR/logs/sync_daemon.log"
 echo ""
 echo "Aby sprawdzić status:"
 echo "  launchctl list | grep footballpredictions"
@@ -0,0 +1,131 @@
+"""
+Ranking użytkowników
+Kolejność czytana z indeksu na user_scores, pozycja liczona z tabeli
+leaderboard_buckets (liczba użytkowników dla każdej liczby punktów)
+"""
+
+PER_PAGE = 50
+
+
+def move_users(cursor, changes):
+    """
+    Przenosi użytkowników między kubełkami punktowymi
+
+    Args:
+        changes: Lista krotek (stare punkty lub None dla nowego wpisu,
+                 nowe punkty lub None dla usuniętego wpisu)
+    """
+    counts = {}
+    for old_points, new_points in changes:
+        if old_points == new_points:
+            continue
+        if old_points is not None:
+            counts[old_points] = counts.get(old_points, 0) - 1
+        if new_points is not None:
+            counts[new_points] = counts.get(new_points, 0) + 1
+
+    cursor.executemany('''
+        INSERT INTO leaderboard_buckets (points, users) VALUES (?, ?)
+        ON CONFLICT(points) DO UPDATE SET users = users + excluded.users
+    ''', [(points, count) for points, count in counts.items() if count])
+    cursor.execute('DELETE FROM leaderboard_buckets WHERE users <= 0')
+
+
+def rebuild(cursor):
+    """Odbudowuje kubełki na podstawie user_scores"""
+    cursor.execute('DELETE FROM leaderboard_buckets')
+    cursor.execute('''
+        INSERT INTO leaderboard_buckets (points, users)
+        SELECT points, COUNT(*) FROM user_scores GROUP BY points
+    ''')
+
+
+def check(cursor):
+    """Zwraca listę niezgodności kubełków z user_scores"""
+    cursor.execute('''
+        WITH expected AS (
+            SELECT points, COUNT(*) AS users FROM user_scores GROUP BY points
+        )
+        SELECT e.points, e.users AS expected, COALESCE(b.users, 0) AS stored
+        FROM expected e LEFT JOIN leaderboard_buckets b ON b.points = e.points
+        WHERE COALESCE(b.users, 0) != e.users
+        UNION ALL
+        SELECT b.points, 0, b.users
+        FROM leaderboard_buckets b
+        WHERE b.points NOT IN (SELECT points FROM user_scores)
+    ''')
+    return [f"ranking, {row['points']} pkt: {row['stored']} użytkowników zamiast {row['expected']}"
+            for row in cursor.fetchall()]
+
+
+def _rank_for_points(cursor, points):
+    """Pozycja dla danej liczby punktów (1 + liczba użytkowników z większą liczbą punktów)"""
+    cursor.execute('SELECT COALESCE(SUM(users), 0) FROM leaderboard_buckets WHERE points > ?',
+                   (points,))
+    return cursor.fetchone()[0] + 1
+
+
+def get_user_position(conn, user_id):
+    """
+    Pozycja użytkownika w rankingu
+
+    Returns:
+        Słownik z rank, points, correct, total lub None gdy użytkownik nie ma ocenionych typów
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT points, correct, total FROM user_scores WHERE user_id = ?', (user_id,))
+    score = cursor.fetchone()
+    if not score:
+        return None
+    return {
+        'rank': _rank_for_points(cursor, score['points']),
+        'points': score['points'],
+        'correct': score['correct'],
+        'total': score['total'],
+    }
+
+
+def count_users(conn):
+    """Liczba użytkowników w rankingu"""
+    row = conn.execute('SELECT COALESCE(SUM(users), 0) FROM leaderboard_buckets').fetchone()
+    return row[0]
+
+
+def get_page(conn, page=1, per_page=PER_PAGE):
+    """
+    Strona rankingu (od najwyższej liczby punktów)
+
+    Returns:
+        Lista słowników z rank, user_id, username, points, correct, total
+    """
+    cursor = conn.cursor()
+    offset = (page - 1) * per_page
+    # CROSS JOIN - user_scores czytane jako pierwsze, w kolejności idx_user_scores_rank
+    # (bez tego planer przy małej liczbie użytkowników skanuje users i sortuje)
+    cursor.execute('''
+        SELECT s.user_id, u.username, s.points, s.correct, s.total
+        FROM user_scores s
+        CROSS JOIN users u ON u.id = s.user_id
+        ORDER BY s.points DESC, s.correct DESC, s.user_id ASC
+        LIMIT ? OFFSET ?
+    ''', (per_page, offset))
+    rows = cursor.fetchall()
+
+    entries = []
+    rank = None
+    previous_points = None
+    for position, row in enumerate(rows, start=offset + 1):
+        if rank is None:
+            rank = _rank_for_points(cursor, row['points'])
+        elif row['points'] != previous_points:
+            rank = position
+        previous_points = row['points']
+        entries.append({
+            'rank': rank,
+            'user_id': row['user_id'],
+            'username': row['username'],
+            'points': row['points'],
+            'correct': row['correct'],
+            'total': row['total'],
+        })
+    return entries
@@ -0,0 +1,322 @@
+"""
+Strumień zmian wyników na żywo (SSE, /live)
+Jeden wątek rozgłaszający na proces (workera) czyta nowe wiersze score_events
+i rozsyła gotowe ramki do kolejek subskrybentów - liczba zapytań do bazy
+nie zależy od liczby podłączonych klientów
+"""
+
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+import db
+
+DATABASE = 'football_predictions.db'
+
+# Konfiguracja (nadpisywana zmiennymi środowiskowymi)
+POLL_INTERVAL = float(os.getenv('LIVE_POLL_INTERVAL', '1'))
+HEARTBEAT = float(os.getenv('LIVE_HEARTBEAT', '15'))
+QUEUE_SIZE = int(os.getenv('LIVE_QUEUE_SIZE', '100'))
+REPLAY_LIMIT = int(os.getenv('LIVE_REPLAY_LIMIT', '200'))
+# Maksymalna liczba strumieni /live na worker w trybie threaded; powyżej - 503
+# i odpytywanie /live/events. Musi być mniejsza niż liczba wątków workera
+# (GUNICORN_THREADS) - każdy strumień zajmuje wątek. 0 - bez limitu (tryb async)
+MAX_SUBSCRIBERS = int(os.getenv('LIVE_MAX_SUBSCRIBERS', '4'))
+# Nagłówek Retry-After odpowiedzi 503
+RETRY_AFTER = 30
+
+EVENTS_SQL = '''
+    SELECT e.seq, e.match_id, e.home_score, e.away_score, e.deltas,
+           m.home_team, m.away_team
+    FROM score_events e
+    LEFT JOIN matches m ON m.id = e.match_id
+'''
+
+
+class LiveBusy(RuntimeError):
+    """Osiągnięty limit strumieni w procesie (MAX_SUBSCRIBERS) - odpowiedź 503"""
+
+
+def event_data(row):
+    """Treść zdarzenia dla wiersza score_events (SSE i /live/events)"""
+    return {
+        'match_id': row['match_id'],
+        'home_team': row['home_team'],
+        'away_team': row['away_team'],
+        'score': ([row['home_score'], row['away_score']]
+                  if row['home_score'] is not None else None),
+        'leaderboard': json.loads(row['deltas']),
+    }
+
+
+def format_event(row):
+    """Ramka SSE dla wiersza score_events (id = seq, do wznowienia przez Last-Event-ID)"""
+    data = json.dumps(event_data(row), separators=(',', ':'), ensure_ascii=False)
+    return f"id: {row['seq']}\nevent: score\ndata: {data}\n\n"
+
+
+def events_after(conn, last_seq=None, limit=REPLAY_LIMIT):
+    """
+    Zdarzenia nowsze niż last_seq (odpytywanie, gdy strumień jest niedostępny)
+
+    Returns:
+        Krotka (lista zdarzeń z polem seq, seq ostatniego zdarzenia); bez last_seq
+        tylko bieżący seq - klient zaczyna od zdarzeń, które nastąpią później
+    """
+    if last_seq is None:
+        row = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM score_events').fetchone()
+        return [], row[0]
+    rows = conn.execute(f'{EVENTS_SQL} WHERE e.seq > ? ORDER BY e.seq LIMIT ?',
+                        (last_seq, limit)).fetchall()
+    events = [dict(event_data(row), seq=row['seq']) for row in rows]
+    return events, rows[-1]['seq'] if rows else last_seq
+
+
+class Subscriber:
+    """Kolejka ramek jednego klienta (wątek workera); None kończy strumień"""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+
+    def put_nowait(self, frame):
+        """Dodaje ramkę (queue.Full - klient nie nadąża)"""
+        self.queue.put_nowait(frame)
+
+    def close(self):
+        """Odłącza klienta, który nie nadąża (wznowi od Last-Event-ID)"""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait(None)
+
+
+class Broadcaster:
+    """Wątek rozgłaszający jednego procesu, uruchamiany przy pierwszym subskrybencie"""
+
+    def __init__(self, database, poll_interval=POLL_INTERVAL):
+        self.database = database
+        self.poll_interval = poll_interval
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._conn = None
+        self._pid = os.getpid()
+        self._data_version = None
+        self.last_seq = None
+        self.polls = 0
+        self.queries = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def _check_fork(self):
+        """Wątek i połączenie nie przechodzą do procesu potomnego (fork)"""
+        if self._pid != os.getpid():
+            self._subscribers = set()
+            self._thread = None
+            self._conn = None
+            self._data_version = None
+            self.last_seq = None
+            self._pid = os.getpid()
+
+    def subscribe(self, last_seq=None, subscriber=None, limit=None):
+        """
+        Rejestruje klienta
+
+        Args:
+            last_seq: Ostatnie odebrane zdarzenie (Last-Event-ID) - brakujące
+                      zdarzenia są dosyłane z bazy (maks. REPLAY_LIMIT)
+            subscriber: Kolejka klienta (domyślnie nowy Subscriber; asgi.py - AsyncSubscriber)
+            limit: Maksymalna liczba klientów (None lub 0 - bez limitu)
+
+        Raises:
+            LiveBusy: Gdy osiągnięto limit klientów
+        """
+        subscriber = subscriber or Subscriber()
+        with self._lock:
+            self._check_fork()
+            if limit and len(self._subscribers) >= limit:
+                raise LiveBusy('Zbyt wiele otwartych strumieni /live.')
+            if self._conn is None:
+                self._conn = db.connect(self.database)
+            if self._thread is None:
+                # Wątek nie działał (brak klientów) - zdarzenia z tego czasu nie są rozsyłane,
+                # dostaje je tylko klient z Last-Event-ID (maks. REPLAY_LIMIT)
+                self.last_seq = self._conn.execute(
+                    'SELECT COALESCE(MAX(seq), 0) FROM score_events').fetchone()[0]
+                self._data_version = None
+
+            # Pod blokadą - nic nie zostanie rozesłane między odczytem a rejestracją
+            if last_seq is not None and last_seq < self.last_seq:
+                rows = self._conn.execute(f'''
+                    {EVENTS_SQL}
+                    WHERE e.seq > ? AND e.seq <= ?
+                    ORDER BY e.seq DESC
+                    LIMIT ?
+                ''', (last_seq, self.last_seq, min(REPLAY_LIMIT, QUEUE_SIZE - 1))).fetchall()
+                for row in reversed(rows):
+                    subscriber.put_nowait(format_event(row))
+
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-broadcaster',
+                                                daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                # Bez klientów wątek kończy pracę (wznowi go następny subscribe)
+                if not self._subscribers or self._pid != os.getpid():
+                    self._thread = None
+                    return
+                self._poll()
+            time.sleep(self.poll_interval)
+
+    def _poll(self):
+        """Rozsyła nowe zdarzenia; wywoływane pod blokadą"""
+        self.polls += 1
+        # PRAGMA data_version zmienia się tylko po zapisie innego połączenia
+        data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        self.queries += 1
+        rows = self._conn.execute(f'{EVENTS_SQL} WHERE e.seq > ? ORDER BY e.seq',
+                                  (self.last_seq,)).fetchall()
+        for row in rows:
+            frame = format_event(row)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(frame)
+                    self.delivered += 1
+                except queue.Full:
+                    self._subscribers.discard(subscriber)
+                    subscriber.close()
+                    self.dropped += 1
+            self.last_seq = row['seq']
+
+
+_broadcasters = {}
+_broadcasters_lock = threading.Lock()
+
+
+def get_broadcaster(database):
+    """Broadcaster procesu dla danej bazy"""
+    with _broadcasters_lock:
+        if database not in _broadcasters:
+            _broadcasters[database] = Broadcaster(database)
+        return _broadcasters[database]
+
+
+def stream(broadcaster, subscriber, heartbeat=HEARTBEAT):
+    """Generator odpowiedzi text/event-stream (komentarz co heartbeat sekund)"""
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                frame = subscriber.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            if frame is None:
+                return
+            yield frame
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+def benchmark(subscriber_count=1000, event_count=20, poll_interval=0.05):
+    """
+    Symulacja subscriber_count klientów (każdy we własnym wątku) i event_count
+    wyników meczów; sprawdza, że każdy klient dostał wszystkie zdarzenia w kolejności
+    """
+    import migrations
+    import scores
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'live.db')
+        conn = db.connect(database)
+        migrations.migrate(conn)
+        conn.executemany('''
+            INSERT INTO matches (home_team, away_team, match_date, created_at)
+            VALUES (?, ?, '2030-01-01T20:00:00', '2030-01-01T00:00:00')
+        ''', [(f'Gospodarze {i}', f'Goście {i}') for i in range(event_count)])
+        conn.execute('''
+            INSERT INTO users (username, password_hash, role, created_at)
+            VALUES ('kibic', '-', 'USER', '2030-01-01T00:00:00')
+        ''')
+        conn.executemany('''
+            INSERT INTO predictions (user_id, match_id, predicted_home, predicted_away, created_at)
+            VALUES (1, ?, 1, 0, '2030-01-01T00:00:00')
+        ''', [(i + 1,) for i in range(event_count)])
+        conn.commit()
+
+        broadcaster = Broadcaster(database, poll_interval)
+        received = [[] for _ in range(subscriber_count)]
+        latencies = []
+        sent_at = {}
+
+        def client(index, subscriber):
+            for frame in stream(broadcaster, subscriber, heartbeat=1):
+                if frame.startswith('id: '):
+                    seq = int(frame[4:frame.index('\n')])
+                    received[index].append(seq)
+                    if index == 0:
+                        latencies.append(time.perf_counter() - sent_at[seq])
+                    if len(received[index]) == event_count:
+                        return
+
+        print(f"Podłączanie {subscriber_count} klientów...")
+        threads = []
+        for index in range(subscriber_count):
+            thread = threading.Thread(target=client, args=(index, broadcaster.subscribe()),
+                                      daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        start = time.perf_counter()
+        for match_id in range(1, event_count + 1):
+            conn.execute('UPDATE matches SET home_score = 1, away_score = 0 WHERE id = ?',
+                         (match_id,))
+            scores.apply_match_result(conn, match_id)
+            sent_at[match_id] = time.perf_counter()
+            conn.commit()
+            time.sleep(poll_interval * 2)
+        for thread in threads:
+            thread.join(timeout=30)
+        elapsed = time.perf_counter() - start
+        conn.close()
+
+        complete = sum(1 for seqs in received if seqs == list(range(1, event_count + 1)))
+        print(f"\nZdarzenia: {event_count}, klienci: {subscriber_count}, czas: {elapsed:.2f} s")
+        print(f"Dostarczone ramki: {broadcaster.delivered}, odłączeni (wolni): {broadcaster.dropped}")
+        print(f"Odpytania bazy: {broadcaster.polls} (zapytania o zdarzenia: {broadcaster.queries})")
+        if latencies:
+            print(f"Opóźnienie dostarczenia (klient 0): maks. {max(latencies) * 1000:.1f} ms")
+        if complete != subscriber_count:
+            print(f"⚠️  Komplet zdarzeń w kolejności dostało {complete} z {subscriber_count} klientów")
+            sys.exit(1)
+        print(f"✓ Wszyscy klienci ({subscriber_count}) dostali komplet zdarzeń w kolejności")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+    else:
+        print("Użycie: python live.py benchmark [liczba_klientów]")
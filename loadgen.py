@@ -0,0 +1,349 @@
+"""
+Generator obciążenia dla trybów uruchomienia (DEPLOYMENT.md)
+Uruchamia gunicorna w trybie sync, threaded i async na bazie syntetycznej
+i mierzy przepustowość /matches i /predict przy równoczesnych klientach,
+także gdy część workerów trzymają otwarte połączenia /live.
+Tryb boot porównuje czas startu i pamięć workerów z preload_app i bez,
+tryb logins - opóźnienia /matches podczas fali logowań (hashowanie haseł
+w wątku żądania i w puli procesów, passwords.py)
+"""
+
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+import db
+import loadtest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MODES = ('sync', 'threaded', 'async')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, workers, threads, workdir, port, preload=True, stderr=subprocess.DEVNULL,
+                 env_extra=None):
+    """Uruchamia gunicorna w katalogu z bazą; zwraca proces po otwarciu portu"""
+    env = dict(os.environ, GUNICORN_MODE=mode, WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads), GUNICORN_BIND=f'127.0.0.1:{port}',
+               GUNICORN_PRELOAD='1' if preload else '0', PYTHONPATH=ROOT, **(env_extra or {}))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py')],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=stderr, text=True)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn ({mode}) zakończył się z kodem {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f'gunicorn ({mode}) nie wystartował')
+
+
+def login(port, username):
+    """Loguje użytkownika, zwraca nagłówek Cookie"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request('POST', '/login', urlencode({'username': username, 'password': 'loadtest'}),
+                 {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def hold_live(port, cookie, stop):
+    """Otwarte połączenie /live (jak przeglądarka na liście meczów)"""
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+        conn.request('GET', '/live', headers={'Cookie': cookie})
+        response = conn.getresponse()
+        while not stop.is_set():
+            try:
+                response.fp.readline()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+        conn.close()
+    except OSError:
+        pass
+
+
+def client(port, cookie, match_ids, stop, timings, errors, seed, write_ratio=0.2, interval=0):
+    """
+    Pętla żądań: /matches i /predict w proporcji write_ratio (keep-alive);
+    interval > 0 - stałe tempo (żądanie co interval s) zamiast jak najszybciej
+    """
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        if interval:
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+        start = time.perf_counter()
+        try:
+            if rng.random() >= write_ratio:
+                conn.request('GET', '/matches', headers={'Cookie': cookie})
+                expected = 200
+            else:
+                body = urlencode({'match_id': rng.choice(match_ids),
+                                  'predicted_home': rng.randint(0, 4),
+                                  'predicted_away': rng.randint(0, 4)})
+                conn.request('POST', '/predict', body, {
+                    'Cookie': cookie, 'Content-Type': 'application/x-www-form-urlencoded'})
+                expected = 302
+            response = conn.getresponse()
+            response.read()
+            if response.status != expected:
+                errors.append(response.status)
+            else:
+                timings.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.close()
+
+
+def measure(port, cookies, match_ids, concurrency, duration, live_clients, write_ratio=0.2,
+            interval=0):
+    """Zwraca (żądania/s, p50 ms, p99 ms, błędy)"""
+    stop = threading.Event()
+    holders = [threading.Thread(target=hold_live, args=(port, cookies[i % len(cookies)], stop),
+                                daemon=True)
+               for i in range(live_clients)]
+    for holder in holders:
+        holder.start()
+    time.sleep(0.5 if live_clients else 0)
+
+    timings, errors = [], []
+    workers = [threading.Thread(target=client, daemon=True, args=(
+        port, cookies[i % len(cookies)], match_ids, stop, timings, errors, i, write_ratio, interval))
+        for i in range(concurrency)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=35)
+    elapsed = time.perf_counter() - start
+    for holder in holders:
+        holder.join(timeout=5)
+
+    if not timings:
+        return 0.0, None, None, len(errors)
+    return (len(timings) / elapsed, loadtest.percentile(timings, 0.50) * 1000,
+            loadtest.percentile(timings, 0.99) * 1000, len(errors))
+
+
+def storm(port, usernames, stop, counts, seed):
+    """Fala logowań (nowe połączenie na każde, jak przeglądarki kibiców)"""
+    rng = random.Random(seed)
+    while not stop.is_set():
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('POST', '/login', urlencode({'username': rng.choice(usernames),
+                                                      'password': 'loadtest'}),
+                         {'Content-Type': 'application/x-www-form-urlencoded'})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            key = {302: 'ok', 503: 'busy'}.get(response.status, 'errors')
+        except (OSError, http.client.HTTPException):
+            key = 'errors'
+        counts[key] = counts.get(key, 0) + 1
+        if key == 'busy':
+            # Jak przeglądarka ze stroną "spróbuj za chwilę" - ponowienie po Retry-After
+            stop.wait(int(response.getheader('Retry-After', '1')))
+
+
+def logins(workers=2, threads=8, concurrency=4, rate=40, storm_clients=32, duration=8):
+    """
+    Opóźnienia /matches (stałe tempo rate żądań/s, jak zwykły ruch) bez logowań
+    i w trakcie fali logowań: hashowanie w wątku żądania (PASSWORD_HASH_PROCESSES=0)
+    i w puli procesów
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        print("Tworzenie bazy testowej (5000 meczów)...")
+        user_count = concurrency + storm_clients
+        loadtest.build_database(database, match_count=5000, user_count=user_count,
+                                predictions_per_user=100)
+        usernames = [f'user{i}' for i in range(concurrency, user_count)]
+
+        for label, processes in (('w wątku żądania', '0'), ('pula procesów', '1')):
+            port = free_port()
+            process = start_server('threaded', workers, threads, tmp, port,
+                                   env_extra={'PASSWORD_HASH_PROCESSES': processes})
+            try:
+                cookies = [login(port, f'user{i}') for i in range(concurrency)]
+                print(f"  {label}...")
+                interval = concurrency / rate
+                base = measure(port, cookies, [], concurrency, duration, 0, 0, interval)
+
+                stop = threading.Event()
+                counts = {}
+                stormers = [threading.Thread(target=storm, daemon=True,
+                                             args=(port, usernames, stop, counts, i))
+                            for i in range(storm_clients)]
+                for stormer in stormers:
+                    stormer.start()
+                loaded = measure(port, cookies, [], concurrency, duration, 0, 0, interval)
+                stop.set()
+                for stormer in stormers:
+                    stormer.join(timeout=35)
+                results.append((label, base, loaded, counts))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+    print(f"\nTryb threaded, {workers} workery × {threads} wątków, /matches {rate} żądań/s, "
+          f"{storm_clients} klientów logujących się, {duration} s na pomiar")
+    print(f"  {'hashowanie':<18} {'p50 ms':>8} {'p99 ms':>8}   {'w fali: p50':>11} {'p99':>8} "
+          f"{'/matches/s':>10} {'logowania/s':>12} {'503':>6}")
+    for label, base, loaded, counts in results:
+        print(f"  {label:<18} {base[1]:8.1f} {base[2]:8.1f}   {loaded[1]:11.1f} {loaded[2]:8.1f} "
+              f"{loaded[0]:10.1f} {counts.get('ok', 0) / duration:12.1f} {counts.get('busy', 0):6d}")
+
+
+def memory(pid):
+    """
+    Pamięć procesu w kB z /proc/<pid>/smaps_rollup (Linux):
+    rss, pss (strony wspólne dzielone przez liczbę procesów), uss (tylko prywatne)
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': values['Rss'], 'pss': values['Pss'],
+            'uss': values['Private_Clean'] + values['Private_Dirty']}
+
+
+def boot(workers=4, threads=8, warmup=3):
+    """Czas startu i pamięć workerów (tryb threaded) bez preload_app i z nim"""
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("⚠️  Pomiar pamięci wymaga /proc/<pid>/smaps_rollup (Linux)")
+        sys.exit(1)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        loadtest.build_database(database, match_count=5000, user_count=workers,
+                                predictions_per_user=100)
+        conn = db.connect(database)
+        match_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM matches WHERE home_score IS NULL AND match_date > "
+            "strftime('%Y-%m-%dT%H:%M:%S', 'now')")]
+        conn.close()
+
+        for preload in (False, True):
+            port = free_port()
+            start = time.perf_counter()
+            process = start_server('threaded', workers, threads, tmp, port, preload,
+                                   stderr=subprocess.PIPE)
+            worker_pids = []
+            while len(worker_pids) < workers:
+                line = process.stderr.readline()
+                if not line:
+                    raise RuntimeError('gunicorn zakończył się przed startem workerów')
+                if 'gotowy' in line:
+                    worker_pids.append(int(line.split('Worker ', 1)[1].split()[0]))
+            boot_time = time.perf_counter() - start
+            threading.Thread(target=process.stderr.read, daemon=True).start()
+
+            try:
+                idle = [memory(pid) for pid in worker_pids]
+                cookies = [login(port, f'user{i}') for i in range(workers)]
+                measure(port, cookies, match_ids, workers * 2, warmup, 0)
+                loaded = [memory(pid) for pid in worker_pids]
+                master = memory(process.pid)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            results.append((preload, boot_time, master, idle, loaded))
+
+    print(f"\nTryb threaded, {workers} workery, pamięć w MB (średnio na worker)")
+    print(f"  {'':<14} {'start s':>8} {'RSS':>7} {'PSS':>7} {'USS':>7} "
+          f"{'RSS po':>8} {'PSS po':>8} {'USS po':>8} {'razem PSS':>10}")
+    for preload, boot_time, master, idle, loaded in results:
+        def avg(samples, key):
+            return sum(sample[key] for sample in samples) / len(samples) / 1024
+        total = (master['pss'] + sum(sample['pss'] for sample in loaded)) / 1024
+        print(f"  {'preload' if preload else 'bez preload':<14} {boot_time:8.2f} "
+              f"{avg(idle, 'rss'):7.1f} {avg(idle, 'pss'):7.1f} {avg(idle, 'uss'):7.1f} "
+              f"{avg(loaded, 'rss'):8.1f} {avg(loaded, 'pss'):8.1f} {avg(loaded, 'uss'):8.1f} "
+              f"{total:10.1f}")
+    print(f"\n(\"po\" - po {warmup} s obciążenia; \"razem PSS\" - proces główny i wszystkie workery)")
+
+
+def run(modes=MODES, workers=2, threads=8, concurrency=16, duration=10, live_clients=None):
+    if live_clients is None:
+        live_clients = workers
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        if 'async' in modes:
+            print("⚠️  Brak pakietu uvicorn - tryb async zostanie pominięty")
+            modes = [mode for mode in modes if mode != 'async']
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        print("Tworzenie bazy testowej (5000 meczów)...")
+        loadtest.build_database(database, match_count=5000, user_count=concurrency,
+                                predictions_per_user=100)
+        conn = db.connect(database)
+        match_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM matches WHERE home_score IS NULL AND match_date > "
+            "strftime('%Y-%m-%dT%H:%M:%S', 'now')")]
+        conn.close()
+
+        for mode in modes:
+            port = free_port()
+            process = start_server(mode, workers, threads, tmp, port)
+            try:
+                cookies = [login(port, f'user{i}') for i in range(concurrency)]
+                for live in (0, live_clients):
+                    label = f"{mode} + {live} × /live" if live else mode
+                    print(f"  {label}...")
+                    results.append((label, *measure(port, cookies, match_ids, concurrency,
+                                                    duration, live)))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+    print(f"\nWorkery: {workers}, wątki (threaded): {threads}, klienci: {concurrency}, "
+          f"{duration} s na pomiar, /matches 80% + /predict 20%")
+    print(f"  {'tryb':<24} {'żądania/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'błędy':>7}")
+    for label, rate, p50, p99, errors in results:
+        p50_text = f"{p50:9.1f}" if p50 is not None else f"{'-':>9}"
+        p99_text = f"{p99:9.1f}" if p99 is not None else f"{'-':>9}"
+        print(f"  {label:<24} {rate:10.1f} {p50_text} {p99_text} {errors:7d}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'boot':
+        boot(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'logins':
+        logins()
+    else:
+        run(sys.argv[1:] or MODES)
@@ -0,0 +1,276 @@
+"""
+Test obciążeniowy listy meczów (/matches) na syntetycznej bazie
+Mierzy opóźnienia p50/p99 dla pierwszej i dalszych stron, filtrów
+oraz dawnego zapytania pobierającego wszystkie mecze; porównuje /matches (HTML)
+z /api/v1/matches (JSON, gzip, 304) oraz żądania/s na /matches z pulą połączeń
+i WAL a z dawnym połączeniem na żądanie
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+import db
+import migrations
+
+COMPETITIONS = ['PL', 'PD', 'BL1', 'SA', 'FL1', 'CL']
+
+
+def build_database(path, match_count=50000, user_count=200, predictions_per_user=300):
+    """Tworzy bazę z syntetycznymi meczami (kilka sezonów) i typami użytkowników"""
+    conn = db.connect(path)
+    migrations.migrate(conn)
+    rng = random.Random(42)
+    now = datetime.now()
+    start = now - timedelta(hours=match_count * 2)
+
+    matches = []
+    for i in range(match_count):
+        match_date = start + timedelta(hours=i * 2 + rng.randint(0, 3))
+        finished = match_date < now
+        matches.append((f'Drużyna {rng.randint(1, 120)}', f'Drużyna {rng.randint(1, 120)}',
+                        match_date.strftime('%Y-%m-%dT%H:%M:%S'),
+                        rng.randint(0, 4) if finished else None,
+                        rng.randint(0, 4) if finished else None,
+                        now.isoformat(), 500000 + i, COMPETITIONS[i % len(COMPETITIONS)]))
+    # Kilkaset przyszłych meczów do typowania
+    for i in range(500):
+        match_date = now + timedelta(hours=i * 3 + 1)
+        matches.append((f'Drużyna {rng.randint(1, 120)}', f'Drużyna {rng.randint(1, 120)}',
+                        match_date.strftime('%Y-%m-%dT%H:%M:%S'), None, None,
+                        now.isoformat(), 900000 + i, COMPETITIONS[i % len(COMPETITIONS)]))
+    conn.executemany('''
+        INSERT INTO matches (home_team, away_team, match_date, home_score, away_score,
+                             created_at, api_match_id, competition)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', matches)
+
+    password_hash = generate_password_hash('loadtest')
+    conn.executemany('INSERT INTO users (username, password_hash, role, created_at) VALUES (?, ?, ?, ?)',
+                     [(f'user{i}', password_hash, 'USER', now.isoformat()) for i in range(user_count)])
+
+    total_matches = len(matches)
+    predictions = []
+    for user_id in range(1, user_count + 1):
+        for match_id in rng.sample(range(1, total_matches + 1), predictions_per_user):
+            predictions.append((user_id, match_id, rng.randint(0, 3), rng.randint(0, 3),
+                                now.isoformat()))
+    conn.executemany('''
+        INSERT INTO predictions (user_id, match_id, predicted_home, predicted_away, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', predictions)
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    return total_matches
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def measure(label, request, repeat):
+    """Wykonuje request() repeat razy i wypisuje p50/p99 w milisekundach"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"  {label:<38} p50 {percentile(timings, 0.50):8.2f} ms   "
+          f"p99 {percentile(timings, 0.99):8.2f} ms")
+
+
+def compare_api(client, repeat):
+    """Rozmiar odpowiedzi i opóźnienia: strona HTML a ta sama strona w API"""
+    html = client.get('/matches')
+    plain = client.get('/api/v1/matches')
+    compressed = client.get('/api/v1/matches', headers={'Accept-Encoding': 'gzip'})
+    etag = compressed.headers['ETag']
+
+    print("\nRozmiar odpowiedzi (50 meczów):")
+    print(f"  /matches (HTML)                        {len(html.data):8d} B")
+    print(f"  /api/v1/matches (JSON)                 {len(plain.data):8d} B")
+    print(f"  /api/v1/matches (JSON + gzip)          {len(compressed.data):8d} B")
+
+    def get(url, headers=None, status=200):
+        response = client.get(url, headers=headers)
+        if response.status_code != status:
+            raise RuntimeError(f'{url}: HTTP {response.status_code}')
+
+    print("\nOpóźnienia:")
+    measure('/matches (HTML)', lambda: get('/matches'), repeat)
+    measure('/api/v1/matches (JSON + gzip)',
+            lambda: get('/api/v1/matches', {'Accept-Encoding': 'gzip'}), repeat)
+    measure('/api/v1/matches (If-None-Match, 304)',
+            lambda: get('/api/v1/matches', {'Accept-Encoding': 'gzip', 'If-None-Match': etag}, 304),
+            repeat)
+
+
+class PerRequestConnections:
+    """Dawna obsługa połączeń: nowe sqlite3.connect przy każdym żądaniu, bez puli i bez WAL"""
+
+    def __init__(self, database):
+        self.database = database
+
+    def acquire(self):
+        conn = sqlite3.connect(self.database)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn):
+        conn.close()
+
+    def close_all(self):
+        pass
+
+
+def requests_per_second(flask_app, database, url, seconds, threads):
+    """
+    Liczba żądań/s na url z `threads` wątków (osobny zalogowany klient na wątek)
+    przy zapisie wyniku meczu co 50 ms w tle (jak sync_matches.py)
+    """
+    clients = []
+    for i in range(threads):
+        client = flask_app.test_client()
+        client.post('/login', data={'username': f'user{i}', 'password': 'loadtest'})
+        clients.append(client)
+
+    stop = threading.Event()
+    counts = [0] * threads
+    errors = []
+
+    def reader(index):
+        while not stop.is_set():
+            response = clients[index].get(url)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                return
+            counts[index] += 1
+
+    def writer():
+        # Zwykłe połączenie - nie zmienia trybu dziennika bazy
+        conn = sqlite3.connect(database, timeout=30)
+        match_id = conn.execute('SELECT MIN(id) FROM matches WHERE home_score IS NOT NULL').fetchone()[0]
+        score = 0
+        while not stop.is_set():
+            score = (score + 1) % 5
+            conn.execute('UPDATE matches SET home_score = ? WHERE id = ?', (score, match_id))
+            conn.commit()
+            time.sleep(0.05)
+        conn.close()
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    if errors:
+        raise RuntimeError(f'{url}: HTTP {errors[0]}')
+    return sum(counts) / seconds
+
+
+def compare_connections(flask_app, database, seconds=5, threads=(1, 4)):
+    """Żądania/s na /matches: połączenie na żądanie bez WAL (przed) a pula i WAL (po)"""
+    import fixture_cache
+
+    print(f"\n/matches - żądania/s ({seconds} s na pomiar, zapis wyniku co 50 ms w tle):")
+    pool = db.get_pool(database)
+    results = {}
+    for label, legacy in (('przed: connect na żądanie, bez WAL', True),
+                          ('po: pula połączeń, WAL', False)):
+        pool.close_all()
+        mode = 'delete' if legacy else 'wal'
+        conn = sqlite3.connect(database)
+        if conn.execute(f'PRAGMA journal_mode = {mode}').fetchone()[0] != mode:
+            raise RuntimeError(f'Nie udało się przełączyć bazy w tryb {mode} (otwarte połączenia)')
+        conn.close()
+        db._pools[database] = PerRequestConnections(database) if legacy else pool
+        try:
+            for count in threads:
+                fixture_cache.cache.backend.clear()
+                rps = requests_per_second(flask_app, database, '/matches', seconds, count)
+                results[(legacy, count)] = rps
+                print(f"  {label:<38} {count} {'wątki' if count > 1 else 'wątek'}   {rps:8.1f} żądań/s")
+        finally:
+            db._pools[database] = pool
+    for count in threads:
+        print(f"  zmiana przy {count} wątk{'ach' if count > 1 else 'u'}: "
+              f"x{results[(False, count)] / results[(True, count)]:.2f}")
+
+
+def run(match_count=50000, repeat=200):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'loadtest.db')
+        print(f"Tworzenie bazy testowej ({match_count} meczów)...")
+        total_matches = build_database(database, match_count)
+
+        import app as application
+        flask_app = application.create_app({'DATABASE': database})
+        client = flask_app.test_client()
+        response = client.post('/login', data={'username': 'user1', 'password': 'loadtest'})
+        if response.status_code != 302:
+            print("⚠️  Logowanie nie powiodło się")
+            sys.exit(1)
+
+        def get(url):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url}: HTTP {response.status_code}')
+
+        # Kursor głęboko w historii (ok. 80% listy)
+        conn = db.connect(database)
+        deep = conn.execute('''
+            SELECT finished, id, match_date FROM matches
+            ORDER BY finished, match_date, id LIMIT 1 OFFSET ?
+        ''', (int(total_matches * 0.8),)).fetchone()
+        deep_cursor = f"{deep['finished']},{deep['id']},{deep['match_date']}"
+        window_from = deep['match_date'][:10]
+        window_to = (datetime.fromisoformat(window_from) + timedelta(days=7)).strftime('%Y-%m-%d')
+
+        print(f"\n/matches ({total_matches} meczów, {repeat} żądań na scenariusz):")
+        measure('pierwsza strona', lambda: get('/matches'), repeat)
+        measure('strona w głębi historii (after)', lambda: get(f'/matches?after={deep_cursor}'), repeat)
+        measure('poprzednia strona (before)', lambda: get(f'/matches?before={deep_cursor}'), repeat)
+        measure('filtr rozgrywek (PL)', lambda: get('/matches?competition=PL'), repeat)
+        measure('filtr rozgrywek + after', lambda: get(f'/matches?competition=PL&after={deep_cursor}'),
+                repeat)
+        measure('okno dat (7 dni)', lambda: get(f'/matches?date_from={window_from}&date_to={window_to}'),
+                repeat)
+
+        # Dawna wersja: wszystkie mecze z typami użytkownika + zbędne drugie zapytanie
+        def legacy():
+            conn.execute('''
+                SELECT m.*, p.id as prediction_id, p.predicted_home, p.predicted_away
+                FROM matches m
+                LEFT JOIN predictions p ON m.id = p.match_id AND p.user_id = ?
+                ORDER BY
+                    CASE WHEN m.home_score IS NULL AND m.away_score IS NULL THEN 0 ELSE 1 END,
+                    m.match_date ASC
+            ''', (2,)).fetchall()
+            conn.execute('SELECT match_id, predicted_home, predicted_away FROM predictions '
+                         'WHERE user_id = ?', (2,)).fetchall()
+        measure('dawne zapytanie (bez renderowania)', legacy, max(repeat // 10, 10))
+        conn.close()
+
+        compare_api(client, repeat)
+        compare_connections(flask_app, database)
+
+        import fixture_cache
+        stats = fixture_cache.cache.summary()
+        print(f"\nCache listy meczów: trafienia {stats['hits']}, chybienia {stats['misses']} "
+              f"({stats['hit_rate']}%)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
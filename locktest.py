@@ -0,0 +1,156 @@
+"""
+Test współbieżności blokady typów od rozpoczęcia meczu
+Wiele wątków wysyła /predict i /predict_batch przez cały moment rozpoczęcia meczu.
+Każde żądanie ma unikalny typ (numer żądania : numer wątku), więc po teście można
+sprawdzić, że żaden typ wysłany po rozpoczęciu nie został przyjęty ani zapisany
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from werkzeug.security import generate_password_hash
+
+import db
+import migrations
+
+# Co który zapis idzie przez formularz całej strony zamiast /predict
+BATCH_EVERY = 4
+
+
+def build_database(path, user_count):
+    """Tworzy bazę z użytkownikami i jednym meczem (termin ustawia set_kickoff)"""
+    conn = db.connect(path)
+    migrations.migrate(conn)
+    now = datetime.now()
+
+    match_id = conn.execute('''
+        INSERT INTO matches (home_team, away_team, match_date, home_score, away_score, created_at)
+        VALUES ('Gospodarze', 'Goście', '2999-01-01T00:00:00', NULL, NULL, ?)
+    ''', (now.isoformat(),)).lastrowid
+
+    password_hash = generate_password_hash('locktest')
+    conn.executemany('INSERT INTO users (username, password_hash, role, created_at) VALUES (?, ?, ?, ?)',
+                     [(f'user{i}', password_hash, 'USER', now.isoformat()) for i in range(user_count)])
+    conn.commit()
+    conn.close()
+    return match_id
+
+
+def set_kickoff(path, match_id, lead_seconds):
+    """
+    Ustawia rozpoczęcie meczu za lead_seconds (pełna sekunda, UTC)
+
+    Returns:
+        Czas rozpoczęcia jako timestamp
+    """
+    kickoff = (datetime.now(timezone.utc) + timedelta(seconds=lead_seconds)).replace(microsecond=0)
+    conn = db.connect(path)
+    conn.execute('UPDATE matches SET match_date = ? WHERE id = ?',
+                 (kickoff.replace(tzinfo=None).strftime('%Y-%m-%dT%H:%M:%S'), match_id))
+    conn.commit()
+    conn.close()
+    return kickoff.timestamp()
+
+
+def hammer(client, thread_no, match_id, stop_at, log):
+    """Wysyła typy aż do stop_at; zapisuje (numer, czas wysłania, przyjęty) każdego żądania"""
+    number = 0
+    while time.time() < stop_at:
+        number += 1
+        sent = time.time()
+        if number % BATCH_EVERY:
+            client.post('/predict', data={'match_id': match_id, 'predicted_home': number,
+                                          'predicted_away': thread_no})
+        else:
+            client.post('/predict_batch', data={f'home_{match_id}': number,
+                                                f'away_{match_id}': thread_no})
+        with client.session_transaction() as sess:
+            flashes = sess.pop('_flashes', [])
+        log.append((number, sent, any(category == 'success' for category, _ in flashes)))
+
+
+def run(threads=16, lead_seconds=2.0, tail_seconds=1.0):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'locktest.db')
+        match_id = build_database(database, threads)
+
+        import app as application
+        flask_app = application.create_app({'DATABASE': database})
+
+        clients = []
+        for i in range(threads):
+            client = flask_app.test_client()
+            response = client.post('/login', data={'username': f'user{i}', 'password': 'locktest'})
+            if response.status_code != 302:
+                print("⚠️  Logowanie nie powiodło się")
+                sys.exit(1)
+            with client.session_transaction() as sess:
+                sess.pop('_flashes', None)
+            clients.append(client)
+
+        kickoff = set_kickoff(database, match_id, lead_seconds)
+        print(f"{threads} wątków, rozpoczęcie meczu za {kickoff - time.time():.1f} s, "
+              f"zapisy do {tail_seconds:.1f} s po rozpoczęciu...")
+        logs = [[] for _ in range(threads)]
+        workers = [threading.Thread(target=hammer,
+                                    args=(clients[i], i, match_id, kickoff + tail_seconds, logs[i]))
+                   for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # Usunięcie typu po rozpoczęciu też musi zostać odrzucone
+        conn = db.connect(database)
+        rows = {row['user_id']: row for row in conn.execute(
+            'SELECT id, user_id, predicted_home, predicted_away FROM predictions WHERE match_id = ?',
+            (match_id,))}
+        for i, client in enumerate(clients):
+            if i + 1 in rows:
+                client.post(f"/delete_prediction/{rows[i + 1]['id']}")
+        remaining = conn.execute('SELECT COUNT(*) FROM predictions WHERE match_id = ?',
+                                 (match_id,)).fetchone()[0]
+        conn.close()
+
+        entries = [entry for log in logs for entry in log]
+        before = [entry for entry in entries if entry[1] < kickoff]
+        after = [entry for entry in entries if entry[1] >= kickoff]
+        late_accepted = [entry for entry in after if entry[2]]
+
+        # Zapisany typ każdego użytkownika = ostatni przyjęty, wysłany przed rozpoczęciem
+        wrong_rows = 0
+        for i, log in enumerate(logs):
+            accepted = [number for number, sent, ok in log if ok]
+            row = rows.get(i + 1)
+            expected = (accepted[-1], i) if accepted else None
+            actual = (row['predicted_home'], row['predicted_away']) if row else None
+            if actual != expected:
+                wrong_rows += 1
+
+        print(f"\nŻądania przed rozpoczęciem: {len(before)} "
+              f"(przyjęte: {sum(1 for entry in before if entry[2])})")
+        print(f"Żądania po rozpoczęciu:     {len(after)} (przyjęte: {len(late_accepted)})")
+
+        failures = []
+        if not before or not after:
+            failures.append("test nie objął momentu rozpoczęcia meczu")
+        if late_accepted:
+            failures.append(f"przyjęto {len(late_accepted)} typów wysłanych po rozpoczęciu")
+        if wrong_rows:
+            failures.append(f"{wrong_rows} zapisanych typów nie odpowiada ostatniemu przyjętemu")
+        if remaining != len(rows):
+            failures.append(f"usunięto {len(rows) - remaining} typów po rozpoczęciu")
+
+        if failures:
+            for failure in failures:
+                print(f"⚠️  {failure}")
+            sys.exit(1)
+        print("✓ Żaden typ wysłany po rozpoczęciu meczu nie został przyjęty ani usunięty")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
@@ -0,0 +1,141 @@
+"""
+Lista meczów (/matches) stronicowana kluczem (keyset)
+Kolejność: najpierw mecze bez wyniku, potem zakończone; w obu grupach wg daty i id
+Strony meczów są wspólne dla wszystkich (fixture_cache), typy użytkownika
+są dołączane przy każdym żądaniu
+"""
+
+from fixture_cache import cache
+from predictions import is_locked, utc_now
+
+PER_PAGE = 50
+
+
+def encode_cursor(match):
+    """Kursor strony - pozycja meczu w kolejności (finished, match_date, id)"""
+    return f"{match['finished']},{match['id']},{match['match_date']}"
+
+
+def decode_cursor(token):
+    """
+    Odczytuje kursor z parametru URL
+
+    Returns:
+        Krotka (finished, match_date, id) lub None dla błędnego kursora
+    """
+    try:
+        finished, match_id, match_date = token.split(',', 2)
+        return int(finished), match_date, int(match_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_fixture_page(conn, per_page=PER_PAGE, competition=None, date_from=None,
+                     date_to=None, after=None, before=None):
+    """
+    Strona meczów bez typów użytkownika (wynik trafia do cache)
+
+    Args:
+        competition: Kod rozgrywek (None - wszystkie)
+        date_from, date_to: Zakres dat YYYY-MM-DD, włącznie (None - bez ograniczenia)
+        after: Kursor - mecze po wskazanym (następna strona)
+        before: Kursor - mecze przed wskazanym (poprzednia strona)
+
+    Returns:
+        Słownik: matches (lista słowników), next_cursor, prev_cursor (None gdy brak strony)
+    """
+    conditions = []
+    params = []
+    if competition:
+        conditions.append('competition = ?')
+        params.append(competition)
+    if date_from:
+        conditions.append('match_date >= ?')
+        params.append(date_from)
+    if date_to:
+        conditions.append("match_date < date(?, '+1 day')")
+        params.append(date_to)
+
+    order = 'ASC'
+    if before:
+        conditions.append('(finished, match_date, id) < (?, ?, ?)')
+        params.extend(before)
+        order = 'DESC'
+    elif after:
+        conditions.append('(finished, match_date, id) > (?, ?, ?)')
+        params.extend(after)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    rows = conn.execute(f'''
+        SELECT * FROM matches
+        {where}
+        ORDER BY finished {order}, match_date {order}, id {order}
+        LIMIT ?
+    ''', params + [per_page + 1]).fetchall()
+
+    has_more = len(rows) > per_page
+    rows = [dict(row) for row in rows[:per_page]]
+    if before:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        # Po cofnięciu się (before) zawsze istnieje strona, z której przyszliśmy
+        if has_more or before:
+            next_cursor = encode_cursor(rows[-1])
+        if (has_more if before else after):
+            prev_cursor = encode_cursor(rows[0])
+
+    return {'matches': rows, 'next_cursor': next_cursor, 'prev_cursor': prev_cursor}
+
+
+def get_page(conn, user_id, per_page=PER_PAGE, competition=None, date_from=None,
+             date_to=None, after=None, before=None):
+    """
+    Strona meczów z typami użytkownika (argumenty jak get_fixture_page)
+
+    Returns:
+        Słownik: matches (z prediction_id, predicted_home, predicted_away
+        i locked - mecz już nie przyjmuje typów), next_cursor, prev_cursor
+    """
+    page = cache.get_or_load(
+        conn, ('page', per_page, competition, date_from, date_to, after, before),
+        lambda: get_fixture_page(conn, per_page, competition, date_from, date_to, after, before))
+
+    match_ids = [match['id'] for match in page['matches']]
+    predictions = {}
+    if match_ids:
+        placeholders = ','.join('?' * len(match_ids))
+        predictions = {row['match_id']: row for row in conn.execute(f'''
+            SELECT id, match_id, predicted_home, predicted_away
+            FROM predictions
+            WHERE user_id = ? AND match_id IN ({placeholders})
+        ''', [user_id] + match_ids)}
+
+    # Nowe słowniki - strona z cache pozostaje bez typów
+    now = utc_now()
+    matches = []
+    for match in page['matches']:
+        prediction = predictions.get(match['id'])
+        matches.append(dict(match,
+                            prediction_id=prediction['id'] if prediction else None,
+                            predicted_home=prediction['predicted_home'] if prediction else None,
+                            predicted_away=prediction['predicted_away'] if prediction else None,
+                            locked=is_locked(match, now)))
+
+    return dict(page, matches=matches)
+
+
+def all_matches(conn):
+    """Wszystkie mecze wg daty (panel admina)"""
+    return cache.get_or_load(conn, ('all',), lambda: [
+        dict(row) for row in conn.execute('SELECT * FROM matches ORDER BY match_date ASC')])
+
+
+def competitions(conn):
+    """Kody rozgrywek obecne w bazie (filtr listy meczów)"""
+    return cache.get_or_load(conn, ('competitions',), lambda: [row[0] for row in conn.execute('''
+        SELECT DISTINCT competition FROM matches
+        WHERE competition IS NOT NULL
+        ORDER BY competition
+    ''')])
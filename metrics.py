@@ -0,0 +1,537 @@
+"""
+Metryki aplikacji w formacie tekstowym Prometheusa (/metrics)
+- czas żądań per widok (histogram) i czas zapytań SQL w żądaniu
+- zapytania SQL (znormalizowane): liczba wywołań, czas, liczba wierszy
+- profil cProfile pojedynczego żądania: nagłówek X-Profile, tylko dla admina
+
+Połączenia z db.connect() są tworzone jako InstrumentedConnection, więc pomiar
+obejmuje get_db() i skrypty CLI. Liczniki są per proces - przy wielu workerach
+gunicorna ustaw METRICS_DIR: każdy worker zapisuje tam migawkę, a /metrics
+sumuje migawki wszystkich workerów
+"""
+
+import bisect
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sqlite3
+import sys
+import threading
+import time
+from functools import lru_cache
+from time import perf_counter
+
+from flask import Response, request
+
+ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+# Katalog migawek workerów (wspólny dla procesów jednego serwera)
+METRICS_DIR = os.getenv('METRICS_DIR')
+FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Token dla Prometheusa (Authorization: Bearer ...); bez tokenu /metrics tylko dla
+# sesji admina. Adres klienta nie daje dostępu - za lokalnym proxy każde żądanie
+# przychodzi z localhost
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+# Zapytania wolniejsze niż próg są logowane (0 - wyłączone)
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '500'))
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ENVIRON = 'HTTP_X_PROFILE'
+PROFILE_LIMIT = 40
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = 'football'
+
+logger = logging.getLogger(__name__)
+_local = threading.local()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_ROWS = re.compile(r'(\((?:\s*\?\s*,)*\s*\?\s*\))(?:\s*,\s*\((?:\s*\?\s*,)*\s*\?\s*\))+')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """
+    Postać zapytania do etykiety metryki: literały zastąpione przez ?,
+    listy IN (?, ?, ...) i kolejne wiersze VALUES zwinięte, białe znaki pojedyncze
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _SPACE.sub(' ', sql).strip()
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _ROWS.sub(r'\1, ...', sql)
+
+
+class Registry:
+    """Liczniki jednego procesu"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (endpoint, metoda) -> [liczniki kubełków..., +Inf, suma s, czas SQL s, zapytania SQL]
+            self.requests = {}
+            # (endpoint, metoda, status) -> liczba żądań
+            self.statuses = {}
+            # znormalizowane SQL -> [wywołania, czas s, wiersze]
+            self.queries = {}
+
+    def observe_request(self, endpoint, method, status, seconds, db_seconds, db_queries):
+        key = (endpoint, method)
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            entry = self.requests.get(key)
+            if entry is None:
+                entry = self.requests[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0.0, 0]
+            entry[index] += 1
+            entry[-3] += seconds
+            entry[-2] += db_seconds
+            entry[-1] += db_queries
+            status_key = (endpoint, method, status)
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+    def observe_query(self, sql, seconds, rows, calls=1):
+        with self._lock:
+            entry = self.queries.get(sql)
+            if entry is None:
+                entry = self.queries[sql] = [0, 0.0, 0]
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] += rows
+
+    def snapshot(self):
+        """Kopia liczników (JSON)"""
+        with self._lock:
+            return {
+                'requests': [[*key, list(entry)] for key, entry in self.requests.items()],
+                'statuses': [[*key, count] for key, count in self.statuses.items()],
+                'queries': [[sql, *entry] for sql, entry in self.queries.items()],
+            }
+
+
+registry = Registry()
+
+
+def _record(sql, seconds, rows, calls=1):
+    """Zapis pomiaru zapytania (globalnie i w bieżącym żądaniu)"""
+    if sql is None:
+        return
+    current = getattr(_local, 'request', None)
+    if current is not None:
+        current[1] += calls
+        current[2] += seconds
+    registry.observe_query(normalize_sql(sql), seconds, rows, calls)
+    if calls and SLOW_QUERY_MS and seconds * 1000 > SLOW_QUERY_MS:
+        logger.warning('Wolne zapytanie (%.0f ms): %s', seconds * 1000, normalize_sql(sql))
+
+
+# Metody klas bazowych wywoływane bezpośrednio - taniej niż super() w każdym zapytaniu
+_cursor_execute = sqlite3.Cursor.execute
+_cursor_executemany = sqlite3.Cursor.executemany
+_cursor_fetchone = sqlite3.Cursor.fetchone
+_cursor_fetchmany = sqlite3.Cursor.fetchmany
+_cursor_fetchall = sqlite3.Cursor.fetchall
+_cursor_next = sqlite3.Cursor.__next__
+_connection_cursor = sqlite3.Connection.cursor
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Kursor mierzący zapytania. Czas i wiersze pobierania (fetch*) są doliczane
+    do zapytania, które je zwróciło - dla SELECT to zwykle większość pracy
+    """
+
+    _sql = None
+    _rows = 0
+    _seconds = 0.0
+
+    def _flush(self):
+        if self._rows or self._seconds:
+            _record(self._sql, self._seconds, self._rows, calls=0)
+            self._rows = 0
+            self._seconds = 0.0
+
+    def execute(self, sql, parameters=()):
+        if self._seconds:
+            self._flush()
+        self._sql = sql
+        start = perf_counter()
+        try:
+            return _cursor_execute(self, sql, parameters)
+        finally:
+            _record(sql, perf_counter() - start, max(self.rowcount, 0))
+
+    def executemany(self, sql, seq_of_parameters):
+        if self._seconds:
+            self._flush()
+        self._sql = sql
+        start = perf_counter()
+        try:
+            return _cursor_executemany(self, sql, seq_of_parameters)
+        finally:
+            _record(sql, perf_counter() - start, max(self.rowcount, 0))
+
+    def fetchone(self):
+        start = perf_counter()
+        row = _cursor_fetchone(self)
+        _record(self._sql, perf_counter() - start, 0 if row is None else 1, calls=0)
+        return row
+
+    def fetchmany(self, size=None):
+        start = perf_counter()
+        rows = _cursor_fetchmany(self, self.arraysize if size is None else size)
+        _record(self._sql, perf_counter() - start, len(rows), calls=0)
+        return rows
+
+    def fetchall(self):
+        start = perf_counter()
+        rows = _cursor_fetchall(self)
+        _record(self._sql, perf_counter() - start, len(rows), calls=0)
+        return rows
+
+    def __next__(self):
+        # Iteracja - sumowana na kursorze, zapisywana po ostatnim wierszu
+        start = perf_counter()
+        try:
+            row = _cursor_next(self)
+        except StopIteration:
+            self._seconds += perf_counter() - start
+            self._flush()
+            raise
+        self._rows += 1
+        self._seconds += perf_counter() - start
+        return row
+
+    def close(self):
+        self._flush()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Połączenie, którego kursory (także z conn.execute) mierzą zapytania"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return _connection_cursor(self, factory)
+
+    def execute(self, sql, parameters=()):
+        return _connection_cursor(self, InstrumentedCursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return _connection_cursor(self, InstrumentedCursor).executemany(sql, seq_of_parameters)
+
+    def executescript(self, script):
+        start = perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            # Skrypty (migracje) pod jedną etykietą zamiast pełnej treści
+            _record('<executescript>', perf_counter() - start, 0)
+
+
+def connection_factory():
+    """Klasa połączenia dla sqlite3.connect (db.connect)"""
+    return InstrumentedConnection if ENABLED else sqlite3.Connection
+
+
+# Migawki workerów (METRICS_DIR)
+
+_flusher_pid = None
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f'{pid}.json')
+
+
+def write_snapshot():
+    """Zapisuje migawkę liczników procesu do METRICS_DIR (atomowo)"""
+    if not METRICS_DIR:
+        return
+    path = _snapshot_path(os.getpid())
+    with open(path + '.tmp', 'w') as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(path + '.tmp', path)
+
+
+def clear_snapshots():
+    """Usuwa migawki poprzedniego uruchomienia (proces główny gunicorna przy starcie)"""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for name in os.listdir(METRICS_DIR):
+        if name.endswith('.json') or name.endswith('.json.tmp'):
+            os.remove(os.path.join(METRICS_DIR, name))
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            write_snapshot()
+        except OSError as e:
+            logger.warning('Nie udało się zapisać migawki metryk: %s', e)
+
+
+def _start_flusher():
+    """Wątek zapisujący migawki - jeden na proces (także po fork)"""
+    global _flusher_pid
+    _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def collect():
+    """Liczniki tego procesu i migawki pozostałych workerów (także zakończonych)"""
+    snapshots = [registry.snapshot()]
+    if METRICS_DIR and os.path.isdir(METRICS_DIR):
+        own = f'{os.getpid()}.json'
+        for name in os.listdir(METRICS_DIR):
+            if name.endswith('.json') and name != own:
+                try:
+                    with open(os.path.join(METRICS_DIR, name)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+    requests, statuses, queries = {}, {}, {}
+    for snapshot in snapshots:
+        for endpoint, method, entry in snapshot['requests']:
+            total = requests.setdefault((endpoint, method), [0] * len(entry))
+            for i, value in enumerate(entry):
+                total[i] += value
+        for endpoint, method, status, count in snapshot['statuses']:
+            key = (endpoint, method, status)
+            statuses[key] = statuses.get(key, 0) + count
+        for sql, calls, seconds, rows in snapshot['queries']:
+            total = queries.setdefault(sql, [0, 0.0, 0])
+            total[0] += calls
+            total[1] += seconds
+            total[2] += rows
+    return requests, statuses, queries
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render():
+    """Metryki w formacie tekstowym Prometheusa (0.0.4)"""
+    requests, statuses, queries = collect()
+    lines = []
+
+    def header(name, kind, description):
+        lines.append(f'# HELP {PREFIX}_{name} {description}')
+        lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+    header('http_request_duration_seconds', 'histogram', 'Czas obsługi żądania per widok')
+    for (endpoint, method), entry in sorted(requests.items()):
+        labels = f'endpoint="{_label(endpoint)}",method="{method}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), entry):
+            cumulative += count
+            lines.append(f'{PREFIX}_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{PREFIX}_http_request_duration_seconds_sum{{{labels}}} {entry[-3]:.6f}')
+        lines.append(f'{PREFIX}_http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+    header('http_request_db_seconds_total', 'counter', 'Czas zapytań SQL w żądaniach per widok')
+    for (endpoint, method), entry in sorted(requests.items()):
+        lines.append(f'{PREFIX}_http_request_db_seconds_total'
+                     f'{{endpoint="{_label(endpoint)}",method="{method}"}} {entry[-2]:.6f}')
+    header('http_request_db_queries_total', 'counter', 'Liczba zapytań SQL w żądaniach per widok')
+    for (endpoint, method), entry in sorted(requests.items()):
+        lines.append(f'{PREFIX}_http_request_db_queries_total'
+                     f'{{endpoint="{_label(endpoint)}",method="{method}"}} {entry[-1]}')
+
+    header('http_requests_total', 'counter', 'Liczba żądań per widok i status')
+    for (endpoint, method, status), count in sorted(statuses.items()):
+        lines.append(f'{PREFIX}_http_requests_total'
+                     f'{{endpoint="{_label(endpoint)}",method="{method}",status="{status}"}} {count}')
+
+    for name, index, description in (('sql_queries_total', 0, 'Liczba wykonań zapytania'),
+                                     ('sql_query_seconds_total', 1, 'Czas wykonania i pobierania wyników'),
+                                     ('sql_rows_total', 2, 'Wiersze zwrócone lub zmienione')):
+        header(name, 'counter', description)
+        for sql, entry in sorted(queries.items()):
+            value = f'{entry[index]:.6f}' if index == 1 else entry[index]
+            lines.append(f'{PREFIX}_{name}{{query="{_label(sql)}"}} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# Integracja z Flask
+
+def _is_admin():
+    # Import przy użyciu - auth importuje db, który importuje ten moduł
+    from auth import is_admin
+    return is_admin()
+
+
+def _before_request():
+    if not ENABLED:
+        return
+    if METRICS_DIR and _flusher_pid != os.getpid():
+        _start_flusher()
+    # [start, zapytania SQL, czas SQL, profiler]
+    _local.request = current = [perf_counter(), 0, 0.0, None]
+    if PROFILE_ENVIRON in request.environ and _is_admin():
+        current[3] = cProfile.Profile()
+        current[3].enable()
+
+
+def _after_request(response):
+    current = getattr(_local, 'request', None)
+    if current is None:
+        return response
+    _local.request = None
+    start, db_queries, db_seconds, profiler = current
+    elapsed = perf_counter() - start
+    registry.observe_request(request.endpoint or '<unmatched>', request.method,
+                             response.status_code, elapsed, db_seconds, db_queries)
+    response.headers['Server-Timing'] = (f'db;dur={db_seconds * 1000:.1f};desc="{db_queries} SQL", '
+                                         f'total;dur={elapsed * 1000:.1f}')
+    if profiler is not None:
+        profiler.disable()
+        return _profile_response(profiler, response, elapsed, db_queries, db_seconds)
+    return response
+
+
+def _teardown_request(exception=None):
+    current = getattr(_local, 'request', None)
+    if current is not None and current[3] is not None:
+        current[3].disable()
+    _local.request = None
+
+
+def _profile_response(profiler, response, elapsed, db_queries, db_seconds):
+    """Raport cProfile zamiast treści odpowiedzi (X-Profile: cumulative|tottime|calls)"""
+    sort = request.headers.get(PROFILE_HEADER)
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        sort = 'cumulative'
+    out = io.StringIO()
+    out.write(f'{request.method} {request.full_path} -> {response.status_code}, '
+              f'{elapsed * 1000:.1f} ms, SQL: {db_queries} zapytań, {db_seconds * 1000:.1f} ms\n\n')
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(PROFILE_LIMIT)
+    report = Response(out.getvalue(), mimetype='text/plain')
+    report.headers['X-Profile-Status'] = str(response.status_code)
+    report.headers['Server-Timing'] = response.headers['Server-Timing']
+    return report
+
+
+def metrics_view():
+    """/metrics - format tekstowy Prometheusa"""
+    authorization = request.headers.get('Authorization', '')
+    token_valid = bool(METRICS_TOKEN) and hmac.compare_digest(authorization, f'Bearer {METRICS_TOKEN}')
+    if not token_valid and not _is_admin():
+        if METRICS_TOKEN:
+            return Response('Brak dostępu.\n', status=401, mimetype='text/plain',
+                            headers={'WWW-Authenticate': 'Bearer'})
+        return Response('Brak dostępu.\n', status=403, mimetype='text/plain')
+    return Response(render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_app(app):
+    """Rejestruje pomiar żądań i endpoint /metrics"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+
+def _best(function, repeat, rounds):
+    """Najlepszy czas jednego wywołania z kilku serii"""
+    best = None
+    for _ in range(rounds):
+        start = perf_counter()
+        for _ in range(repeat):
+            function()
+        elapsed = (perf_counter() - start) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def benchmark(rounds=7, repeat=200):
+    """
+    Narzut pomiaru. Różnica czasu całych żądań (kilka procent) ginie w szumie,
+    więc mierzone są osobno: koszt jednego zapytania na zwykłym i mierzonym
+    połączeniu oraz koszt hooków żądania, a wynik jest odnoszony do czasu żądania
+    """
+    global ENABLED
+    import tempfile
+
+    import db
+    import loadtest
+    from app import create_app
+
+    urls = ['/matches', '/matches?competition=PL', '/api/v1/matches', '/leaderboard', '/stats',
+            '/my_predictions']
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        print("Tworzenie bazy testowej (5000 meczów)...")
+        loadtest.build_database(database, match_count=5000, user_count=50, predictions_per_user=200)
+        app = create_app({'DATABASE': database, 'SECRET_KEY': 'benchmark'})
+        client = app.test_client()
+        client.post('/login', data={'username': 'user0', 'password': 'loadtest'})
+
+        # Czas żądań bez metryk i liczba zapytań na żądanie (z metrykami)
+        ENABLED = False
+        db.get_pool(database).close_all()
+        request_times = {url: _best(lambda: client.get(url), repeat // 4, rounds) for url in urls}
+        ENABLED = True
+        db.get_pool(database).close_all()
+        registry.reset()
+        for url in urls:
+            client.get(url)
+        queries_per_request = {
+            endpoint: entry[-1] / sum(entry[:len(BUCKETS) + 1])
+            for (endpoint, method), entry in registry.requests.items()}
+        endpoints = {url: app.url_map.bind('localhost').match(url.split('?')[0])[0] for url in urls}
+
+        # Jedno zapytanie z pobraniem wiersza: zwykłe i mierzone połączenie
+        plain = sqlite3.connect(database, factory=sqlite3.Connection)
+        instrumented = sqlite3.connect(database, factory=InstrumentedConnection)
+        sql = 'SELECT id, home_team, away_team FROM matches WHERE id = ?'
+        query_times = {}
+        for _ in range(2):
+            for name, conn in (('plain', plain), ('instrumented', instrumented)):
+                elapsed = _best(lambda: conn.execute(sql, (42,)).fetchone(), repeat * 10, rounds)
+                query_times[name] = min(query_times.get(name, elapsed), elapsed)
+        plain.close()
+        instrumented.close()
+        query_overhead = query_times['instrumented'] - query_times['plain']
+
+        # Hooki żądania (before_request + after_request) bez widoku
+        def hooks():
+            _before_request()
+            _after_request(Response())
+        with app.test_request_context('/stats'):
+            hook_overhead = (_best(hooks, repeat * 10, rounds)
+                             - _best(Response, repeat * 10, rounds))
+        registry.reset()
+
+    print(f"\nZapytanie (execute + fetchone): {query_times['plain'] * 1e6:.1f} µs, "
+          f"mierzone {query_times['instrumented'] * 1e6:.1f} µs (+{query_overhead * 1e6:.1f} µs)")
+    print(f"Hooki żądania: {hook_overhead * 1e6:.1f} µs")
+    print(f"\n  {'żądanie':<26} {'ms':>8} {'SQL':>5} {'narzut µs':>10} {'narzut %':>9}")
+    for url in urls:
+        queries = queries_per_request.get(endpoints[url], 0)
+        overhead = hook_overhead + queries * query_overhead
+        print(f"  {url:<26} {request_times[url] * 1000:8.2f} {queries:5.0f} "
+              f"{overhead * 1e6:10.1f} {overhead / request_times[url] * 100:8.1f}%")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "benchmark"
+    if command == "benchmark":
+        # Ten sam obiekt modułu, którego używają db.py i app.py (a nie __main__)
+        import metrics
+        metrics.benchmark()
+    else:
+        print("Użycie: python metrics.py [benchmark]")
+        sys.exit(1)
@@ -0,0 +1,540 @@
+"""
+Wersjonowane migracje schematu bazy danych
+Każda migracja ma numer wersji i jest wykonywana dokładnie raz (tabela schema_version)
+
+    python migrations.py          # wykonanie brakujących migracji
+    python migrations.py check    # plany zapytań najczęściej odwiedzanych stron
+"""
+
+import html
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+import db
+
+DATABASE = 'football_predictions.db'
+
+
+def _columns(cursor, table):
+    """Zwraca listę kolumn tabeli (razem z kolumnami generowanymi)"""
+    cursor.execute(f'PRAGMA table_xinfo({table})')
+    return [column[1] for column in cursor.fetchall()]
+
+
+def _has_unique_index(cursor, table, column):
+    """Sprawdza czy kolumna ma pełny (nie częściowy) indeks UNIQUE"""
+    cursor.execute(f'PRAGMA index_list({table})')
+    for index in cursor.fetchall():
+        # index_list: seq, name, unique, origin, partial
+        if not index[2] or index[4]:
+            continue
+        cursor.execute(f'PRAGMA index_info({index[1]})')
+        if [info[2] for info in cursor.fetchall()] == [column]:
+            return True
+    return False
+
+
+def migration_001_base_tables(cursor):
+    """Tabele users, matches, predictions"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'USER',
+            created_at TEXT NOT NULL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            home_team TEXT NOT NULL,
+            away_team TEXT NOT NULL,
+            match_date TEXT NOT NULL,
+            home_score INTEGER NULL,
+            away_score INTEGER NULL,
+            created_at TEXT NOT NULL,
+            api_match_id INTEGER NULL UNIQUE
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            match_id INTEGER NOT NULL,
+            predicted_home INTEGER NOT NULL,
+            predicted_away INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (match_id) REFERENCES matches(id),
+            UNIQUE(user_id, match_id)
+        )
+    ''')
+
+
+def migration_002_api_match_id(cursor):
+    """Kolumna api_match_id w starszych bazach (dawniej add_api_match_id_column.py)"""
+    if 'api_match_id' not in _columns(cursor, 'matches'):
+        # SQLite nie pozwala dodać kolumny UNIQUE przez ALTER TABLE
+        cursor.execute('ALTER TABLE matches ADD COLUMN api_match_id INTEGER NULL')
+
+    # Pełny indeks UNIQUE jest potrzebny dla ON CONFLICT(api_match_id);
+    # wartości NULL nie kolidują ze sobą
+    if not _has_unique_index(cursor, 'matches', 'api_match_id'):
+        cursor.execute('''
+            SELECT api_match_id, COUNT(*) FROM matches
+            WHERE api_match_id IS NOT NULL
+            GROUP BY api_match_id HAVING COUNT(*) > 1
+        ''')
+        duplicates = cursor.fetchall()
+        if duplicates:
+            raise sqlite3.IntegrityError(
+                'Duplikaty api_match_id: '
+                + ', '.join(f'{dup[0]} ({dup[1]}x)' for dup in duplicates))
+        cursor.execute('CREATE UNIQUE INDEX idx_matches_api_match_id ON matches(api_match_id)')
+        cursor.execute('DROP INDEX IF EXISTS idx_api_match_id_unique')
+
+
+def migration_003_indexes(cursor):
+    """Indeksy dla /matches, /my_predictions i /stats"""
+    # Indeks pokrywający - typy użytkownika bez sięgania do tabeli
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_predictions_user_match
+        ON predictions(user_id, match_id, predicted_home, predicted_away)
+    ''')
+    # Typy dla danego meczu (ustawianie wyniku)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_predictions_match ON predictions(match_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_matches_match_date ON matches(match_date)')
+    # Indeks częściowy - tylko mecze bez wyniku (mała część historii)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_matches_unfinished
+        ON matches(match_date) WHERE home_score IS NULL
+    ''')
+    cursor.execute('ANALYZE')
+
+
+def migration_004_user_scores(cursor):
+    """Status i punkty typów, zagregowana tabela user_scores"""
+    columns = _columns(cursor, 'predictions')
+    if 'status' not in columns:
+        cursor.execute("ALTER TABLE predictions ADD COLUMN status TEXT NOT NULL DEFAULT 'oczekiwanie'")
+    if 'points' not in columns:
+        cursor.execute('ALTER TABLE predictions ADD COLUMN points INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_scores (
+            user_id INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            points INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Wypełnienie dla istniejących danych (trafienie = dokładny wynik)
+    cursor.execute('''
+        UPDATE predictions AS p
+        SET status = CASE
+                WHEN p.predicted_home = m.home_score AND p.predicted_away = m.away_score
+                THEN 'trafiony' ELSE 'nietrafiony'
+            END,
+            points = (p.predicted_home = m.home_score AND p.predicted_away = m.away_score)
+        FROM matches AS m
+        WHERE m.id = p.match_id
+          AND m.home_score IS NOT NULL
+          AND m.away_score IS NOT NULL
+    ''')
+    # Pełne przeliczenie - także gdy tabela została z wcześniejszej, przerwanej próby
+    cursor.execute('DELETE FROM user_scores')
+    cursor.execute('''
+        INSERT INTO user_scores (user_id, total, correct, points, updated_at)
+        SELECT user_id,
+               SUM(status != 'oczekiwanie'),
+               SUM(status = 'trafiony'),
+               SUM(points),
+               ?
+        FROM predictions
+        GROUP BY user_id
+        HAVING SUM(status != 'oczekiwanie') > 0
+    ''', (datetime.now().isoformat(),))
+
+
+def migration_005_leaderboard(cursor):
+    """Ranking - indeks na user_scores i kubełki punktowe"""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_scores_rank
+        ON user_scores(points DESC, correct DESC, user_id)
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leaderboard_buckets (
+            points INTEGER PRIMARY KEY,
+            users INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO leaderboard_buckets (points, users)
+        SELECT points, COUNT(*) FROM user_scores GROUP BY points
+    ''')
+
+
+def migration_006_competition(cursor):
+    """Kod rozgrywek meczu (zasady punktacji per liga)"""
+    if 'competition' not in _columns(cursor, 'matches'):
+        cursor.execute('ALTER TABLE matches ADD COLUMN competition TEXT NULL')
+
+
+def migration_007_match_listing(cursor):
+    """Kolumna finished i indeksy stronicowania /matches (keyset)"""
+    # Kolumna generowana (wirtualna) - porównanie (finished, match_date, id) > (?, ?, ?)
+    # korzysta z indeksu, czego nie robi porównanie z wyrażeniem
+    if 'finished' not in _columns(cursor, 'matches'):
+        cursor.execute('''
+            ALTER TABLE matches
+            ADD COLUMN finished INTEGER GENERATED ALWAYS AS (home_score IS NOT NULL) VIRTUAL
+        ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_matches_listing
+        ON matches(finished, match_date, id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_matches_competition_listing
+        ON matches(competition, finished, match_date, id)
+    ''')
+    cursor.execute('ANALYZE matches')
+
+
+def migration_008_data_version(cursor):
+    """Licznik wersji danych meczów (unieważnianie cache listy meczów)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO data_version (name, version) VALUES ('matches', 0)")
+    # Każdy zapis do matches (panel admina, synchronizacja z API) zmienia wersję
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_matches_version_{event.lower()}
+            AFTER {event} ON matches
+            BEGIN
+                UPDATE data_version SET version = version + 1 WHERE name = 'matches';
+            END
+        ''')
+
+
+def migration_009_predictions_version(cursor):
+    """Wersje typów per użytkownik (ETag w API)"""
+    # Wiersz 'predictions:<user_id>' zmienia się przy każdej zmianie typów
+    # użytkownika, także przy przeliczeniu statusu i punktów
+    bump = '''
+        INSERT INTO data_version (name, version) VALUES ('predictions:' || {row}.user_id, 1)
+        ON CONFLICT(name) DO UPDATE SET version = version + 1;
+    '''
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_predictions_version_insert
+        AFTER INSERT ON predictions
+        BEGIN {bump.format(row='NEW')} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_predictions_version_update
+        AFTER UPDATE ON predictions
+        WHEN OLD.predicted_home IS NOT NEW.predicted_home
+          OR OLD.predicted_away IS NOT NEW.predicted_away
+          OR OLD.status IS NOT NEW.status
+          OR OLD.points IS NOT NEW.points
+        BEGIN {bump.format(row='NEW')} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_predictions_version_delete
+        AFTER DELETE ON predictions
+        BEGIN {bump.format(row='OLD')} END
+    ''')
+
+
+def migration_010_score_events(cursor):
+    """Dziennik zmian wyników (strumień SSE)"""
+    # Dopisywany przez scores.apply_match_result (panel admina i sync_matches.py);
+    # deltas - JSON ze zmianami punktów użytkowników
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS score_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER NOT NULL,
+            home_score INTEGER,
+            away_score INTEGER,
+            deltas TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    ''')
+
+
+def migration_011_changes(cursor):
+    """Dziennik zmian matches i predictions (changelog.py)"""
+    # seq rośnie monotonicznie (AUTOINCREMENT - numery nie są używane ponownie
+    # nawet po usunięciu wierszy przy kompaktowaniu)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            payload TEXT,
+            changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_changes_row ON changes(table_name, row_id, seq)
+    ''')
+
+    # payload - klucze potrzebne konsumentom także po usunięciu wiersza
+    payloads = {
+        'matches': "json_object('competition', {row}.competition, 'api_match_id', {row}.api_match_id)",
+        'predictions': "json_object('user_id', {row}.user_id, 'match_id', {row}.match_id)",
+    }
+    for table, payload in payloads.items():
+        for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_{op}
+                AFTER {op.upper()} ON {table}
+                BEGIN
+                    INSERT INTO changes (table_name, row_id, op, payload)
+                    VALUES ('{table}', {row}.id, '{op}', {payload.format(row=row)});
+                END
+            ''')
+
+
+def migration_012_token_version(cursor):
+    """Wersja tokenu sesji użytkownika (auth.py)"""
+    # Zwiększana przy zmianie roli i unieważnieniu sesji - sesje ze starszą wersją tracą ważność
+    if 'token_version' not in _columns(cursor, 'users'):
+        cursor.execute('ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0')
+
+
+def migration_013_drop_user_match_index(cursor):
+    """Usunięcie nieużywanego indeksu predictions(user_id, match_id, ...)"""
+    # Od migracji 004 (status, points) indeks nie pokrywa zapytań /my_predictions
+    # i /stats, a jego prefiks powiela indeks UNIQUE(user_id, match_id)
+    cursor.execute('DROP INDEX IF EXISTS idx_predictions_user_match')
+
+
+def migration_014_auto_vacuum(cursor):
+    """auto_vacuum INCREMENTAL (wolne strony zwalnia backup.py maintain)"""
+    # Tryb istniejącej bazy zmienia dopiero VACUUM całego pliku - jednorazowo,
+    # poza transakcją (NO_TRANSACTION); 2 = INCREMENTAL
+    cursor.execute('PRAGMA auto_vacuum')
+    if cursor.fetchone()[0] != 2:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+
+
+def migration_015_sync_state(cursor):
+    """Dane z API zapisane do bazy per liga i zakres dat (sync_matches.py)"""
+    # Zapisywane w transakcji zapisu meczów - stan zgodny z bazą także po
+    # przywróceniu kopii lub wyczyszczeniu; date_from/date_to '-' gdy brak zakresu
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            competition TEXT NOT NULL,
+            date_from TEXT NOT NULL,
+            date_to TEXT NOT NULL,
+            payload_hash TEXT NOT NULL,
+            applied_at TEXT NOT NULL,
+            PRIMARY KEY (competition, date_from, date_to)
+        )
+    ''')
+
+
+# Lista migracji w kolejności wykonywania: (wersja, funkcja)
+MIGRATIONS = [
+    (1, migration_001_base_tables),
+    (2, migration_002_api_match_id),
+    (3, migration_003_indexes),
+    (4, migration_004_user_scores),
+    (5, migration_005_leaderboard),
+    (6, migration_006_competition),
+    (7, migration_007_match_listing),
+    (8, migration_008_data_version),
+    (9, migration_009_predictions_version),
+    (10, migration_010_score_events),
+    (11, migration_011_changes),
+    (12, migration_012_token_version),
+    (13, migration_013_drop_user_match_index),
+    (14, migration_014_auto_vacuum),
+    (15, migration_015_sync_state),
+]
+# Migracje wykonywane poza transakcją (VACUUM); wersja jest zapisywana po nich
+NO_TRANSACTION = {14}
+
+# Strony sprawdzane przez check: (adres, czy wymaga admina); drugą stronę
+# /matches (kursor after) check odczytuje z odnośnika na pierwszej
+HOT_PAGES = [
+    ('/matches', False),
+    ('/matches?competition=PL', False),
+    ('/my_predictions', False),
+    ('/stats', False),
+    ('/leaderboard', False),
+    ('/leaderboard/json', False),
+    ('/admin', True),
+]
+# Tabele czytane w całości celowo: leaderboard_buckets ma jeden wiersz na liczbę punktów
+ALLOWED_SCANS = {'leaderboard_buckets'}
+
+
+def get_schema_version(conn):
+    """Zwraca bieżącą wersję schematu (0 dla pustej bazy)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def migrate(conn):
+    """
+    Wykonuje wszystkie brakujące migracje, każdą w osobnej transakcji
+    (poza NO_TRANSACTION)
+
+    Returns:
+        Lista numerów wykonanych migracji
+    """
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        cursor = conn.cursor()
+        if version in NO_TRANSACTION:
+            # Sprawdza stan bazy, więc powtórzenie przez inny proces nic nie zmienia
+            migration(cursor)
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            # Inny proces mógł wykonać migrację w międzyczasie
+            cursor.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,))
+            if cursor.fetchone():
+                conn.rollback()
+                continue
+            if version not in NO_TRANSACTION:
+                migration(cursor)
+            cursor.execute('''
+                INSERT INTO schema_version (version, description, applied_at)
+                VALUES (?, ?, ?)
+            ''', (version, migration.__doc__.strip(), datetime.now().isoformat()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    return applied
+
+
+def plain_scans(conn, sql):
+    """Kroki planu zapytania czytające całą tabelę bez indeksu (SCAN bez USING)"""
+    problems = []
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'):
+        detail = row[3]
+        if not detail.startswith('SCAN ') or ' USING ' in detail:
+            continue
+        name = detail.split()[1]
+        if name == 'CONSTANT' or name in ALLOWED_SCANS:
+            continue
+        problems.append(detail)
+    return problems
+
+
+def check(match_count=20000):
+    """
+    EXPLAIN QUERY PLAN zapytań wykonywanych przez najczęściej odwiedzane strony
+    (baza z loadtest.py); zapytanie czytające tabelę bez indeksu (SCAN) to błąd
+
+    Returns:
+        Lista opisów problemów
+    """
+    import os
+    import tempfile
+
+    import loadtest
+    import scores
+    from app import create_app, seed_db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        loadtest.build_database(database, match_count)
+        seed_db(database)
+        conn = db.connect(database)
+        scores.rebuild_scores(conn)
+        conn.close()
+        app = create_app({'DATABASE': database, 'SECRET_KEY': 'migrations-check'})
+
+        # Jedno połączenie w puli - test client obsługuje żądania po kolei,
+        # więc każde zapytanie stron trafia do trace_callback (z wartościami parametrów)
+        statements = []
+        pool = db.get_pool(database)
+        traced = pool.acquire()
+        traced.set_trace_callback(statements.append)
+        pool.release(traced)
+
+        user = app.test_client()
+        user.post('/login', data={'username': 'user1', 'password': 'loadtest'})
+        admin = app.test_client()
+        admin.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+        pages = list(HOT_PAGES)
+        first_page = user.get('/matches').data.decode()
+        after = re.search(r'href="(/matches\?[^"]*after=[^"]*)"', first_page)
+        if after:
+            pages.insert(1, (html.unescape(after.group(1)), False))
+
+        problems = []
+        for url, needs_admin in pages:
+            statements.clear()
+            response = (admin if needs_admin else user).get(url)
+            if response.status_code != 200:
+                problems.append(f'{url}: HTTP {response.status_code}')
+                continue
+            queries = [sql for sql in statements if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+            scans = [(sql, detail) for sql in queries for detail in plain_scans(traced, sql)]
+            print(f"  {url:<40} zapytań {len(queries):3d}  SCAN bez indeksu: {len(scans)}")
+            for sql, detail in scans:
+                problems.append(f"{url}: {detail} - {' '.join(sql.split())[:160]}")
+        if not after:
+            problems.append('/matches: brak odnośnika do następnej strony (kursor after)')
+        traced.set_trace_callback(None)
+        pool.close_all()
+    return problems
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        problems = check()
+        if problems:
+            print(f"⚠️  Zapytania bez indeksu: {len(problems)}")
+            for problem in problems:
+                print(f"   {problem}")
+            sys.exit(1)
+        print("✓ Zapytania najczęściej odwiedzanych stron korzystają z indeksów")
+        sys.exit(0)
+
+    print("=" * 50)
+    print("Migracje schematu bazy danych")
+    print("=" * 50)
+    print()
+
+    conn = db.connect(DATABASE)
+    try:
+        applied = migrate(conn)
+        for version, migration in MIGRATIONS:
+            status = "wykonano teraz" if version in applied else "OK"
+            print(f"  {version:03d} {migration.__doc__.strip()} - {status}")
+        print(f"\n✓ Wersja schematu: {get_schema_version(conn)}")
+    finally:
+        conn.close()
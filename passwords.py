@@ -0,0 +1,171 @@
+"""
+Hashowanie haseł w osobnej puli procesów
+Hash (scrypt, pbkdf2) to kilkadziesiąt ms CPU. Wykonywany w wątku żądania blokuje
+worker, a fala logowań na początku meczu - wszystkie workery i /matches.
+Pula ma ograniczoną liczbę procesów z obniżonym priorytetem (nice) i limit
+oczekujących zadań; po jego przekroczeniu logowanie dostaje 503 zamiast czekać
+
+Parametry hashowania ustawia PASSWORD_HASH_METHOD. Hasło zapisane ze starszymi
+parametrami jest hashowane ponownie przy udanym logowaniu
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# Metoda w formacie Werkzeug: scrypt[:n:r:p] lub pbkdf2[:hash[:iteracje]]
+METHOD_SETTING = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+# Procesy hashujące na worker (0 - hashowanie w wątku żądania)
+PROCESSES = int(os.getenv('PASSWORD_HASH_PROCESSES', '1'))
+# Maksymalna liczba wykonywanych i oczekujących hashy na worker; powyżej - 503.
+# Musi być mniejsza niż liczba wątków workera (GUNICORN_THREADS) - każde oczekujące
+# logowanie zajmuje wątek, pozostałe obsługują resztę stron
+MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '4'))
+# Maksymalny czas oczekiwania żądania na wynik (s)
+TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+# Obniżenie priorytetu procesów hashujących - CPU dostają najpierw zwykłe żądania
+NICE = int(os.getenv('PASSWORD_HASH_NICE', '10'))
+# Nagłówek Retry-After odpowiedzi 503
+RETRY_AFTER = 2
+
+
+class PasswordHashBusy(RuntimeError):
+    """Pula hashowania przeciążona (pełna kolejka lub przekroczony czas) - odpowiedź 503"""
+
+
+def normalize_method(method):
+    """Pełna postać metody z domyślnymi parametrami Werkzeug (jak w zapisanym hashu)"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = args or (2 ** 15, 8, 1)
+        return f'scrypt:{int(n)}:{int(r)}:{int(p)}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Nieobsługiwana metoda hashowania: {method} (scrypt, pbkdf2)')
+
+
+METHOD = normalize_method(METHOD_SETTING)
+
+
+def needs_rehash(password_hash, method=METHOD):
+    """Czy hash zapisano z innymi parametrami niż bieżące"""
+    return password_hash.split('$', 1)[0] != method
+
+
+# Funkcje wykonywane w procesach puli
+
+def _init_process(nice):
+    if nice and hasattr(os, 'nice'):
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method)
+
+
+def _verify(password_hash, password, method):
+    """(poprawne hasło, nowy hash przy zmianie parametrów lub None)"""
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash, method):
+        return True, generate_password_hash(password, method)
+    return True, None
+
+
+class HashPool:
+    """Pula procesów hashujących jednego workera (tworzona przy pierwszym użyciu)"""
+
+    def __init__(self, processes=PROCESSES, max_pending=MAX_PENDING, timeout=TIMEOUT):
+        self.processes = processes
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.stats = {'completed': 0, 'rejected': 0, 'timeouts': 0}
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Po fork (workery gunicorna) pula rodzica nie działa - każdy proces tworzy własną
+        if self._executor is None or self._pid != os.getpid():
+            # forkserver: procesy puli nie dziedziczą wątków i połączeń workera
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            context = multiprocessing.get_context(method)
+            if method == 'forkserver':
+                context.set_forkserver_preload([__name__])
+            self._executor = ProcessPoolExecutor(self.processes, mp_context=context,
+                                                 initializer=_init_process, initargs=(NICE,))
+            self._pid = os.getpid()
+        return self._executor
+
+    def _done(self, future):
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled():
+                self.stats['completed'] += 1
+
+    def run(self, function, *args):
+        """
+        Wykonuje funkcję w puli i czeka na wynik
+
+        Raises:
+            PasswordHashBusy: limit oczekujących zadań lub czas oczekiwania przekroczony
+        """
+        if self.processes <= 0:
+            return function(*args)
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise PasswordHashBusy('Zbyt wiele logowań naraz.')
+            self.pending += 1
+            executor = self._get_executor()
+        try:
+            future = executor.submit(function, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                self.pending -= 1
+                self._executor = None
+            raise PasswordHashBusy('Pula hashowania została zrestartowana.')
+        future.add_done_callback(self._done)
+
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            # Zadanie, które nie zaczęło się wykonywać, zwalnia miejsce w kolejce
+            future.cancel()
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise PasswordHashBusy('Przekroczono czas oczekiwania na weryfikację hasła.')
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise PasswordHashBusy('Pula hashowania została zrestartowana.')
+
+
+pool = HashPool()
+
+
+def hash_password(password):
+    """Hash hasła z bieżącymi parametrami (w puli procesów)"""
+    return pool.run(_hash, password, METHOD)
+
+
+def verify_password(password_hash, password):
+    """
+    Sprawdza hasło (w puli procesów)
+
+    Returns:
+        Krotka (poprawne hasło, nowy hash do zapisania lub None) - nowy hash,
+        gdy zapisany ma inne parametry niż PASSWORD_HASH_METHOD
+    """
+    return pool.run(_verify, password_hash, password, METHOD)
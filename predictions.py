@@ -0,0 +1,205 @@
+"""
+Zapis typów użytkowników (wspólny dla formularzy i API)
+Typy kolejki są zapisywane razem jednym upsertem, z błędami raportowanymi per mecz
+
+Blokada od rozpoczęcia meczu: warunek (brak wyniku, match_date > teraz) jest częścią
+samego zapisu (INSERT ... SELECT / DELETE ... WHERE), a czas jest liczony przez SQLite
+w chwili wykonania zapytania - nie ma okna między sprawdzeniem a zapisem
+Daty meczów są w UTC (jak w football-data.org)
+"""
+
+from datetime import datetime, timezone
+
+# Maksymalna liczba typów w jednym wywołaniu upsert (limit parametrów SQLite)
+UPSERT_CHUNK = 500
+
+CREATED = 'dodany'
+UPDATED = 'zmieniony'
+UNCHANGED = 'bez zmian'
+
+# Aktualny czas UTC w formacie match_date, liczony w SQLite podczas zapisu
+NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+# Mecz przyjmuje typy: bez wyniku i przed rozpoczęciem (alias tabeli: m)
+OPEN_SQL = f'm.home_score IS NULL AND m.away_score IS NULL AND m.match_date > {NOW_SQL}'
+
+FINISHED_MESSAGE = 'Nie można zmienić typu dla meczu, który już się zakończył.'
+STARTED_MESSAGE = 'Mecz już się rozpoczął - typy są zablokowane.'
+
+
+class PredictionError(ValueError):
+    """Błąd zapisu typu - komunikat dla użytkownika i kod HTTP dla API"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_score(value):
+    """Zamienia wartość z formularza lub JSON na liczbę bramek (>= 0)"""
+    try:
+        score = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise PredictionError('Wprowadź poprawne wartości liczbowe (>= 0).')
+    if score < 0:
+        raise PredictionError('Wprowadź poprawne wartości liczbowe (>= 0).')
+    return score
+
+
+def utc_now():
+    """Aktualny czas UTC w formacie match_date (do wyświetlania blokady)"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def is_locked(match, now=None):
+    """Czy mecz nie przyjmuje już typów (tylko do widoków - zapis sprawdza baza)"""
+    return (match['home_score'] is not None or match['away_score'] is not None
+            or match['match_date'] <= (now or utc_now()))
+
+
+def save_predictions(conn, user_id, items):
+    """
+    Dodaje lub aktualizuje wiele typów użytkownika. Nie wykonuje commit.
+
+    Args:
+        items: Lista krotek (match_id, predicted_home, predicted_away) z wartościami
+               z formularza lub JSON (walidowane tutaj); dla powtórzonego meczu liczy się ostatni
+
+    Returns:
+        Lista słowników per mecz: match_id, result (CREATED/UPDATED/UNCHANGED lub None),
+        error (komunikat lub None), status (kod HTTP błędu lub None),
+        locked (True dla meczu, który już się rozpoczął)
+    """
+    results = {}
+    valid = {}
+    for position, (raw_match_id, raw_home, raw_away) in enumerate(items):
+        try:
+            match_id = parse_score(raw_match_id)
+        except PredictionError:
+            # Klucz według pozycji - wartość z JSON może być listą lub obiektem (niehashowalna)
+            results[('invalid', position)] = _failed(raw_match_id, PredictionError('Nieprawidłowy mecz.'))
+            continue
+        try:
+            valid[match_id] = (parse_score(raw_home), parse_score(raw_away))
+            results.pop(match_id, None)
+        except PredictionError as e:
+            valid.pop(match_id, None)
+            results[match_id] = _failed(match_id, e)
+
+    rows = list(valid.items())
+    current_time = datetime.now().isoformat()
+    saved = {}
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        chunk = rows[start:start + UPSERT_CHUNK]
+        # Zapisywane są tylko typy meczów otwartych w chwili wykonania zapytania;
+        # niezmienione typy nie są nadpisywane (brak wiersza w RETURNING)
+        saved.update((row['match_id'], row['created']) for row in conn.execute(f'''
+            WITH items(match_id, predicted_home, predicted_away) AS (
+                VALUES {','.join(['(?, ?, ?)'] * len(chunk))}
+            )
+            INSERT INTO predictions (user_id, match_id, predicted_home, predicted_away, created_at)
+            SELECT ?, m.id, items.predicted_home, items.predicted_away, ?
+            FROM items JOIN matches m ON m.id = items.match_id
+            WHERE {OPEN_SQL}
+            ON CONFLICT(user_id, match_id) DO UPDATE SET
+                predicted_home = excluded.predicted_home,
+                predicted_away = excluded.predicted_away,
+                updated_at = excluded.created_at
+            WHERE predicted_home IS NOT excluded.predicted_home
+               OR predicted_away IS NOT excluded.predicted_away
+            RETURNING match_id, updated_at IS NULL AS created
+        ''', [value for match_id, scores in chunk for value in (match_id,) + scores]
+             + [user_id, current_time]))
+
+    for match_id, created in saved.items():
+        results[match_id] = _result(match_id, CREATED if created else UPDATED)
+
+    # Powód braku zapisu (odczyt po zapisie - tylko do komunikatu)
+    skipped = [match_id for match_id in valid if match_id not in saved]
+    for match_id, reason in _skip_reasons(conn, skipped).items():
+        if reason is None:
+            results[match_id] = _result(match_id, UNCHANGED)
+        else:
+            results[match_id] = _failed(match_id, reason)
+
+    return list(results.values())
+
+
+def _skip_reasons(conn, match_ids):
+    """
+    Dlaczego typy nie zostały zapisane
+
+    Returns:
+        Słownik match_id -> PredictionError (None - typ bez zmian)
+    """
+    states = {}
+    for start in range(0, len(match_ids), UPSERT_CHUNK):
+        chunk = match_ids[start:start + UPSERT_CHUNK]
+        states.update((row['id'], row) for row in conn.execute(f'''
+            SELECT m.id, m.home_score IS NOT NULL OR m.away_score IS NOT NULL AS finished,
+                   ({OPEN_SQL}) AS open
+            FROM matches m
+            WHERE m.id IN ({','.join('?' * len(chunk))})
+        ''', chunk))
+
+    reasons = {}
+    for match_id in match_ids:
+        state = states.get(match_id)
+        if not state:
+            reasons[match_id] = PredictionError('Mecz nie istnieje.', 404)
+        elif state['finished']:
+            reasons[match_id] = PredictionError(FINISHED_MESSAGE, 409)
+        elif not state['open']:
+            reasons[match_id] = PredictionError(STARTED_MESSAGE, 409)
+        else:
+            reasons[match_id] = None
+    return reasons
+
+
+def _result(match_id, result):
+    return {'match_id': match_id, 'result': result, 'error': None, 'status': None, 'locked': False}
+
+
+def _failed(match_id, error):
+    return {'match_id': match_id, 'result': None, 'error': str(error), 'status': error.status,
+            'locked': str(error) == STARTED_MESSAGE}
+
+
+def save_prediction(conn, user_id, match_id, predicted_home, predicted_away):
+    """
+    Dodaje lub aktualizuje jeden typ użytkownika. Nie wykonuje commit.
+
+    Returns:
+        CREATED, UPDATED lub UNCHANGED
+
+    Raises:
+        PredictionError: nieprawidłowe wartości, mecz nie istnieje lub ma już wynik
+    """
+    result = save_predictions(conn, user_id, [(match_id, predicted_home, predicted_away)])[0]
+    if result['error']:
+        raise PredictionError(result['error'], result['status'])
+    return result['result']
+
+
+def delete_prediction(conn, user_id, prediction_id):
+    """
+    Usuwa typ użytkownika, jeśli mecz jeszcze się nie rozpoczął. Nie wykonuje commit.
+
+    Raises:
+        PredictionError: typ nie istnieje / należy do kogoś innego albo mecz jest zablokowany
+    """
+    deleted = conn.execute(f'''
+        DELETE FROM predictions
+        WHERE id = ? AND user_id = ?
+          AND match_id IN (SELECT m.id FROM matches m WHERE {OPEN_SQL})
+    ''', (prediction_id, user_id)).rowcount
+    if deleted:
+        return
+
+    row = conn.execute('SELECT match_id FROM predictions WHERE id = ? AND user_id = ?',
+                       (prediction_id, user_id)).fetchone()
+    if not row:
+        raise PredictionError('Typ nie istnieje lub nie masz uprawnień do jego usunięcia.', 404)
+    reason = _skip_reasons(conn, [row['match_id']])[row['match_id']]
+    if reason and str(reason) == FINISHED_MESSAGE:
+        raise PredictionError('Nie można usunąć typu dla meczu, który już się zakończył.', 409)
+    raise PredictionError('Mecz już się rozpoczął - nie można usunąć typu.', 409)
@@ -0,0 +1,222 @@
+"""
+Skrypt do masowego przeliczania punktacji typów (NumPy)
+Używany po korekcie wyniku przez API lub po zmianie zasad punktacji
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import db
+import scores
+import scoring_rules
+
+DATABASE = "football_predictions.db"
+
+# Kody statusów w tablicach NumPy
+STATUS_CODES = {scores.STATUS_PENDING: 0, scores.STATUS_HIT: 1, scores.STATUS_MISS: 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+
+def load_predictions(conn, match_id=None):
+    """
+    Wczytuje typy i wyniki meczów do tablic NumPy
+
+    Args:
+        match_id: Ogranicza wczytywanie do typów jednego meczu (None - wszystkie)
+
+    Returns:
+        Słownik tablic: id, user_id, match_id, predicted_home, predicted_away,
+        home_score, away_score (NaN dla meczów bez wyniku), status, points,
+        weights (wagi exact/goal_difference/outcome wg rozgrywek meczu)
+    """
+    query = """
+        SELECT p.id, p.user_id, p.predicted_home, p.predicted_away,
+               m.home_score, m.away_score, p.status, p.points, m.competition, p.match_id
+        FROM predictions p
+        JOIN matches m ON p.match_id = m.id
+    """
+    params = ()
+    if match_id is not None:
+        query += " WHERE p.match_id = ?"
+        params = (match_id,)
+
+    rows = conn.execute(query, params).fetchall()
+    columns = list(zip(*rows)) if rows else [()] * 10
+
+    # Wagi punktów: jeden wiersz tabeli na rozgrywki, indeks per typ
+    competitions, competition_index = np.unique(
+        np.array([competition or '' for competition in columns[8]], dtype=object),
+        return_inverse=True)
+    weights = np.array(
+        scoring_rules.weights_table(scores.RULES, [code or None for code in competitions]),
+        dtype=np.int64).reshape(-1, len(scoring_rules.RULE_KEYS))
+
+    return {
+        "id": np.array(columns[0], dtype=np.int64),
+        "user_id": np.array(columns[1], dtype=np.int64),
+        "match_id": np.array(columns[9], dtype=np.int64),
+        "predicted_home": np.array(columns[2], dtype=np.float64),
+        "predicted_away": np.array(columns[3], dtype=np.float64),
+        # None -> NaN (mecz bez wyniku)
+        "home_score": np.array(columns[4], dtype=np.float64),
+        "away_score": np.array(columns[5], dtype=np.float64),
+        "status": np.array([STATUS_CODES[status] for status in columns[6]], dtype=np.int8),
+        "points": np.array(columns[7], dtype=np.int64),
+        "weights": weights[competition_index.reshape(-1)] if rows else weights,
+    }
+
+
+def score_arrays(data):
+    """
+    Ocena wszystkich typów w jednym przebiegu wektorowym (te same zasady co scores.evaluate,
+    wagi punktów zależne od rozgrywek meczu)
+
+    Returns:
+        Krotka (kody statusów, punkty)
+    """
+    finished = ~np.isnan(data["home_score"]) & ~np.isnan(data["away_score"])
+    predicted_diff = data["predicted_home"] - data["predicted_away"]
+    actual_diff = data["home_score"] - data["away_score"]
+
+    exact = finished & (data["predicted_home"] == data["home_score"]) \
+        & (data["predicted_away"] == data["away_score"])
+    goal_difference = finished & ~exact & (predicted_diff == actual_diff)
+    outcome = finished & ~exact & ~goal_difference \
+        & (np.sign(predicted_diff) == np.sign(actual_diff))
+
+    status = np.where(finished, STATUS_CODES[scores.STATUS_MISS], STATUS_CODES[scores.STATUS_PENDING])
+    status = np.where(exact, STATUS_CODES[scores.STATUS_HIT], status).astype(np.int8)
+
+    tiers = np.stack([exact, goal_difference, outcome], axis=1)
+    points = (tiers * data["weights"]).sum(axis=1).astype(np.int64)
+    return status, points
+
+
+def _row_deltas(data, status, points):
+    """Zmiany (total, correct, points) per typ"""
+    pending = STATUS_CODES[scores.STATUS_PENDING]
+    hit = STATUS_CODES[scores.STATUS_HIT]
+
+    return np.stack([
+        (status != pending).astype(np.int64) - (data["status"] != pending),
+        (status == hit).astype(np.int64) - (data["status"] == hit),
+        points - data["points"],
+    ], axis=1)
+
+
+def _user_deltas(data, status, points):
+    """Sumuje zmiany (total, correct, points) per użytkownik"""
+    row_deltas = _row_deltas(data, status, points)
+
+    user_ids, index = np.unique(data["user_id"], return_inverse=True)
+    totals = np.zeros((len(user_ids), 3), dtype=np.int64)
+    np.add.at(totals, index, row_deltas)
+
+    return {int(user_id): tuple(int(value) for value in row)
+            for user_id, row in zip(user_ids, totals) if row.any()}
+
+
+def _match_deltas(data, status, points, changed):
+    """Zmiany per mecz i użytkownik tylko dla zmienionych typów: {match_id: {user_id: (total, correct, points)}}"""
+    row_deltas = _row_deltas(data, status, points)[changed]
+    deltas = {}
+    for match_id, user_id, row in zip(data["match_id"][changed].tolist(),
+                                      data["user_id"][changed].tolist(), row_deltas.tolist()):
+        match = deltas.setdefault(match_id, {})
+        total, correct, user_points = match.get(user_id, (0, 0, 0))
+        match[user_id] = (total + row[0], correct + row[1], user_points + row[2])
+    return deltas
+
+
+def _log_events(conn, match_deltas):
+    """Zdarzenie score_events per mecz ze zmienionymi typami (jak scores.apply_match_result)"""
+    cursor = conn.cursor()
+    for match_id, deltas in match_deltas.items():
+        match = cursor.execute('SELECT home_score, away_score FROM matches WHERE id = ?',
+                               (match_id,)).fetchone()
+        scores.log_score_event(cursor, match_id, match, deltas)
+
+
+def rescore(conn, match_id=None):
+    """
+    Przelicza punktację typów i zapisuje tylko zmienione wiersze. Odczyt typów
+    i zapis punktacji to jedna transakcja zapisu (BEGIN IMMEDIATE) - typ
+    zmieniony lub wynik zsynchronizowany w trakcie nie zostanie nadpisany.
+    Mecze ze zmienionymi typami dostają zdarzenie w score_events
+
+    Args:
+        match_id: Przelicza tylko typy jednego meczu (None - cała historia)
+
+    Returns:
+        Liczba zmienionych typów
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        data = load_predictions(conn, match_id)
+        status, points = score_arrays(data)
+
+        changed = (status != data["status"]) | (points != data["points"])
+        updates = [(STATUS_NAMES[int(code)], int(value), int(prediction_id))
+                   for code, value, prediction_id
+                   in zip(status[changed], points[changed], data["id"][changed])]
+
+        cursor = conn.cursor()
+        cursor.executemany("UPDATE predictions SET status = ?, points = ? WHERE id = ?", updates)
+        scores.apply_deltas(cursor, _user_deltas(data, status, points))
+        _log_events(conn, _match_deltas(data, status, points, changed))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(updates)
+
+
+def benchmark(conn, repeat=5):
+    """Porównuje przebieg wektorowy z ocenianiem typ po typie w Pythonie"""
+    data = load_predictions(conn)
+    rows = list(zip(data["predicted_home"].tolist(), data["predicted_away"].tolist(),
+                    data["home_score"].tolist(), data["away_score"].tolist()))
+    print(f"Typów: {len(rows)}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for predicted_home, predicted_away, home_score, away_score in rows:
+            scores.evaluate(predicted_home, predicted_away,
+                            None if home_score != home_score else home_score,
+                            None if away_score != away_score else away_score)
+    python_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        score_arrays(data)
+    numpy_time = (time.perf_counter() - start) / repeat
+
+    print(f"  Python (typ po typie): {python_time * 1000:.2f} ms")
+    print(f"  NumPy (wektorowo):     {numpy_time * 1000:.2f} ms")
+    if numpy_time > 0:
+        print(f"  Przyspieszenie:        {python_time / numpy_time:.1f}x")
+
+
+if __name__ == "__main__":
+    import migrations
+
+    conn = db.connect(DATABASE)
+    try:
+        migrations.migrate(conn)
+        if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+            benchmark(conn)
+        elif len(sys.argv) > 2 and sys.argv[1] == "match":
+            changed = rescore(conn, match_id=int(sys.argv[2]))
+            print(f"✓ Przeliczono typy meczu {sys.argv[2]}, zmieniono: {changed}")
+        elif len(sys.argv) == 1:
+            start = time.perf_counter()
+            changed = rescore(conn)
+            print(f"✓ Przeliczono wszystkie typy w {time.perf_counter() - start:.2f} s, "
+                  f"zmieniono: {changed}")
+        else:
+            print("Użycie: python rescore.py [match <id> | benchmark]")
+            sys.exit(2)
+    finally:
+        conn.close()
@@ -0,0 +1,340 @@
+"""
+Punktacja typów i zagregowane wyniki użytkowników (tabela user_scores)
+Wyniki są aktualizowane przyrostowo przy zapisie wyniku meczu
+"""
+
+import json
+import sys
+from datetime import datetime
+
+import db
+import leaderboard
+import scoring_rules
+
+DATABASE = 'football_predictions.db'
+
+STATUS_PENDING = 'oczekiwanie'
+STATUS_HIT = 'trafiony'
+STATUS_MISS = 'nietrafiony'
+
+# Zasady punktacji per rozgrywki (scoring_rules.py)
+RULES = scoring_rules.load_rules()
+_points = scoring_rules.compile_function(RULES)
+
+
+def evaluate(predicted_home, predicted_away, home_score, away_score, competition=None):
+    """
+    Ocena pojedynczego typu
+
+    Returns:
+        Krotka (status, punkty)
+    """
+    if home_score is None or away_score is None:
+        return STATUS_PENDING, 0
+    points = _points(predicted_home, predicted_away, home_score, away_score, competition)
+    if predicted_home == home_score and predicted_away == away_score:
+        return STATUS_HIT, points
+    return STATUS_MISS, points
+
+
+# Ta sama ocena w SQL (p - predictions, m - matches)
+STATUS_SQL = f'''
+    CASE
+        WHEN m.home_score IS NULL OR m.away_score IS NULL THEN '{STATUS_PENDING}'
+        WHEN p.predicted_home = m.home_score AND p.predicted_away = m.away_score THEN '{STATUS_HIT}'
+        ELSE '{STATUS_MISS}'
+    END
+'''
+
+POINTS_SQL = scoring_rules.compile_sql(RULES)
+
+
+def apply_deltas(cursor, deltas):
+    """
+    Dodaje różnice (total, correct, points) do user_scores i przesuwa użytkowników w rankingu.
+    Wiersz użytkownika bez ocenionych typów (total = 0) jest usuwany, tak jak w rebuild_scores
+    """
+    if not deltas:
+        return
+    
+    user_ids = list(deltas)
+    placeholders = ','.join('?' * len(user_ids))
+    cursor.execute(f'SELECT user_id, total, points FROM user_scores WHERE user_id IN ({placeholders})',
+                   user_ids)
+    old = {row['user_id']: (row['total'], row['points']) for row in cursor.fetchall()}
+
+    current_time = datetime.now().isoformat()
+    cursor.executemany('''
+        INSERT INTO user_scores (user_id, total, correct, points, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            total = total + excluded.total,
+            correct = correct + excluded.correct,
+            points = points + excluded.points,
+            updated_at = excluded.updated_at
+    ''', [(user_id, total, correct, points, current_time)
+          for user_id, (total, correct, points) in deltas.items()])
+
+    emptied = [user_id for user_id, (total, correct, points) in deltas.items()
+               if old.get(user_id, (0, 0))[0] + total <= 0]
+    if emptied:
+        cursor.execute(f'DELETE FROM user_scores WHERE user_id IN ({",".join("?" * len(emptied))})',
+                       emptied)
+
+    leaderboard.move_users(cursor, [
+        (old[user_id][1] if user_id in old else None,
+         None if user_id in emptied else old.get(user_id, (0, 0))[1] + points)
+        for user_id, (total, correct, points) in deltas.items()
+    ])
+
+
+def apply_match_result(conn, match_id):
+    """
+    Przelicza typy jednego meczu i aktualizuje user_scores tylko o różnice.
+    Dopisuje zdarzenie do score_events (strumień /live).
+    Nie wykonuje commit - zapis wyniku i punktacji to jedna transakcja.
+
+    Returns:
+        Słownik {user_id: (zmiana total, zmiana correct, zmiana points)}
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT home_score, away_score, competition FROM matches WHERE id = ?',
+                   (match_id,))
+    match = cursor.fetchone()
+    if not match:
+        return {}
+
+    cursor.execute('''
+        SELECT id, user_id, predicted_home, predicted_away, status, points
+        FROM predictions
+        WHERE match_id = ?
+    ''', (match_id,))
+
+    updates = []
+    deltas = {}
+    for pred in cursor.fetchall():
+        status, points = evaluate(pred['predicted_home'], pred['predicted_away'],
+                                  match['home_score'], match['away_score'],
+                                  match['competition'])
+        if status == pred['status'] and points == pred['points']:
+            continue
+
+        updates.append((status, points, pred['id']))
+        total, correct, user_points = deltas.get(pred['user_id'], (0, 0, 0))
+        deltas[pred['user_id']] = (
+            total + (status != STATUS_PENDING) - (pred['status'] != STATUS_PENDING),
+            correct + (status == STATUS_HIT) - (pred['status'] == STATUS_HIT),
+            user_points + points - pred['points'],
+        )
+
+    cursor.executemany('UPDATE predictions SET status = ?, points = ? WHERE id = ?', updates)
+    apply_deltas(cursor, deltas)
+    # Zmiana terminu lub drużyn meczu bez wyniku nie trafia do strumienia
+    if match['home_score'] is not None or deltas:
+        log_score_event(cursor, match_id, match, deltas)
+    return deltas
+
+
+def log_score_event(cursor, match_id, match, deltas):
+    """Dopisuje wynik meczu i zmiany w rankingu do score_events"""
+    changed = []
+    user_ids = [user_id for user_id, (_, _, points) in deltas.items() if points]
+    if user_ids:
+        placeholders = ','.join('?' * len(user_ids))
+        cursor.execute(f'''
+            SELECT s.user_id, u.username, s.points
+            FROM user_scores s
+            JOIN users u ON u.id = s.user_id
+            WHERE s.user_id IN ({placeholders})
+        ''', user_ids)
+        changed = [{'user_id': row['user_id'], 'username': row['username'],
+                    'points': row['points'], 'delta': deltas[row['user_id']][2]}
+                   for row in cursor.fetchall()]
+
+    cursor.execute('''
+        INSERT INTO score_events (match_id, home_score, away_score, deltas, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (match_id, match['home_score'], match['away_score'],
+          json.dumps(changed, separators=(',', ':'), ensure_ascii=False),
+          datetime.now().isoformat()))
+
+
+# Punkty sezonów przeniesionych do dołączonego archiwum (season_archive.py)
+ARCHIVED_SCORES_SQL = '''
+    UNION ALL
+    SELECT user_id, total, correct, points FROM archive.season_scores
+'''
+
+# Punkty archiwum wyliczone od zera z typów archiwum
+ARCHIVED_SEASON_SCORES_SQL = f'''
+    SELECT p.user_id, m.season,
+           SUM(p.status != '{STATUS_PENDING}') AS total,
+           SUM(p.status = '{STATUS_HIT}') AS correct,
+           SUM(p.points) AS points
+    FROM archive.predictions p
+    JOIN archive.matches m ON m.id = p.match_id
+    GROUP BY p.user_id, m.season
+'''
+
+
+def _user_totals_sql(archived):
+    """Zapytanie: (user_id, total, correct, points) z typów bazy głównej i punktów archiwum"""
+    return f'''
+        SELECT user_id, SUM(total) AS total, SUM(correct) AS correct, SUM(points) AS points
+        FROM (
+            SELECT user_id,
+                   SUM(status != '{STATUS_PENDING}') AS total,
+                   SUM(status = '{STATUS_HIT}') AS correct,
+                   SUM(points) AS points
+            FROM main.predictions
+            GROUP BY user_id
+            {ARCHIVED_SCORES_SQL if archived else ''}
+        )
+        GROUP BY user_id
+    '''
+
+
+def rebuild_scores(conn):
+    """
+    Pełne przeliczenie statusów typów, tabeli user_scores i rankingu (odtwarzanie).
+    Z dołączonym archiwum przelicza też typy i season_scores archiwum
+    """
+    cursor = conn.cursor()
+    archived = db.is_attached(conn, 'archive')
+    for schema in ('main', 'archive') if archived else ('main',):
+        cursor.execute(f'''
+            UPDATE {schema}.predictions AS p
+            SET status = {STATUS_SQL},
+                points = {POINTS_SQL}
+            FROM {schema}.matches AS m
+            WHERE m.id = p.match_id
+        ''')
+    if archived:
+        cursor.execute('DELETE FROM archive.season_scores')
+        cursor.execute(f'''
+            INSERT INTO archive.season_scores (user_id, season, total, correct, points)
+            {ARCHIVED_SEASON_SCORES_SQL}
+        ''')
+    cursor.execute('DELETE FROM user_scores')
+    cursor.execute(f'''
+        INSERT INTO user_scores (user_id, total, correct, points, updated_at)
+        SELECT user_id, total, correct, points, ?
+        FROM ({_user_totals_sql(archived)})
+        WHERE total > 0
+    ''', (datetime.now().isoformat(),))
+    leaderboard.rebuild(cursor)
+    conn.commit()
+
+
+def check_consistency(conn):
+    """
+    Porównuje zapisane statusy i user_scores z wartościami wyliczonymi od zera
+    (z dołączonym archiwum - także typy i season_scores archiwum)
+
+    Returns:
+        Lista opisów niezgodności (pusta gdy wszystko się zgadza)
+    """
+    cursor = conn.cursor()
+    problems = []
+    archived = db.is_attached(conn, 'archive')
+
+    for schema in ('main', 'archive') if archived else ('main',):
+        cursor.execute(f'''
+            SELECT p.id, p.status, p.points,
+                   {STATUS_SQL} AS expected_status,
+                   {POINTS_SQL} AS expected_points
+            FROM {schema}.predictions p
+            JOIN {schema}.matches m ON p.match_id = m.id
+            WHERE p.status != {STATUS_SQL} OR p.points != {POINTS_SQL}
+        ''')
+        label = 'typ' if schema == 'main' else 'typ archiwum'
+        for row in cursor.fetchall():
+            problems.append(f"{label} {row['id']}: {row['status']}/{row['points']} "
+                            f"zamiast {row['expected_status']}/{row['expected_points']}")
+
+    if archived:
+        cursor.execute(f'''
+            WITH expected AS ({ARCHIVED_SEASON_SCORES_SQL})
+            SELECT e.user_id, e.season, e.total, e.correct, e.points,
+                   s.total AS s_total, s.correct AS s_correct, s.points AS s_points
+            FROM expected e
+            LEFT JOIN archive.season_scores s ON s.user_id = e.user_id AND s.season = e.season
+            WHERE s.total IS NOT e.total OR s.correct IS NOT e.correct OR s.points IS NOT e.points
+            UNION ALL
+            SELECT s.user_id, s.season, 0, 0, 0, s.total, s.correct, s.points
+            FROM archive.season_scores s
+            WHERE NOT EXISTS (SELECT 1 FROM expected e
+                              WHERE e.user_id = s.user_id AND e.season = s.season)
+        ''')
+        for row in cursor.fetchall():
+            problems.append(f"sezon {row['season']}, użytkownik {row['user_id']}: "
+                            f"{row['s_total']}/{row['s_correct']}/{row['s_points']} "
+                            f"zamiast {row['total']}/{row['correct']}/{row['points']}")
+
+    cursor.execute(f'''
+        WITH expected AS ({_user_totals_sql(archived)}),
+        stored AS (
+            SELECT user_id, total, correct, points FROM user_scores
+        ),
+        -- Wiersz mają dokładnie użytkownicy z ocenionymi typami (jak w rebuild_scores)
+        expected_rows AS (
+            SELECT * FROM expected WHERE total > 0
+        ),
+        merged AS (
+            SELECT e.user_id, 1 AS e_exists, s.user_id IS NOT NULL AS s_exists,
+                   e.total AS e_total, e.correct AS e_correct, e.points AS e_points,
+                   s.total AS s_total, s.correct AS s_correct, s.points AS s_points
+            FROM expected_rows e LEFT JOIN stored s ON s.user_id = e.user_id
+            UNION ALL
+            SELECT s.user_id, 0, 1, NULL, NULL, NULL, s.total, s.correct, s.points
+            FROM stored s
+            WHERE s.user_id NOT IN (SELECT user_id FROM expected_rows)
+        )
+        SELECT * FROM merged
+        WHERE e_exists != s_exists
+           OR e_total != s_total OR e_correct != s_correct OR e_points != s_points
+    ''')
+    for row in cursor.fetchall():
+        if not row['s_exists']:
+            problems.append(f"użytkownik {row['user_id']}: brak wiersza w user_scores "
+                            f"(powinno być {row['e_total']}/{row['e_correct']}/{row['e_points']})")
+        elif not row['e_exists']:
+            problems.append(f"użytkownik {row['user_id']}: zbędny wiersz w user_scores "
+                            f"{row['s_total']}/{row['s_correct']}/{row['s_points']} "
+                            f"(brak ocenionych typów)")
+        else:
+            problems.append(f"użytkownik {row['user_id']}: "
+                            f"{row['s_total']}/{row['s_correct']}/{row['s_points']} "
+                            f"zamiast {row['e_total']}/{row['e_correct']}/{row['e_points']}")
+
+    problems.extend(leaderboard.check(cursor))
+    return problems
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+
+    import season_archive
+
+    conn = db.connect(DATABASE)
+    try:
+        # Punkty sezonów w archiwum są częścią user_scores
+        season_archive.attach(conn)
+        if command == "rebuild":
+            print("Przeliczanie punktacji wszystkich typów...")
+            rebuild_scores(conn)
+            print("✓ Tabela user_scores została odbudowana.")
+        elif command == "check":
+            problems = check_consistency(conn)
+            if problems:
+                print(f"⚠️  Znaleziono {len(problems)} niezgodności:")
+                for problem in problems:
+                    print(f"   {problem}")
+                print("\n   Uruchom: python scores.py rebuild")
+                sys.exit(1)
+            print("✓ Punktacja jest spójna.")
+        else:
+            print("Użycie: python scores.py [check|rebuild]")
+            sys.exit(2)
+    finally:
+        conn.close()
@@ -0,0 +1,270 @@
+"""
+Zasady punktacji typów, konfigurowane per rozgrywki (kod ligi, np. PL, CL)
+Zasady są kompilowane do jednej funkcji Pythona i jednego wyrażenia SQL
+
+    python scoring_rules.py check   # przypadki brzegowe i zgodność Python/SQL
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+# Progi punktacji - typ dostaje najwięcej punktów spośród spełnionych progów:
+#   exact           - dokładny wynik
+#   goal_difference - trafiona różnica bramek (w tym remis innym wynikiem)
+#   outcome         - trafiony rezultat 1X2
+RULE_KEYS = ('exact', 'goal_difference', 'outcome')
+
+DEFAULT_RULES = {'exact': 1, 'goal_difference': 0, 'outcome': 0}
+
+# Plik JSON z zasadami: {"default": {...}, "PL": {...}, "CL": {...}}
+RULES_FILE = os.getenv('SCORING_RULES_FILE', 'scoring_rules.json')
+
+# Klucz zasad dla meczów bez przypisanych rozgrywek
+DEFAULT_KEY = 'default'
+
+
+def validate_rule(rule):
+    """Sprawdza i uzupełnia pojedynczą zasadę"""
+    unknown = set(rule) - set(RULE_KEYS)
+    if unknown:
+        raise ValueError(f'Nieznane klucze zasad punktacji: {", ".join(sorted(unknown))}')
+    validated = dict(DEFAULT_RULES, **rule)
+    for key in RULE_KEYS:
+        # bool to podklasa int - true/false z JSON nie są liczbą punktów
+        value = validated[key]
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f'Punkty "{key}" muszą być liczbą całkowitą >= 0')
+    return validated
+
+
+def load_rules(path=RULES_FILE):
+    """
+    Wczytuje zasady punktacji
+
+    Returns:
+        Słownik {kod rozgrywek lub 'default': zasada}
+    """
+    rules = {DEFAULT_KEY: dict(DEFAULT_RULES)}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            configured = json.load(f)
+        for competition, rule in configured.items():
+            rules[competition] = validate_rule(rule)
+    return rules
+
+
+def _effective(rule):
+    """
+    Punkty za progi po uwzględnieniu, że wyższy próg spełnia też niższe
+    (trafiona różnica bramek oznacza trafiony rezultat, dokładny wynik - oba)
+
+    Returns:
+        Krotka (exact, goal_difference, outcome)
+    """
+    outcome = rule['outcome']
+    goal_difference = max(rule['goal_difference'], outcome)
+    exact = max(rule['exact'], goal_difference)
+    return exact, goal_difference, outcome
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def compile_function(rules):
+    """
+    Kompiluje zasady do funkcji points(predicted_home, predicted_away,
+    home_score, away_score, competition) zwracającej liczbę punktów
+    """
+    table = {competition: _effective(rule) for competition, rule in rules.items()}
+    default = table[DEFAULT_KEY]
+
+    def points(predicted_home, predicted_away, home_score, away_score, competition=None):
+        if home_score is None or away_score is None:
+            return 0
+        exact, goal_difference, outcome = table.get(competition, default)
+        if predicted_home == home_score and predicted_away == away_score:
+            return exact
+        if predicted_home - predicted_away == home_score - away_score:
+            return goal_difference
+        if _sign(predicted_home - predicted_away) == _sign(home_score - away_score):
+            return outcome
+        return 0
+
+    return points
+
+
+def _rule_sql(rule):
+    """Wyrażenie SQL punktów dla jednej zasady (p - predictions, m - matches)"""
+    exact, goal_difference, outcome = _effective(rule)
+    return f'''CASE
+            WHEN p.predicted_home = m.home_score AND p.predicted_away = m.away_score
+                THEN {exact}
+            WHEN p.predicted_home - p.predicted_away = m.home_score - m.away_score
+                THEN {goal_difference}
+            WHEN (p.predicted_home > p.predicted_away) - (p.predicted_home < p.predicted_away)
+               = (m.home_score > m.away_score) - (m.home_score < m.away_score)
+                THEN {outcome}
+            ELSE 0
+        END'''
+
+
+def compile_sql(rules):
+    """Kompiluje zasady do jednego wyrażenia SQL zwracającego liczbę punktów"""
+    branches = ''.join(
+        f"\n        WHEN m.competition = '{competition.replace(chr(39), chr(39) * 2)}' "
+        f"THEN {_rule_sql(rule)}"
+        for competition, rule in rules.items() if competition != DEFAULT_KEY)
+    return f'''
+    CASE
+        WHEN m.home_score IS NULL OR m.away_score IS NULL THEN 0{branches}
+        ELSE {_rule_sql(rules[DEFAULT_KEY])}
+    END
+'''
+
+
+def weights_table(rules, competitions):
+    """
+    Wagi punktów dla listy rozgrywek (do obliczeń wektorowych)
+
+    Returns:
+        Lista krotek (exact, goal_difference, outcome) w kolejności competitions
+    """
+    default = rules[DEFAULT_KEY]
+    return [_effective(rules.get(competition, default)) for competition in competitions]
+
+
+# Zasady przypadków brzegowych check: PL ma goal_difference poniżej outcome
+# (efektywnie równe outcome), CL - inne wagi niż default
+CHECK_RULES = {
+    DEFAULT_KEY: {'exact': 3, 'goal_difference': 2, 'outcome': 1},
+    'PL': {'exact': 5, 'goal_difference': 0, 'outcome': 2},
+    'CL': {'exact': 4, 'goal_difference': 3, 'outcome': 0},
+}
+
+# (opis, typ, wynik, rozgrywki, oczekiwane punkty wg CHECK_RULES)
+CHECK_CASES = [
+    ('dokładny wynik', (2, 1), (2, 1), None, 3),
+    ('0:0 trafione', (0, 0), (0, 0), None, 3),
+    ('remis innym wynikiem', (1, 1), (0, 0), None, 2),
+    ('remis zamiast wygranej', (1, 1), (2, 1), None, 0),
+    ('wygrana zamiast remisu 0:0', (1, 0), (0, 0), None, 0),
+    ('trafiona różnica bramek', (3, 2), (1, 0), None, 2),
+    ('tylko rezultat', (3, 0), (1, 0), None, 1),
+    ('tylko rezultat (gość)', (0, 2), (1, 4), None, 1),
+    ('odwrócony wynik', (0, 1), (1, 0), None, 0),
+    ('mecz bez wyniku', (1, 1), (None, None), None, 0),
+    ('PL: dokładny wynik', (2, 1), (2, 1), 'PL', 5),
+    ('PL: różnica bramek = rezultat', (3, 2), (1, 0), 'PL', 2),
+    ('PL: remis innym wynikiem', (2, 2), (0, 0), 'PL', 2),
+    ('CL: tylko rezultat = 0', (3, 0), (1, 0), 'CL', 0),
+    ('CL: remis innym wynikiem', (1, 1), (3, 3), 'CL', 3),
+    ('nieznane rozgrywki -> default', (3, 0), (1, 0), 'XX', 1),
+    ('nieznane rozgrywki, dokładny', (0, 0), (0, 0), 'XX', 3),
+]
+
+# Nieprawidłowe zasady odrzucane przez validate_rule
+INVALID_RULES = [
+    {'exact': True},
+    {'outcome': False},
+    {'exact': -1},
+    {'exact': 1.5},
+    {'exact': '3'},
+    {'bonus': 1},
+]
+
+
+def sql_points(rules, status_sql, rows):
+    """
+    Punkty i status z wyrażeń SQL dla listy (typ gospodarzy, typ gości, wynik
+    gospodarzy, wynik gości, rozgrywki) - tabele p i m w bazie w pamięci
+
+    Returns:
+        Lista krotek (status lub None, punkty) w kolejności rows
+    """
+    conn = sqlite3.connect(':memory:')
+    try:
+        conn.execute('CREATE TABLE p (id INTEGER PRIMARY KEY, predicted_home, predicted_away)')
+        conn.execute('CREATE TABLE m (id INTEGER PRIMARY KEY, home_score, away_score, competition)')
+        conn.executemany('INSERT INTO p VALUES (?, ?, ?)',
+                         [(i, row[0], row[1]) for i, row in enumerate(rows)])
+        conn.executemany('INSERT INTO m VALUES (?, ?, ?, ?)',
+                         [(i, row[2], row[3], row[4]) for i, row in enumerate(rows)])
+        return [tuple(result) for result in conn.execute(f'''
+            SELECT {status_sql or 'NULL'}, {compile_sql(rules)}
+            FROM p JOIN m ON m.id = p.id
+            ORDER BY p.id
+        ''')]
+    finally:
+        conn.close()
+
+
+def _grid(competitions, max_goals=4):
+    """Wszystkie typy i wyniki 0..max_goals (oraz mecze bez wyniku) dla każdych rozgrywek"""
+    goals = range(max_goals + 1)
+    return [(ph, pa, hs, aw, competition)
+            for competition in competitions
+            for ph in goals for pa in goals
+            for hs, aw in [(None, None)] + [(h, a) for h in goals for a in goals]]
+
+
+def check():
+    """
+    Przypadki brzegowe (remisy, 0:0, dokładny wynik a sam rezultat, zasady
+    per rozgrywki i powrót do default), odrzucanie nieprawidłowych zasad oraz
+    zgodność punktów i statusu Python/SQL na siatce wyników 0..4 - dla
+    CHECK_RULES i zasad z SCORING_RULES_FILE (scores.evaluate, STATUS_SQL, POINTS_SQL)
+
+    Returns:
+        Lista opisów niezgodności
+    """
+    import scores
+
+    problems = []
+    for rule in INVALID_RULES:
+        try:
+            validate_rule(rule)
+            problems.append(f'zasada {rule} nie została odrzucona')
+        except ValueError:
+            pass
+
+    rules = {competition: validate_rule(rule) for competition, rule in CHECK_RULES.items()}
+    points = compile_function(rules)
+    rows = [predicted + actual + (competition,) for _, predicted, actual, competition, _ in CHECK_CASES]
+    for (label, predicted, actual, competition, expected), (_, from_sql) in zip(
+            CHECK_CASES, sql_points(rules, None, rows)):
+        from_python = points(*predicted, *actual, competition)
+        if from_python != expected or from_sql != expected:
+            problems.append(f'{label}: Python {from_python}, SQL {from_sql}, oczekiwano {expected}')
+
+    competitions = [None, 'XX'] + [code for code in rules if code != DEFAULT_KEY]
+    grid = _grid(competitions)
+    for row, (_, from_sql) in zip(grid, sql_points(rules, None, grid)):
+        if points(*row) != from_sql:
+            problems.append(f'CHECK_RULES {row}: Python {points(*row)}, SQL {from_sql}')
+
+    # Zasady używane przez aplikację: scores.evaluate a STATUS_SQL i POINTS_SQL
+    competitions = [None, 'XX'] + [code for code in scores.RULES if code != DEFAULT_KEY]
+    grid = _grid(competitions)
+    for row, from_sql in zip(grid, sql_points(scores.RULES, scores.STATUS_SQL, grid)):
+        from_python = scores.evaluate(*row)
+        if from_python != from_sql:
+            problems.append(f'{RULES_FILE} {row}: Python {from_python}, SQL {from_sql}')
+    return problems
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        problems = check()
+        if problems:
+            print(f"⚠️  Znaleziono {len(problems)} niezgodności:")
+            for problem in problems[:20]:
+                print(f"   {problem}")
+            sys.exit(1)
+        print(f"✓ Przypadki brzegowe ({len(CHECK_CASES)}), odrzucanie błędnych zasad "
+              f"i zgodność Python/SQL na siatce wyników")
+    else:
+        print("Użycie: python scoring_rules.py check")
+        sys.exit(2)
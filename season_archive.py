@@ -0,0 +1,544 @@
+"""
+Archiwum zakończonych sezonów (osobny plik bazy dołączany przez ATTACH)
+Mecze i typy zakończonego sezonu są przenoszone z bazy głównej do pliku
+archiwum razem z punktami użytkowników w sezonie (season_scores), wyliczonymi
+przy przenoszeniu. W bazie głównej zostają tylko bieżące dane, więc lista
+meczów, typy i indeksy nie rosną z każdym sezonem. Archiwum jest dołączane do
+połączenia jako schemat "archive" - strona /stats pokazuje sezony archiwalne
+i ich typy
+
+Punkty z archiwum pozostają w user_scores (ranking całej historii),
+a python scores.py check/rebuild uwzględnia archiwum
+
+    python season_archive.py list
+    python season_archive.py archive 2023/24      # lub: archive finished
+    python season_archive.py restore 2023/24
+    python season_archive.py check
+    python season_archive.py benchmark
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+import db
+import scores
+
+DATABASE = 'football_predictions.db'
+
+# Plik archiwum (domyślnie obok bazy głównej: football_predictions_archive.db)
+ARCHIVE_PATH = os.getenv('ARCHIVE_DATABASE_PATH')
+# Pierwszy miesiąc sezonu (7 - sezon lipiec-czerwiec, 1 - rok kalendarzowy)
+SEASON_START_MONTH = int(os.getenv('SEASON_START_MONTH', '7'))
+# Sezon można przenieść po tylu dniach od jego końca - okno wsteczne
+# sync_matches.py nie obejmuje już jego meczów, więc nie wrócą do bazy głównej
+MIN_AGE_DAYS = int(os.getenv('ARCHIVE_MIN_AGE_DAYS', '30'))
+
+SCHEMA = 'archive'
+
+# Rok początku sezonu meczu m (parametr: SEASON_START_MONTH)
+SEASON_YEAR_SQL = ('CAST(substr(m.match_date, 1, 4) AS INTEGER) '
+                   '- (CAST(substr(m.match_date, 6, 2) AS INTEGER) < ?)')
+
+
+def season_label(year):
+    """Nazwa sezonu zaczynającego się w podanym roku (2023/24 lub 2023)"""
+    if SEASON_START_MONTH == 1:
+        return str(year)
+    return f'{year}/{(year + 1) % 100:02d}'
+
+
+def season_range(season):
+    """
+    Zakres dat sezonu
+
+    Returns:
+        Krotka (pierwszy dzień, dzień po ostatnim) w formacie YYYY-MM-DD
+
+    Raises:
+        ValueError: nieprawidłowa nazwa sezonu
+    """
+    try:
+        year = int(season[:4])
+    except ValueError:
+        year = None
+    if year is None or season_label(year) != season:
+        raise ValueError(f'Nieprawidłowy sezon: {season} (np. {season_label(date.today().year - 1)})')
+    start = date(year, SEASON_START_MONTH, 1)
+    return start.isoformat(), start.replace(year=year + 1).isoformat()
+
+
+def archive_path(conn):
+    """Ścieżka pliku archiwum dla bazy głównej połączenia"""
+    if ARCHIVE_PATH:
+        return ARCHIVE_PATH
+    main = next(row[2] for row in conn.execute('PRAGMA database_list') if row[1] == 'main')
+    root, extension = os.path.splitext(main)
+    return f'{root}_archive{extension or ".db"}'
+
+
+def _create_schema(conn):
+    # Przed WAL i tabelami, żeby nowy plik zwalniał strony przyrostowo
+    # (baza główna dostaje ten tryb w migracji 014)
+    conn.execute(f'PRAGMA {SCHEMA}.auto_vacuum = INCREMENTAL')
+    conn.execute(f'PRAGMA {SCHEMA}.journal_mode = WAL')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SCHEMA}.matches (
+            id INTEGER PRIMARY KEY,
+            home_team TEXT NOT NULL,
+            away_team TEXT NOT NULL,
+            match_date TEXT NOT NULL,
+            home_score INTEGER NULL,
+            away_score INTEGER NULL,
+            created_at TEXT NOT NULL,
+            api_match_id INTEGER NULL,
+            competition TEXT NULL,
+            season TEXT NOT NULL
+        )
+    ''')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {SCHEMA}.idx_matches_season ON matches(season, match_date)')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SCHEMA}.predictions (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            match_id INTEGER NOT NULL,
+            predicted_home INTEGER NOT NULL,
+            predicted_away INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NULL,
+            status TEXT NOT NULL,
+            points INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {SCHEMA}.idx_predictions_user_match
+        ON predictions(user_id, match_id)
+    ''')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {SCHEMA}.idx_predictions_match ON predictions(match_id)')
+    # Punkty użytkownika w sezonie (strona /stats bez sięgania do typów)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SCHEMA}.season_scores (
+            user_id INTEGER NOT NULL,
+            season TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            points INTEGER NOT NULL,
+            PRIMARY KEY (user_id, season)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SCHEMA}.seasons (
+            season TEXT PRIMARY KEY,
+            date_from TEXT NOT NULL,
+            date_to TEXT NOT NULL,
+            matches INTEGER NOT NULL,
+            predictions INTEGER NOT NULL,
+            archived_at TEXT NOT NULL
+        )
+    ''')
+
+
+def attach(conn, create=False):
+    """
+    Dołącza plik archiwum do połączenia jako schemat archive (poza transakcją)
+
+    Args:
+        create: utwórz plik i tabele archiwum, jeśli nie istnieją
+
+    Returns:
+        Czy archiwum jest dołączone (False - brak pliku)
+    """
+    if db.is_attached(conn, SCHEMA):
+        return True
+    path = archive_path(conn)
+    if not create and not os.path.exists(path):
+        return False
+    conn.execute(f'ATTACH DATABASE ? AS {SCHEMA}', (path,))
+    if create:
+        _create_schema(conn)
+    return True
+
+
+def _blocker(date_to, unfinished):
+    """Powód, dla którego sezonu nie można jeszcze przenieść (None - można)"""
+    if date_to > (date.today() - timedelta(days=MIN_AGE_DAYS)).isoformat():
+        return f'sezon trwa lub skończył się w ciągu {MIN_AGE_DAYS} dni'
+    if unfinished:
+        return f'mecze bez wyniku: {unfinished}'
+    return None
+
+
+def list_seasons(conn):
+    """
+    Sezony w bazie głównej i w archiwum
+
+    Returns:
+        Lista słowników: season, date_from, date_to, matches, predictions,
+        archived (bool), reason (dlaczego sezonu nie można jeszcze przenieść lub None)
+    """
+    cursor = conn.execute(f'''
+        SELECT {SEASON_YEAR_SQL} AS year,
+               COUNT(DISTINCT m.id) AS matches,
+               COUNT(p.id) AS predictions,
+               COUNT(DISTINCT CASE WHEN m.home_score IS NULL THEN m.id END) AS unfinished
+        FROM matches m
+        LEFT JOIN predictions p ON p.match_id = m.id
+        GROUP BY year
+        ORDER BY year
+    ''', (SEASON_START_MONTH,))
+    seasons = []
+    for row in cursor.fetchall():
+        season = season_label(row['year'])
+        date_from, date_to = season_range(season)
+        seasons.append({'season': season, 'date_from': date_from, 'date_to': date_to,
+                        'matches': row['matches'], 'predictions': row['predictions'],
+                        'archived': False, 'reason': _blocker(date_to, row['unfinished'])})
+
+    if db.is_attached(conn, SCHEMA):
+        for row in conn.execute(f'SELECT * FROM {SCHEMA}.seasons ORDER BY season'):
+            seasons.append({'season': row['season'], 'date_from': row['date_from'],
+                            'date_to': row['date_to'], 'matches': row['matches'],
+                            'predictions': row['predictions'], 'archived': True, 'reason': None})
+    return sorted(seasons, key=lambda season: (season['date_from'], season['archived']))
+
+
+def archive_season(conn, season):
+    """
+    Przenosi mecze i typy zakończonego sezonu do archiwum i zapisuje punkty
+    użytkowników w sezonie. Wymaga dołączonego archiwum (attach). Nie wykonuje commit.
+
+    Przy trybie WAL transakcja obejmująca dwa pliki jest atomowa dla każdego
+    z nich osobno - po awarii między zatwierdzeniem archiwum a bazy głównej
+    wiersze są w obu plikach (check to wykrywa), a ponowne archive je porządkuje
+
+    Returns:
+        Krotka (przeniesione mecze, przeniesione typy)
+
+    Raises:
+        ValueError: sezonu nie można jeszcze przenieść
+    """
+    date_from, date_to = season_range(season)
+    live = conn.execute('''
+        SELECT COUNT(*) AS matches, SUM(home_score IS NULL) AS unfinished
+        FROM main.matches
+        WHERE match_date >= ? AND match_date < ?
+    ''', (date_from, date_to)).fetchone()
+    if not live['matches']:
+        raise ValueError(f'Brak meczów sezonu {season} w bazie głównej')
+    reason = _blocker(date_to, live['unfinished'])
+    if reason:
+        raise ValueError(f'Sezonu {season} nie można przenieść: {reason}')
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO {SCHEMA}.matches (id, home_team, away_team, match_date, home_score,
+                                                 away_score, created_at, api_match_id, competition,
+                                                 season)
+        SELECT id, home_team, away_team, match_date, home_score, away_score, created_at,
+               api_match_id, competition, ?
+        FROM main.matches
+        WHERE match_date >= ? AND match_date < ?
+    ''', (season, date_from, date_to))
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO {SCHEMA}.predictions (id, user_id, match_id, predicted_home,
+                                                     predicted_away, created_at, updated_at,
+                                                     status, points)
+        SELECT p.id, p.user_id, p.match_id, p.predicted_home, p.predicted_away, p.created_at,
+               p.updated_at, p.status, p.points
+        FROM main.predictions p
+        JOIN main.matches m ON m.id = p.match_id
+        WHERE m.match_date >= ? AND m.match_date < ?
+    ''', (date_from, date_to))
+
+    # Punkty z całego sezonu w archiwum (także z wcześniej przeniesionej części)
+    cursor.execute(f'DELETE FROM {SCHEMA}.season_scores WHERE season = ?', (season,))
+    cursor.execute(f'''
+        INSERT INTO {SCHEMA}.season_scores (user_id, season, total, correct, points)
+        SELECT p.user_id, m.season,
+               SUM(p.status != '{scores.STATUS_PENDING}'),
+               SUM(p.status = '{scores.STATUS_HIT}'),
+               SUM(p.points)
+        FROM {SCHEMA}.predictions p
+        JOIN {SCHEMA}.matches m ON m.id = p.match_id
+        WHERE m.season = ?
+        GROUP BY p.user_id
+    ''', (season,))
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO {SCHEMA}.seasons (season, date_from, date_to, matches, predictions,
+                                                 archived_at)
+        SELECT ?, ?, ?,
+               (SELECT COUNT(*) FROM {SCHEMA}.matches WHERE season = ?),
+               (SELECT COUNT(*) FROM {SCHEMA}.predictions p
+                JOIN {SCHEMA}.matches m ON m.id = p.match_id WHERE m.season = ?),
+               ?
+    ''', (season, date_from, date_to, season, season, datetime.now().isoformat()))
+
+    # Usuwane są dokładnie wiersze zapisane w archiwum
+    moved_matches = f'SELECT id FROM {SCHEMA}.matches WHERE season = ?'
+    cursor.execute(f'DELETE FROM main.score_events WHERE match_id IN ({moved_matches})', (season,))
+    cursor.execute(f'DELETE FROM main.predictions WHERE match_id IN ({moved_matches})', (season,))
+    predictions_count = cursor.rowcount
+    cursor.execute(f'DELETE FROM main.matches WHERE id IN ({moved_matches})', (season,))
+    return cursor.rowcount, predictions_count
+
+
+def restore_season(conn, season):
+    """
+    Przywraca mecze i typy sezonu z archiwum do bazy głównej (punkty w user_scores
+    już je obejmują). Wymaga dołączonego archiwum. Nie wykonuje commit.
+
+    Returns:
+        Krotka (przywrócone mecze, przywrócone typy)
+
+    Raises:
+        ValueError: sezonu nie ma w archiwum
+    """
+    season_range(season)
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT 1 FROM {SCHEMA}.seasons WHERE season = ?', (season,))
+    if not cursor.fetchone():
+        raise ValueError(f'Brak sezonu {season} w archiwum')
+
+    cursor.execute(f'''
+        INSERT INTO main.matches (id, home_team, away_team, match_date, home_score, away_score,
+                                  created_at, api_match_id, competition)
+        SELECT id, home_team, away_team, match_date, home_score, away_score, created_at,
+               api_match_id, competition
+        FROM {SCHEMA}.matches
+        WHERE season = ?
+    ''', (season,))
+    matches_count = cursor.rowcount
+    cursor.execute(f'''
+        INSERT INTO main.predictions (id, user_id, match_id, predicted_home, predicted_away,
+                                      created_at, updated_at, status, points)
+        SELECT p.id, p.user_id, p.match_id, p.predicted_home, p.predicted_away, p.created_at,
+               p.updated_at, p.status, p.points
+        FROM {SCHEMA}.predictions p
+        JOIN {SCHEMA}.matches m ON m.id = p.match_id
+        WHERE m.season = ?
+    ''', (season,))
+    predictions_count = cursor.rowcount
+
+    moved_matches = f'SELECT id FROM {SCHEMA}.matches WHERE season = ?'
+    cursor.execute(f'DELETE FROM {SCHEMA}.predictions WHERE match_id IN ({moved_matches})', (season,))
+    cursor.execute(f'DELETE FROM {SCHEMA}.matches WHERE season = ?', (season,))
+    cursor.execute(f'DELETE FROM {SCHEMA}.season_scores WHERE season = ?', (season,))
+    cursor.execute(f'DELETE FROM {SCHEMA}.seasons WHERE season = ?', (season,))
+    return matches_count, predictions_count
+
+
+def check(conn):
+    """
+    Spójność archiwum: brak wierszy jednocześnie w obu plikach i typów bez
+    meczu, punktacja (scores.check_consistency z archiwum)
+
+    Returns:
+        Lista opisów niezgodności
+    """
+    problems = []
+    if db.is_attached(conn, SCHEMA):
+        for table in ('matches', 'predictions'):
+            count = conn.execute(f'''
+                SELECT COUNT(*) FROM {SCHEMA}.{table} a JOIN main.{table} l ON l.id = a.id
+            ''').fetchone()[0]
+            if count:
+                problems.append(f'{table}: {count} wierszy w archiwum i w bazie głównej '
+                                f'(ponów archive dla ich sezonu)')
+        count = conn.execute(f'''
+            SELECT COUNT(*) FROM {SCHEMA}.predictions p
+            WHERE NOT EXISTS (SELECT 1 FROM {SCHEMA}.matches m WHERE m.id = p.match_id)
+        ''').fetchone()[0]
+        if count:
+            problems.append(f'predictions: {count} typów archiwum bez meczu')
+    return problems + scores.check_consistency(conn)
+
+
+def user_seasons(conn, user_id):
+    """Punkty użytkownika w sezonach archiwalnych (najnowsze najpierw)"""
+    if not attach(conn):
+        return []
+    return conn.execute(f'''
+        SELECT season, total, correct, points
+        FROM {SCHEMA}.season_scores
+        WHERE user_id = ?
+        ORDER BY season DESC
+    ''', (user_id,)).fetchall()
+
+
+def user_predictions(conn, user_id, season):
+    """Typy użytkownika z sezonu archiwalnego (kolumny jak na stronie /stats)"""
+    return conn.execute(f'''
+        SELECT p.predicted_home, p.predicted_away, p.status, p.points,
+               m.home_score, m.away_score, m.home_team, m.away_team, m.match_date
+        FROM {SCHEMA}.predictions p
+        JOIN {SCHEMA}.matches m ON p.match_id = m.id
+        WHERE p.user_id = ? AND m.season = ?
+        ORDER BY m.match_date ASC
+    ''', (user_id, season)).fetchall()
+
+
+def _used_size(conn, schema='main'):
+    """Rozmiar danych bazy (strony bez wolnych) w MB"""
+    pages = conn.execute(f'PRAGMA {schema}.page_count').fetchone()[0]
+    free = conn.execute(f'PRAGMA {schema}.freelist_count').fetchone()[0]
+    page_size = conn.execute(f'PRAGMA {schema}.page_size').fetchone()[0]
+    return (pages - free) * page_size / 2 ** 20
+
+
+def benchmark(match_count=50000, repeat=200):
+    """/matches i /stats przed i po przeniesieniu zakończonych sezonów (baza z loadtest.py)"""
+    import tempfile
+    import time
+
+    import changelog
+    import loadtest
+    from app import create_app
+
+    def measure(client, urls):
+        results = {}
+        for label, url in urls:
+            client.get(url)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - start)
+                assert response.status_code == 200, (url, response.status_code)
+            results[label] = (loadtest.percentile(timings, 0.5) * 1000,
+                              loadtest.percentile(timings, 0.99) * 1000, len(response.data))
+        return results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'football_predictions.db')
+        print(f"Tworzenie bazy testowej ({match_count} meczów)...")
+        loadtest.build_database(database, match_count)
+        conn = db.connect(database)
+        scores.rebuild_scores(conn)
+        # Rozmiary bez dziennika changes - jego wpisy (także o przeniesionych
+        # wierszach) usuwa retencja changelog.py compact
+        changelog.compact(conn, retention_days=0)
+        conn.commit()
+        conn.execute('VACUUM main')
+        size_before = _used_size(conn)
+        counts_before = [conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                         for table in ('matches', 'predictions')]
+
+        app = create_app({'DATABASE': database, 'SECRET_KEY': 'archive-test'})
+        client = app.test_client()
+        client.post('/login', data={'username': 'user1', 'password': 'loadtest'})
+        urls = [('/matches', '/matches'), ('/matches?competition=PL', '/matches?competition=PL'),
+                ('/stats', '/stats')]
+        before = measure(client, urls)
+
+        attach(conn, create=True)
+        seasons = [s['season'] for s in list_seasons(conn) if not s['archived'] and not s['reason']]
+        start = time.perf_counter()
+        for season in seasons:
+            conn.execute('BEGIN IMMEDIATE')
+            archive_season(conn, season)
+            conn.commit()
+        archive_time = time.perf_counter() - start
+        problems = check(conn)
+        changelog.compact(conn, retention_days=0)
+        conn.commit()
+        conn.execute('VACUUM main')
+        size_after = _used_size(conn)
+        size_archive = _used_size(conn, SCHEMA)
+        counts_after = [conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                        for table in ('matches', 'predictions')]
+
+        after = measure(client, urls + [('/stats?season= (archiwum)', f'/stats?season={seasons[-1]}')])
+
+        # Przywrócenie jednego sezonu i ponowne przeniesienie
+        conn.execute('BEGIN IMMEDIATE')
+        restored = restore_season(conn, seasons[-1])
+        conn.commit()
+        problems += check(conn)
+        conn.execute('BEGIN IMMEDIATE')
+        archive_season(conn, seasons[-1])
+        conn.commit()
+        problems += check(conn)
+        conn.close()
+
+    print(f"\nPrzeniesione sezony: {len(seasons)} ({seasons[0]} - {seasons[-1]}) w {archive_time:.1f} s")
+    print(f"  baza główna: mecze {counts_before[0]} -> {counts_after[0]}, "
+          f"typy {counts_before[1]} -> {counts_after[1]}, "
+          f"dane {size_before:.1f} MB -> {size_after:.1f} MB (archiwum {size_archive:.1f} MB, "
+          f"bez dziennika changes)")
+    print(f"  przywrócenie sezonu {seasons[-1]}: mecze {restored[0]}, typy {restored[1]}")
+    print(f"\n  {'widok':<28} {'p50 przed':>10} {'p50 po':>8} {'p99 przed':>10} {'p99 po':>8} "
+          f"{'KB przed':>9} {'KB po':>7}")
+    for label, (p50, p99, size) in after.items():
+        p50_before, p99_before, size_before = before.get(label, (None, None, None))
+        columns = [f'{p50_before:10.2f}' if p50_before else f"{'-':>10}", f'{p50:8.2f}',
+                   f'{p99_before:10.2f}' if p99_before else f"{'-':>10}", f'{p99:8.2f}',
+                   f'{size_before / 1024:9.1f}' if size_before else f"{'-':>9}", f'{size / 1024:7.1f}']
+        print(f"  {label:<28} {' '.join(columns)}")
+    if problems:
+        print(f"⚠️  Niezgodności po archiwizacji: {len(problems)}")
+        for problem in problems[:10]:
+            print(f"   {problem}")
+        sys.exit(1)
+    print("✓ Punktacja spójna po przeniesieniu i przywróceniu sezonu")
+
+
+if __name__ == "__main__":
+    # benchmark tworzy aplikację, która importuje ten moduł (a nie __main__)
+    import migrations
+    import season_archive
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "benchmark":
+        season_archive.benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+        sys.exit(0)
+    if command not in ("list", "archive", "restore", "check") \
+            or (command in ("archive", "restore") and len(sys.argv) < 3):
+        print("Użycie: python season_archive.py [list | archive <sezon>|finished "
+              "| restore <sezon> | check | benchmark [mecze]]")
+        sys.exit(1)
+
+    conn = db.connect(os.getenv('DATABASE_PATH', DATABASE))
+    try:
+        migrations.migrate(conn)
+        if command == "list":
+            attach(conn)
+            for season in list_seasons(conn):
+                state = 'archiwum' if season['archived'] else (season['reason'] or 'do przeniesienia')
+                print(f"  {season['season']:<8} {season['date_from']} - {season['date_to']}  "
+                      f"mecze {season['matches']:6d}  typy {season['predictions']:7d}  {state}")
+        elif command == "check":
+            attach(conn)
+            problems = check(conn)
+            if problems:
+                print(f"⚠️  Znaleziono {len(problems)} niezgodności:")
+                for problem in problems:
+                    print(f"   {problem}")
+                sys.exit(1)
+            print("✓ Archiwum i punktacja są spójne.")
+        else:
+            if not attach(conn, create=command == "archive"):
+                print(f"⚠️  Brak pliku archiwum {archive_path(conn)}")
+                sys.exit(1)
+            if command == "archive" and sys.argv[2] == "finished":
+                names = [s['season'] for s in list_seasons(conn) if not s['archived'] and not s['reason']]
+            else:
+                names = [sys.argv[2]]
+            for name in names:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    if command == "archive":
+                        moved = archive_season(conn, name)
+                    else:
+                        moved = restore_season(conn, name)
+                    conn.commit()
+                except (ValueError, sqlite3.IntegrityError) as e:
+                    conn.rollback()
+                    print(f"⚠️  {e}")
+                    sys.exit(1)
+                action = 'Przeniesiono do archiwum' if command == "archive" else 'Przywrócono'
+                print(f"✓ {action} sezon {name}: mecze {moved[0]}, typy {moved[1]}")
+            if not names:
+                print("Brak zakończonych sezonów do przeniesienia.")
+    finally:
+        conn.close()
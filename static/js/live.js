@@ -0,0 +1,85 @@
+// Wyniki na żywo na liście meczów (SSE /live) - bez odświeżania strony.
+// Gdy strumień jest niedostępny (503 - limit strumieni workera), lista odpytuje /live/events
+(function () {
+    var POLL_INTERVAL = 10000;
+    var lastSeq = null;
+
+    function notify(text) {
+        var messages = document.querySelector('.messages');
+        if (!messages) {
+            messages = document.createElement('div');
+            messages.className = 'messages';
+            var main = document.querySelector('main');
+            main.insertBefore(messages, main.firstChild);
+        }
+        var alert = document.createElement('div');
+        alert.className = 'alert alert-info';
+        alert.textContent = text;
+        messages.appendChild(alert);
+    }
+
+    function showScore(data) {
+        if (!data.score) {
+            return;
+        }
+
+        var row = document.querySelector('tr[data-match-id="' + data.match_id + '"]');
+        if (row) {
+            var cell = row.querySelector('.score-cell');
+            cell.innerHTML = '';
+            var result = document.createElement('span');
+            result.className = 'result';
+            result.textContent = data.score[0] + ' : ' + data.score[1];
+            cell.appendChild(result);
+            row.classList.add('finished');
+            row.querySelectorAll('.score-input').forEach(function (input) {
+                input.disabled = true;
+            });
+        }
+
+        var text = 'Wynik: ' + data.home_team + ' ' + data.score[0] + ' : ' +
+            data.score[1] + ' ' + data.away_team;
+        if (data.leaderboard.length) {
+            text += ' (zmiany w rankingu: ' + data.leaderboard.length + ')';
+        }
+        notify(text);
+    }
+
+    function poll() {
+        var url = '/live/events' + (lastSeq === null ? '' : '?after=' + lastSeq);
+        fetch(url, {credentials: 'same-origin'})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                return response.json();
+            })
+            .then(function (data) {
+                data.events.forEach(showScore);
+                lastSeq = data.last;
+            })
+            .catch(function () {})
+            .then(function () {
+                setTimeout(poll, POLL_INTERVAL);
+            });
+    }
+
+    if (!window.EventSource) {
+        if (window.fetch) {
+            poll();
+        }
+        return;
+    }
+
+    var source = new EventSource('/live');
+    source.addEventListener('score', function (event) {
+        lastSeq = parseInt(event.lastEventId, 10);
+        showScore(JSON.parse(event.data));
+    });
+    source.addEventListener('error', function () {
+        // Odpowiedź inna niż 200 (np. 503) zamyka strumień bez ponownego łączenia
+        if (source.readyState === EventSource.CLOSED && window.fetch) {
+            poll();
+        }
+    });
+})();
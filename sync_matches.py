@@ -1,40 +1,146 @@
 """
 Skrypt do synchronizacji meczów z football-data.org API
 Pobiera mecze z ligi Premier League (PL) i aktualizuje wyniki w bazie danych
+Tryb multi pobiera kilka lig równolegle (limit zapytań na minutę - token bucket)
 """
 
+import hashlib
+import json
 import requests
-import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import os
 import sys
+import threading
+import time
+
+import db
+import http_cache
+import scores
 
 # Konfiguracja
 API_KEY = os.getenv("FOOTBALL_DATA_API_KEY", "80f5c894cc4b4471bec41c92b091d96e")  # Ustaw zmienną środowiskową lub wpisz klucz
 COMPETITION_CODE = "PL"  # Premier League (kod ligi)
+# Ligi synchronizowane w trybie multi
+COMPETITION_CODES = os.getenv("FOOTBALL_DATA_COMPETITIONS", "PL,PD,BL1,SA,FL1,CL").split(",")
 DATABASE = "football_predictions.db"
-BASE_URL = "https://api.football-data.org/v4"
+BASE_URL = os.getenv("FOOTBALL_DATA_BASE_URL", "https://api.football-data.org/v4")
+# Limit zapytań na minutę (darmowy plan football-data.org: 10)
+RATE_LIMIT_PER_MINUTE = int(os.getenv("FOOTBALL_DATA_RATE_LIMIT", "10"))
+MAX_WORKERS = int(os.getenv("FOOTBALL_DATA_MAX_WORKERS", "4"))
+# Katalog cache odpowiedzi API (ETag/Last-Modified + treść)
+CACHE_DIR = os.getenv("FOOTBALL_DATA_CACHE_DIR", os.path.join(".cache", "football_data"))
+# Po ilu dniach bez użycia wpis cache jest usuwany (zakres dat zmienia się codziennie)
+CACHE_MAX_AGE_DAYS = int(os.getenv("FOOTBALL_DATA_CACHE_MAX_AGE_DAYS", "7"))
 
 headers = {
     "X-Auth-Token": API_KEY
 }
 
 
+class TokenBucket:
+    """Limiter zapytań - maksymalnie `rate` zapytań na `per` sekund (bezpieczny wątkowo)"""
+    
+    def __init__(self, rate, per=60.0):
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+    
+    def pause(self, seconds):
+        """Wstrzymuje wydawanie tokenów (np. gdy API zgłasza wyczerpany limit)"""
+        with self.lock:
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.updated_at = self.blocked_until
+    
+    def acquire(self):
+        """Czeka na wolny token i go zużywa"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity,
+                                      self.tokens + (now - self.updated_at) * self.fill_rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+
+# Wspólna sesja HTTP (pula połączeń keep-alive) i limiter dla wszystkich wątków
+session = requests.Session()
+session.headers.update(headers)
+session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+rate_limiter = TokenBucket(RATE_LIMIT_PER_MINUTE)
+response_cache = http_cache.ResponseCache(CACHE_DIR)
+
+
 def get_db():
-    """Pobiera połączenie z bazą danych"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Pobiera połączenie z bazą danych (WAL, busy_timeout)"""
+    return db.connect(DATABASE)
 
 
-def fetch_fixtures_from_api(competition_code="PL", date_from=None, date_to=None):
+def payload_hash(fixtures):
+    """Hash listy meczów z API (porównywany z tabelą sync_state)"""
+    payload = json.dumps(fixtures, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_applied(conn, competition_code, date_from, date_to, fixtures):
+    """Czy te same dane ligi i zakresu dat zostały już zapisane do tej bazy"""
+    row = conn.execute("""
+        SELECT payload_hash FROM sync_state
+        WHERE competition = ? AND date_from = ? AND date_to = ?
+    """, (competition_code, date_from or "-", date_to or "-")).fetchone()
+    return row is not None and row[0] == payload_hash(fixtures)
+
+
+def mark_applied(conn, competition_code, date_from, date_to, fixtures):
     """
-    Pobiera mecze z football-data.org API
+    Zapamiętuje dane zapisane do bazy - w tej samej transakcji co zapis meczów,
+    więc przywrócona lub wyczyszczona baza nie zostanie pominięta. Nie wykonuje commit.
+    """
+    now = datetime.now()
+    conn.execute("""
+        INSERT INTO sync_state (competition, date_from, date_to, payload_hash, applied_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(competition, date_from, date_to) DO UPDATE SET
+            payload_hash = excluded.payload_hash,
+            applied_at = excluded.applied_at
+    """, (competition_code, date_from or "-", date_to or "-", payload_hash(fixtures), now.isoformat()))
+    # Zakres dat przesuwa się codziennie - starsze zakresy nie wrócą
+    conn.execute("DELETE FROM sync_state WHERE applied_at < ?",
+                 ((now - timedelta(days=CACHE_MAX_AGE_DAYS)).isoformat(),))
+
+
+def _honor_rate_limit(response):
+    """Wstrzymuje limiter, gdy API zgłasza wyczerpany limit zapytań"""
+    available = response.headers.get("X-Requests-Available-Minute")
+    reset = response.headers.get("X-RequestCounter-Reset")
+    if response.status_code == 429 or (available is not None and int(available) <= 0):
+        rate_limiter.pause(int(reset) if reset else 60)
+
+
+def fetch_fixtures_cached(competition_code="PL", date_from=None, date_to=None):
+    """
+    Pobiera mecze z football-data.org API zapytaniem warunkowym (cache na dysku)
     
     Args:
         competition_code: Kod ligi (domyślnie PL - Premier League)
         date_from: Data początkowa w formacie YYYY-MM-DD
         date_to: Data końcowa w formacie YYYY-MM-DD
+    
+    Returns:
+        Lista meczów lub None przy błędzie API (czy dane trafiły już do bazy
+        sprawdza is_applied)
     """
     url = f"{BASE_URL}/competitions/{competition_code}/matches"
     
@@ -44,22 +150,130 @@ def fetch_fixtures_from_api(competition_code="PL", date_from=None, date_to=None)
     if date_to:
         params["dateTo"] = date_to
     
+    entry = response_cache.get(competition_code, date_from, date_to)
+    
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        # Jedna ponowna próba po 429 (limiter czeka do resetu licznika)
+        for _ in range(2):
+            rate_limiter.acquire()
+            response = session.get(url, params=params, timeout=10,
+                                   headers=response_cache.conditional_headers(entry))
+            _honor_rate_limit(response)
+            if response.status_code != 429:
+                break
+        
+        if response.status_code == 304 and entry:
+            response_cache.count("hits")
+            response_cache.touch(competition_code, date_from, date_to)
+        else:
+            response.raise_for_status()
+            response_cache.count("misses")
+            entry = response_cache.store(competition_code, date_from, date_to, response)
+        
+        data = json.loads(entry["body"])
         
         # Sprawdź czy są błędy w odpowiedzi
         if "error" in data or "message" in data:
             print(f"Błąd API: {data.get('message', data.get('error', 'Unknown error'))}")
-            return []
+            return None
         
         return data.get("matches", [])
     except requests.exceptions.RequestException as e:
         print(f"Błąd podczas pobierania danych z API: {e}")
         if hasattr(e.response, 'text'):
             print(f"Odpowiedź serwera: {e.response.text}")
-        return []
+        return None
+
+
+def fetch_fixtures_from_api(competition_code="PL", date_from=None, date_to=None):
+    """
+    Pobiera mecze z football-data.org API
+    
+    Args:
+        competition_code: Kod ligi (domyślnie PL - Premier League)
+        date_from: Data początkowa w formacie YYYY-MM-DD
+        date_to: Data końcowa w formacie YYYY-MM-DD
+    """
+    return fetch_fixtures_cached(competition_code, date_from, date_to) or []
+
+
+def _parse_fixture(match, competition_code):
+    """Zamienia mecz z odpowiedzi API na krotkę do tabeli tymczasowej"""
+    # Wyniki (może być None jeśli mecz się nie zakończył)
+    score = match.get("score", {})
+    full_time = score.get("fullTime", {})
+    
+    # Konwertuj datę z formatu "2024-03-15T20:00:00Z" na "2024-03-15T20:00:00"
+    match_date = match["utcDate"].replace("Z", "").replace("+00:00", "")
+    
+    return (match["id"], match["homeTeam"]["name"], match["awayTeam"]["name"], match_date,
+            full_time.get("home"), full_time.get("away"), competition_code)
+
+
+def _stage(cursor, fixtures_rows):
+    """Ładuje mecze do tabeli tymczasowej staging_fixtures (jedno executemany)"""
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS staging_fixtures (
+            api_match_id INTEGER PRIMARY KEY,
+            home_team TEXT,
+            away_team TEXT,
+            match_date TEXT,
+            home_score INTEGER,
+            away_score INTEGER,
+            competition TEXT
+        )
+    """)
+    cursor.execute("DELETE FROM staging_fixtures")
+    cursor.executemany("INSERT OR REPLACE INTO staging_fixtures VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       fixtures_rows)
+
+
+def write_fixtures(conn, fixtures, competition_code):
+    """
+    Zapisuje pobrane mecze do bazy jednym upsertem (dodaje nowe, aktualizuje
+    tylko te, które się zmieniły). Nie wykonuje commit.
+    
+    Returns:
+        Krotka (liczba dodanych, liczba zaktualizowanych)
+    """
+    cursor = conn.cursor()
+    _stage(cursor, [_parse_fixture(match, competition_code) for match in fixtures])
+    
+    # Nowe mecze dostają created_at z tego przebiegu - po nim RETURNING
+    # odróżnia dodane wiersze od zaktualizowanych
+    run_time = datetime.now().isoformat()
+    cursor.execute("""
+        INSERT INTO matches (home_team, away_team, match_date, home_score, away_score,
+                             created_at, api_match_id, competition)
+        SELECT home_team, away_team, match_date, home_score, away_score,
+               ?, api_match_id, competition
+        FROM staging_fixtures
+        WHERE true
+        ON CONFLICT(api_match_id) DO UPDATE SET
+            home_team = excluded.home_team,
+            away_team = excluded.away_team,
+            match_date = excluded.match_date,
+            home_score = excluded.home_score,
+            away_score = excluded.away_score,
+            competition = excluded.competition
+        WHERE matches.home_team IS NOT excluded.home_team
+           OR matches.away_team IS NOT excluded.away_team
+           OR matches.match_date IS NOT excluded.match_date
+           OR matches.home_score IS NOT excluded.home_score
+           OR matches.away_score IS NOT excluded.away_score
+           OR matches.competition IS NOT excluded.competition
+        RETURNING id, created_at = ? AS inserted
+    """, (run_time, run_time))
+    changed = cursor.fetchall()
+    
+    added_count = sum(1 for row in changed if row["inserted"])
+    updated_ids = [row["id"] for row in changed if not row["inserted"]]
+    
+    # Przelicz punktację typów zaktualizowanych meczów
+    for match_id in updated_ids:
+        scores.apply_match_result(conn, match_id)
+    
+    return added_count, len(updated_ids)
 
 
 def sync_matches_from_api(competition_code="PL", days_back=30, days_ahead=30):
@@ -72,7 +286,6 @@ def sync_matches_from_api(competition_code="PL", days_back=30, days_ahead=30):
         days_ahead: Liczba dni do przodu, dla których pobierać mecze (domyślnie 30 - miesiąc)
     """
     conn = get_db()
-    cursor = conn.cursor()
     
     print(f"Pobieranie meczów z ligi {competition_code} (Premier League)...")
     
@@ -87,7 +300,7 @@ def sync_matches_from_api(competition_code="PL", days_back=30, days_ahead=30):
     print(f"Pobieranie meczów z zakresu: {date_from_str} - {date_to_str}")
     print(f"  (miesiąc wstecz: {days_back} dni, miesiąc do przodu: {days_ahead} dni)")
     
-    fixtures = fetch_fixtures_from_api(
+    fixtures = fetch_fixtures_cached(
         competition_code=competition_code,
         date_from=date_from_str,
         date_to=date_to_str
@@ -98,56 +311,16 @@ def sync_matches_from_api(competition_code="PL", days_back=30, days_ahead=30):
         conn.close()
         return
     
+    if is_applied(conn, competition_code, date_from_str, date_to_str, fixtures):
+        response_cache.count("unchanged")
+        print("Dane z API nie zmieniły się od ostatniej synchronizacji - pomijam zapis.")
+        conn.close()
+        return
+    
     print(f"\nPrzetwarzanie {len(fixtures)} meczów...")
     
-    added_count = 0
-    updated_count = 0
-    
-    for match in fixtures:
-        api_match_id = match["id"]
-        home_team = match["homeTeam"]["name"]
-        away_team = match["awayTeam"]["name"]
-        
-        # Konwersja daty z UTC ISO format na lokalny format
-        match_date_utc = match["utcDate"]
-        # Konwertuj z formatu "2024-03-15T20:00:00Z" na "2024-03-15T20:00:00"
-        match_date = match_date_utc.replace("Z", "").replace("+00:00", "")
-        
-        # Wyniki (może być None jeśli mecz się nie zakończył)
-        score = match.get("score", {})
-        full_time = score.get("fullTime", {})
-        home_score = full_time.get("home")
-        away_score = full_time.get("away")
-        
-        # Sprawdź czy mecz już istnieje w bazie
-        cursor.execute("SELECT id, home_score, away_score FROM matches WHERE api_match_id = ?", 
-                      (api_match_id,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Aktualizuj tylko jeśli wynik się zmienił lub nie był ustawiony
-            if (existing["home_score"] != home_score or 
-                existing["away_score"] != away_score or
-                (existing["home_score"] is None and home_score is not None)):
-                
-                cursor.execute("""
-                    UPDATE matches
-                    SET home_team = ?, away_team = ?, match_date = ?, 
-                        home_score = ?, away_score = ?
-                    WHERE api_match_id = ?
-                """, (home_team, away_team, match_date, home_score, away_score, api_match_id))
-                updated_count += 1
-                print(f"  ✓ Zaktualizowano: {home_team} vs {away_team} ({home_score or '-'}:{away_score or '-'})")
-        else:
-            # Dodaj nowy mecz
-            cursor.execute("""
-                INSERT INTO matches (home_team, away_team, match_date, home_score, away_score, 
-                                   created_at, api_match_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (home_team, away_team, match_date, home_score, away_score, 
-                  datetime.now().isoformat(), api_match_id))
-            added_count += 1
-            print(f"  + Dodano: {home_team} vs {away_team} ({match_date})")
+    added_count, updated_count = write_fixtures(conn, fixtures, competition_code)
+    mark_applied(conn, competition_code, date_from_str, date_to_str, fixtures)
     
     conn.commit()
     conn.close()
@@ -157,6 +330,33 @@ def sync_matches_from_api(competition_code="PL", days_back=30, days_ahead=30):
     print(f"  Zaktualizowano: {updated_count} meczów")
 
 
+def write_results(conn, fixtures):
+    """
+    Aktualizuje wyniki istniejących meczów jednym zapytaniem. Nie wykonuje commit.
+    
+    Returns:
+        Liczba zaktualizowanych wyników
+    """
+    cursor = conn.cursor()
+    _stage(cursor, [_parse_fixture(match, None) for match in fixtures])
+    
+    cursor.execute("""
+        UPDATE matches
+        SET home_score = s.home_score, away_score = s.away_score
+        FROM staging_fixtures AS s
+        WHERE matches.api_match_id = s.api_match_id
+          AND (matches.home_score IS NOT s.home_score
+               OR matches.away_score IS NOT s.away_score)
+        RETURNING matches.id
+    """)
+    updated_ids = [row["id"] for row in cursor.fetchall()]
+    
+    for match_id in updated_ids:
+        scores.apply_match_result(conn, match_id)
+    
+    return len(updated_ids)
+
+
 def update_results_only(competition_code="PL", days_back=7):
     """
     Aktualizuje tylko wyniki istniejących meczów (szybsze dla częstych aktualizacji)
@@ -166,7 +366,6 @@ def update_results_only(competition_code="PL", days_back=7):
         days_back: Liczba dni wstecz, dla których sprawdzać wyniki
     """
     conn = get_db()
-    cursor = conn.cursor()
     
     print(f"Aktualizowanie wyników meczów z ostatnich {days_back} dni...")
     
@@ -176,35 +375,21 @@ def update_results_only(competition_code="PL", days_back=7):
     date_from_str = date_from.strftime("%Y-%m-%d")
     date_to_str = today.strftime("%Y-%m-%d")
     
-    fixtures = fetch_fixtures_from_api(
+    fixtures = fetch_fixtures_cached(
         competition_code=competition_code,
         date_from=date_from_str,
         date_to=date_to_str
     )
     
-    updated_count = 0
+    if fixtures is None or is_applied(conn, competition_code, date_from_str, date_to_str, fixtures):
+        if fixtures is not None:
+            response_cache.count("unchanged")
+        print("Dane z API nie zmieniły się od ostatniej aktualizacji - pomijam zapis.")
+        conn.close()
+        return
     
-    for match in fixtures:
-        api_match_id = match["id"]
-        score = match.get("score", {})
-        full_time = score.get("fullTime", {})
-        home_score = full_time.get("home")
-        away_score = full_time.get("away")
-        
-        # Aktualizuj tylko jeśli mecz istnieje w bazie i wynik się zmienił
-        cursor.execute("""
-            UPDATE matches
-            SET home_score = ?, away_score = ?
-            WHERE api_match_id = ? 
-              AND (home_score IS NULL OR away_score IS NULL 
-                   OR home_score != ? OR away_score != ?)
-        """, (home_score, away_score, api_match_id, home_score, away_score))
-        
-        if cursor.rowcount > 0:
-            updated_count += 1
-            home_team = match["homeTeam"]["name"]
-            away_team = match["awayTeam"]["name"]
-            print(f"  ✓ {home_team} vs {away_team}: {home_score or '-'}:{away_score or '-'}")
+    updated_count = write_results(conn, fixtures)
+    mark_applied(conn, competition_code, date_from_str, date_to_str, fixtures)
     
     conn.commit()
     conn.close()
@@ -212,7 +397,254 @@ def update_results_only(competition_code="PL", days_back=7):
     print(f"\n✓ Zaktualizowano {updated_count} wyników")
 
 
+def fetch_competitions(competition_codes, date_from, date_to):
+    """
+    Pobiera mecze kilku lig równolegle (wspólna sesja HTTP i limiter zapytań)
+    
+    Returns:
+        Słownik {kod ligi: lista meczów lub None przy błędzie API}
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(
+            lambda code: fetch_fixtures_cached(code, date_from=date_from, date_to=date_to),
+            competition_codes)
+        return dict(zip(competition_codes, results))
+
+
+def sync_competitions(competition_codes=None, days_back=30, days_ahead=30, results_only=False):
+    """
+    Synchronizuje kilka lig: pobieranie równoległe, zapis w jednej transakcji
+    
+    Args:
+        competition_codes: Lista kodów lig (domyślnie COMPETITION_CODES)
+        days_back: Liczba dni wstecz
+        days_ahead: Liczba dni do przodu (ignorowane w trybie results_only)
+        results_only: Aktualizuj tylko wyniki istniejących meczów
+    """
+    competition_codes = competition_codes or COMPETITION_CODES
+    
+    today = datetime.now().date()
+    date_from_str = (today - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    date_to_str = (today if results_only else today + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
+    
+    print(f"Pobieranie meczów lig {', '.join(competition_codes)} "
+          f"z zakresu: {date_from_str} - {date_to_str}")
+    
+    start = time.perf_counter()
+    fixtures_by_competition = fetch_competitions(competition_codes, date_from_str, date_to_str)
+    print(f"Pobrano dane w {time.perf_counter() - start:.1f} s")
+    
+    conn = get_db()
+    try:
+        # Jedna transakcja dla wszystkich lig
+        for code, fixtures in fixtures_by_competition.items():
+            if fixtures is None:
+                print(f"\n[{code}] Błąd API - pomijam zapis")
+                continue
+            if is_applied(conn, code, date_from_str, date_to_str, fixtures):
+                response_cache.count("unchanged")
+                print(f"\n[{code}] Dane bez zmian - pomijam zapis")
+                continue
+            print(f"\n[{code}] Przetwarzanie {len(fixtures)} meczów...")
+            if results_only:
+                updated_count = write_results(conn, fixtures)
+                print(f"[{code}] Zaktualizowano: {updated_count} wyników")
+            else:
+                added_count, updated_count = write_fixtures(conn, fixtures, code)
+                print(f"[{code}] Dodano: {added_count}, zaktualizowano: {updated_count} meczów")
+            mark_applied(conn, code, date_from_str, date_to_str, fixtures)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    print(f"\n✓ Synchronizacja zakończona!")
+
+
+def benchmark_upsert(count=10000):
+    """Mierzy czas zapisu syntetycznych meczów (pierwszy zapis, brak zmian, zmiana wyników)"""
+    import tempfile
+    import migrations
+    
+    fixtures = [{
+        "id": 1000000 + i,
+        "utcDate": (datetime(2025, 8, 1) + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "homeTeam": {"name": f"Drużyna {i % 40}"},
+        "awayTeam": {"name": f"Drużyna {(i + 7) % 40}"},
+        "score": {"fullTime": {"home": None, "away": None}},
+    } for i in range(count)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, "benchmark.db"))
+        migrations.migrate(conn)
+        
+        print(f"Zapis {count} syntetycznych meczów:")
+        for label in ("pierwszy zapis", "bez zmian", "zmiana wyników"):
+            if label == "zmiana wyników":
+                for i, match in enumerate(fixtures):
+                    match["score"]["fullTime"] = {"home": i % 4, "away": i % 3}
+            start = time.perf_counter()
+            added_count, updated_count = write_fixtures(conn, fixtures, "PL")
+            conn.commit()
+            print(f"  {label}: {time.perf_counter() - start:.3f} s "
+                  f"(dodano: {added_count}, zaktualizowano: {updated_count})")
+        conn.close()
+
+
+def check(competition_codes=("PL", "PD", "BL1", "SA", "FL1", "CL"), fixtures_per_competition=30, reset=1,
+          delay=0.3):
+    """
+    Synchronizacja kilku lig z lokalnym serwerem HTTP udającym API:
+    - wszystkie ligi zapisane w jednym przebiegu sync_competitions
+    - 429 i X-Requests-Available-Minute: 0 wstrzymują limiter na X-RequestCounter-Reset
+      sekund (ponowna próba po 429, brak zapytań w czasie przerwy)
+    - pozostałe odpowiedzi przychodzą po `delay` sekund, więc wątki, które je odbiorą,
+      wysyłają kolejne zapytania w czasie przerwy, jeśli limiter jej nie pilnuje
+      (lig jest więcej niż MAX_WORKERS)
+    - błąd zapisu ostatniej ligi cofa zapis wszystkich (jedna transakcja), a po
+      naprawie danych kolejny przebieg zapisuje wszystko
+    - przebieg z tymi samymi danymi pomija zapis, a pusta baza ze wspólnym
+      katalogiem cache dostaje wszystkie mecze (stan zapisu w sync_state)
+
+    Returns:
+        Lista opisów problemów
+    """
+    global BASE_URL, DATABASE, rate_limiter, response_cache
+    import contextlib
+    import io
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    import migrations
+
+    throttled_code, exhausted_code, broken_code = competition_codes[2], competition_codes[0], competition_codes[-1]
+    # (czas odebrania, kod ligi, status odpowiedzi)
+    log = []
+    state = {"broken": True}
+    log_lock = threading.Lock()
+
+    class StubApi(BaseHTTPRequestHandler):
+        def do_GET(self):
+            code = self.path.split("/")[2]
+            with log_lock:
+                first = not any(entry[1] == code for entry in log)
+                status = 429 if code == throttled_code and first else 200
+                log.append((time.monotonic(), code, status))
+            exhausted = code == exhausted_code and first
+            if status == 200 and not exhausted:
+                time.sleep(delay)
+            matches = [{
+                "id": 10000 * (competition_codes.index(code) + 1) + i,
+                "utcDate": f"2031-01-{i % 28 + 1:02d}T15:00:00Z",
+                "homeTeam": {"name": f"{code} gospodarze {i}"},
+                "awayTeam": {"name": f"{code} goście {i}"},
+                "score": {"fullTime": {"home": None, "away": None}},
+            } for i in range(fixtures_per_competition)]
+            if code == broken_code and state["broken"]:
+                # Mecz bez drużyn - zapis tej ligi kończy się wyjątkiem
+                del matches[-1]["homeTeam"]
+            body = json.dumps({"matches": matches}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("X-RequestCounter-Reset", str(reset))
+            if exhausted:
+                self.send_header("X-Requests-Available-Minute", "0")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings = (BASE_URL, DATABASE, rate_limiter, response_cache)
+    problems = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            BASE_URL = f"http://127.0.0.1:{server.server_port}"
+            DATABASE = os.path.join(tmp, "sync_check.db")
+            rate_limiter = TokenBucket(600)
+            response_cache = http_cache.ResponseCache(os.path.join(tmp, "cache"))
+            conn = db.connect(DATABASE)
+            migrations.migrate(conn)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    sync_competitions(list(competition_codes))
+                    problems.append(f"błędne dane {broken_code} nie przerwały synchronizacji")
+                except KeyError:
+                    pass
+            stored = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+            if stored:
+                problems.append(f"po błędzie {broken_code} w bazie zostało {stored} meczów "
+                                f"(zapis nie był jedną transakcją)")
+
+            state["broken"] = False
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_competitions(list(competition_codes))
+            counts = dict(conn.execute("SELECT competition, COUNT(*) FROM matches GROUP BY competition")
+                          .fetchall())
+            conn.close()
+            for code in competition_codes:
+                if counts.get(code) != fixtures_per_competition:
+                    problems.append(f"{code}: zapisano {counts.get(code, 0)} z {fixtures_per_competition} meczów")
+
+            # Te same dane - zapis pominięty; pusta baza ze wspólnym katalogiem cache
+            # dostaje wszystkie mecze (stan zapisu jest w bazie, nie w cache)
+            unchanged = response_cache.stats["unchanged"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_competitions(list(competition_codes))
+            if response_cache.stats["unchanged"] - unchanged != len(competition_codes):
+                problems.append("ponowny przebieg z tymi samymi danymi nie pominął zapisu")
+            DATABASE = os.path.join(tmp, "sync_check_other.db")
+            other = db.connect(DATABASE)
+            migrations.migrate(other)
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_competitions(list(competition_codes))
+            stored = other.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+            other.close()
+            if stored != fixtures_per_competition * len(competition_codes):
+                problems.append(f"pusta baza ze wspólnym cache: zapisano {stored} meczów")
+
+            # Przerwy limitera: 429 (ponowna próba) i wyczerpany limit
+            for code, status_code in ((throttled_code, 429), (exhausted_code, 200)):
+                paused_at = next(at for at, logged, status in log if logged == code)
+                if status_code == 429:
+                    retry = [at for at, logged, status in log if logged == code and at > paused_at]
+                    if not retry or retry[0] - paused_at < reset * 0.9:
+                        problems.append(f"{code}: ponowna próba po 429 bez czekania {reset} s")
+                during = [logged for at, logged, _ in log if paused_at + 0.1 < at < paused_at + reset * 0.9]
+                if during:
+                    problems.append(f"zapytania w czasie przerwy po {code} ({status_code}): {', '.join(during)}")
+            print(f"  Zapytania do API: {len(log)}, zapisane mecze: {sum(counts.values())} "
+                  f"({', '.join(f'{code} {counts.get(code, 0)}' for code in competition_codes)})")
+    finally:
+        server.shutdown()
+        server.server_close()
+        BASE_URL, DATABASE, rate_limiter, response_cache = settings
+    return problems
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        # Synchronizacja z lokalnym serwerem udającym API (bez klucza API)
+        problems = check()
+        if problems:
+            print(f"⚠️  Znaleziono {len(problems)} problemów:")
+            for problem in problems:
+                print(f"   {problem}")
+            sys.exit(1)
+        print("✓ Kilka lig w jednej transakcji, limiter honoruje 429 i X-Requests-Available-Minute")
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        # Pomiar zapisu bez zapytań do API
+        benchmark_upsert(int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
+        sys.exit(0)
+    
     if API_KEY == "TWÓJ_KLUCZ_API" or not API_KEY:
         print("⚠️  UWAGA: Ustaw klucz API!")
         print("   Sposób 1: Ustaw zmienną środowiskową:")
@@ -221,10 +653,23 @@ if __name__ == "__main__":
         print("\n   Klucz API możesz uzyskać na: https://www.football-data.org/register")
         sys.exit(1)
     
-    if len(sys.argv) > 1 and sys.argv[1] == "update":
+    if len(sys.argv) > 1 and sys.argv[1] == "multi":
+        # Pełna synchronizacja kilku lig równolegle
+        sync_competitions(sys.argv[2:] or None, days_back=30, days_ahead=30)
+    elif len(sys.argv) > 1 and sys.argv[1] == "update-multi":
+        # Szybka aktualizacja wyników kilku lig równolegle
+        sync_competitions(sys.argv[2:] or None, days_back=7, results_only=True)
+    elif len(sys.argv) > 1 and sys.argv[1] == "daemon":
+        # Harmonogram adaptacyjny (często tylko w trakcie meczów)
+        import sync_scheduler
+        sync_scheduler.run_daemon()
+    elif len(sys.argv) > 1 and sys.argv[1] == "update":
         # Tryb szybkiej aktualizacji tylko wyników
         update_results_only()
     else:
         # Pełna synchronizacja (dodawanie nowych meczów + aktualizacja wyników)
         # Pobiera mecze z miesiąca wstecz i miesiąca do przodu
         sync_matches_from_api(days_back=30, days_ahead=30)
+    
+    response_cache.prune(CACHE_MAX_AGE_DAYS)
+    print(f"\n{response_cache.summary()}")
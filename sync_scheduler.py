@@ -0,0 +1,337 @@
+"""
+Adaptacyjny harmonogram synchronizacji (tryb `python sync_matches.py daemon`)
+Często odpytuje API tylko w trakcie i tuż po meczach, poza nimi wykonuje
+rzadką pełną synchronizację. Zegar i źródło danych można podmienić (symulacja)
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import backup
+import changelog
+import db
+import migrations
+import season_archive
+import sync_matches
+
+# Czas od rozpoczęcia meczu, po którym można spodziewać się wyniku końcowego
+MATCH_DURATION = timedelta(minutes=int(os.getenv("SYNC_MATCH_DURATION_MINUTES", "110")))
+# Co ile sekund odpytywać ligę, w której mecz powinien się właśnie kończyć
+LIVE_INTERVAL = int(os.getenv("SYNC_LIVE_INTERVAL", "120"))
+# Po takim czasie bez wyniku mecz uznajemy za opóźniony i odpytujemy rzadziej
+OVERDUE_AFTER = timedelta(minutes=30)
+# Co ile sekund odpytywać ligę z zakończonymi meczami (korekty) lub opóźnionymi
+RECENT_INTERVAL = int(os.getenv("SYNC_RECENT_INTERVAL", "900"))
+# Jak długo po rozpoczęciu mecz jest "aktywny" (czas gry + przerwy + korekty)
+ACTIVE_WINDOW = timedelta(hours=float(os.getenv("SYNC_ACTIVE_WINDOW_HOURS", "4")))
+# Co ile godzin pełna synchronizacja (nowe mecze, zmiany terminów)
+FULL_SYNC_INTERVAL = timedelta(hours=float(os.getenv("SYNC_FULL_INTERVAL_HOURS", "24")))
+# Zakres pełnej synchronizacji (dni wstecz / do przodu)
+FULL_SYNC_DAYS_BACK = 30
+FULL_SYNC_DAYS_AHEAD = 30
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class SystemClock:
+    """Zegar rzeczywisty (UTC, daty meczów z API są w UTC)"""
+
+    def now(self):
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class FakeClock:
+    """Zegar symulowany - sleep przesuwa czas bez czekania"""
+
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+
+class ApiSource:
+    """Źródło danych football-data.org (zapytania warunkowe i cache z sync_matches)"""
+
+    def fetch(self, competition_code, date_from, date_to):
+        return sync_matches.fetch_fixtures_cached(competition_code, date_from, date_to)
+
+    def prune(self):
+        return sync_matches.response_cache.prune(sync_matches.CACHE_MAX_AGE_DAYS)
+
+
+class Scheduler:
+    """Planuje kolejne synchronizacje na podstawie terminów meczów w bazie"""
+
+    def __init__(self, database=sync_matches.DATABASE, source=None, clock=None,
+                 competition_codes=None, backup_dir=None):
+        self.database = database
+        # Katalog dobowych kopii zapasowych (None - bez kopii)
+        self.backup_dir = backup_dir
+        self.source = source or ApiSource()
+        self.clock = clock or SystemClock()
+        self.competition_codes = competition_codes or sync_matches.COMPETITION_CODES
+        self.last_full_sync = None
+        # Termin następnego odpytania per liga {kod: datetime}
+        self.due = {}
+        self.api_calls = 0
+
+    def active_competitions(self, conn, now):
+        """
+        Ligi z meczami rozpoczętymi w ciągu ACTIVE_WINDOW (trwające lub niedawno zakończone)
+
+        Returns:
+            Lista krotek (kod ligi, data od, data do,
+            najwcześniejszy początek meczu bez wyniku lub None)
+        """
+        rows = conn.execute("""
+            SELECT COALESCE(competition, ?) AS competition,
+                   MIN(match_date) AS first_kickoff,
+                   MAX(match_date) AS last_kickoff,
+                   MIN(CASE WHEN home_score IS NULL THEN match_date END) AS first_unfinished
+            FROM matches
+            WHERE api_match_id IS NOT NULL
+              AND match_date > ? AND match_date <= ?
+            GROUP BY 1
+        """, (sync_matches.COMPETITION_CODE, (now - ACTIVE_WINDOW).strftime(DATE_FORMAT),
+              now.strftime(DATE_FORMAT))).fetchall()
+        # Zakres dat tylko z dni, w których są aktywne mecze
+        return [(row["competition"], row["first_kickoff"][:10], row["last_kickoff"][:10],
+                 datetime.fromisoformat(row["first_unfinished"]) if row["first_unfinished"] else None)
+                for row in rows]
+
+    def next_kickoff(self, conn, now):
+        """Najbliższy termin rozpoczęcia meczu z API (None gdy brak)"""
+        row = conn.execute("""
+            SELECT MIN(match_date) AS kickoff
+            FROM matches
+            WHERE api_match_id IS NOT NULL AND match_date > ?
+        """, (now.strftime(DATE_FORMAT),)).fetchone()
+        return datetime.fromisoformat(row["kickoff"]) if row["kickoff"] else None
+
+    def _sync(self, ranges, results_only):
+        """Pobiera podane zakresy (kod, od, do) i zapisuje zmiany w jednej transakcji"""
+        with ThreadPoolExecutor(max_workers=sync_matches.MAX_WORKERS) as executor:
+            fetched = list(executor.map(lambda r: self.source.fetch(*r), ranges))
+        self.api_calls += len(ranges)
+
+        conn = db.connect(self.database)
+        try:
+            for (code, date_from, date_to), fixtures in zip(ranges, fetched):
+                if fixtures is None or sync_matches.is_applied(conn, code, date_from, date_to, fixtures):
+                    continue
+                if results_only:
+                    updated_count = sync_matches.write_results(conn, fixtures)
+                    print(f"[{code}] Zaktualizowano: {updated_count} wyników")
+                else:
+                    added_count, updated_count = sync_matches.write_fixtures(conn, fixtures, code)
+                    print(f"[{code}] Dodano: {added_count}, zaktualizowano: {updated_count} meczów")
+                sync_matches.mark_applied(conn, code, date_from, date_to, fixtures)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _maintenance(self):
+        """
+        Raz na pełną synchronizację: kompaktowanie dziennika zmian, konserwacja
+        bazy (backup.py maintain), usunięcie starych wpisów cache API
+        i kopia zapasowa, jeśli ustawiono backup_dir
+        """
+        conn = db.connect(self.database)
+        try:
+            collapsed, expired = changelog.compact(conn)
+            conn.commit()
+            season_archive.attach(conn)
+            maintenance = backup.maintain(conn)
+        finally:
+            conn.close()
+        if collapsed or expired:
+            print(f"Dziennik zmian: zwinięto {collapsed}, usunięto {expired} wpisów")
+        if maintenance['freed']:
+            print(f"Konserwacja: zwolniono {maintenance['freed']} stron")
+        pruned = self.source.prune()
+        if pruned:
+            print(f"Cache API: usunięto {pruned} starych wpisów")
+
+        if self.backup_dir:
+            result = backup.snapshot(self.database, self.backup_dir)
+            if result['problems']:
+                print(f"⚠️  Kopia zapasowa niepoprawna: {result['problems'][0]}")
+            else:
+                print(f"Kopia zapasowa: {', '.join(result['paths'])} ({result['seconds']:.1f} s)")
+
+    def step(self):
+        """
+        Wykonuje zaległe synchronizacje
+
+        Returns:
+            Liczba sekund do następnego kroku
+        """
+        now = self.clock.now()
+
+        if self.last_full_sync is None or now - self.last_full_sync >= FULL_SYNC_INTERVAL:
+            print(f"{now:%Y-%m-%d %H:%M} Pełna synchronizacja lig {', '.join(self.competition_codes)}")
+            date_from = (now - timedelta(days=FULL_SYNC_DAYS_BACK)).strftime("%Y-%m-%d")
+            date_to = (now + timedelta(days=FULL_SYNC_DAYS_AHEAD)).strftime("%Y-%m-%d")
+            self._sync([(code, date_from, date_to) for code in self.competition_codes],
+                       results_only=False)
+            self.last_full_sync = now
+            self._maintenance()
+
+        conn = db.connect(self.database)
+        try:
+            active = self.active_competitions(conn, now)
+            due_ranges = []
+            for code, date_from, date_to, first_unfinished in active:
+                due = self.due.get(code, now)
+                if first_unfinished:
+                    # Wynik nie pojawi się przed końcem meczu - nie odpytuj w trakcie gry
+                    due = max(due, first_unfinished + MATCH_DURATION)
+                if due > now:
+                    self.due[code] = due
+                    continue
+                due_ranges.append((code, date_from, date_to))
+                overdue = first_unfinished and now - first_unfinished > MATCH_DURATION + OVERDUE_AFTER
+                interval = LIVE_INTERVAL if first_unfinished and not overdue else RECENT_INTERVAL
+                self.due[code] = now + timedelta(seconds=interval)
+            if due_ranges:
+                print(f"{now:%Y-%m-%d %H:%M} Aktualizacja wyników: "
+                      + ", ".join(f"{code} {date_from}..{date_to}"
+                                  for code, date_from, date_to in due_ranges))
+                self._sync(due_ranges, results_only=True)
+
+            # Ligi bez aktywnych meczów nie czekają już na odpytanie
+            active_codes = {code for code, _, _, _ in active}
+            self.due = {code: due for code, due in self.due.items() if code in active_codes}
+
+            wake_times = list(self.due.values())
+            wake_times.append(self.last_full_sync + FULL_SYNC_INTERVAL)
+            kickoff = self.next_kickoff(conn, now)
+            if kickoff:
+                wake_times.append(kickoff)
+        finally:
+            conn.close()
+
+        return max((min(wake_times) - now).total_seconds(), 1)
+
+    def run(self, until=None):
+        """Pętla harmonogramu (until - koniec pracy, None - bez końca)"""
+        while until is None or self.clock.now() < until:
+            delay = self.step()
+            self.clock.sleep(delay)
+
+
+def run_daemon():
+    """Tryb daemon: harmonogram na zegarze rzeczywistym i prawdziwym API"""
+    print(f"Harmonogram synchronizacji: mecze trwające co {LIVE_INTERVAL} s, "
+          f"zakończone co {RECENT_INTERVAL} s, pełna synchronizacja co {FULL_SYNC_INTERVAL}")
+    Scheduler(backup_dir=backup.BACKUP_DIR if backup.DAEMON_SNAPSHOTS else None).run()
+
+
+class FakeApi:
+    """Symulowane API: mecze kolejki z wynikami dostępnymi od zakończenia meczu"""
+
+    MATCH_LENGTH = timedelta(minutes=115)
+
+    def __init__(self, clock, fixtures):
+        self.clock = clock
+        # Lista krotek (kod ligi, id, kickoff)
+        self.fixtures = fixtures
+
+    def fetch(self, competition_code, date_from, date_to):
+        now = self.clock.now()
+        matches = []
+        for code, api_id, kickoff in self.fixtures:
+            if code != competition_code or not date_from <= kickoff.strftime("%Y-%m-%d") <= date_to:
+                continue
+            finished = now >= kickoff + self.MATCH_LENGTH
+            matches.append({
+                "id": api_id,
+                "utcDate": kickoff.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "homeTeam": {"name": f"{code} gospodarze {api_id}"},
+                "awayTeam": {"name": f"{code} goście {api_id}"},
+                "score": {"fullTime": {"home": api_id % 4 if finished else None,
+                                       "away": api_id % 3 if finished else None}},
+            })
+        return matches
+
+    def prune(self):
+        return 0
+
+
+def simulate(competition_codes=("PL", "CL")):
+    """
+    Symulacja kolejki (tydzień) na zegarze symulowanym: liczba zapytań do API
+    i opóźnienie wyników w porównaniu ze stałym odpytywaniem co godzinę
+    """
+    start = datetime(2025, 3, 14)
+    # Sobota: 12:30, 5x 15:00, 17:30; niedziela: 14:00, 16:30; poniedziałek: 20:00
+    slots = [(1, 12, 30), (1, 15, 0), (1, 15, 0), (1, 15, 0), (1, 15, 0), (1, 15, 0),
+             (1, 17, 30), (2, 14, 0), (2, 16, 30), (3, 20, 0)]
+    fixtures = [(code, 1000 * (index + 1) + number,
+                 start + timedelta(days=day, hours=hour, minutes=minute))
+                for index, code in enumerate(competition_codes)
+                for number, (day, hour, minute) in enumerate(slots)]
+    end = start + timedelta(days=7)
+
+    clock = FakeClock(start)
+    api = FakeApi(clock, fixtures)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "simulation.db")
+        conn = db.connect(database)
+        migrations.migrate(conn)
+        conn.close()
+
+        scheduler = Scheduler(database, source=api, clock=clock,
+                              competition_codes=list(competition_codes))
+
+        # Moment zapisania wyniku w bazie per mecz
+        result_seen = {}
+        while clock.now() < end:
+            with contextlib.redirect_stdout(io.StringIO()):
+                delay = scheduler.step()
+            conn = db.connect(database)
+            for row in conn.execute("SELECT api_match_id FROM matches WHERE home_score IS NOT NULL"):
+                result_seen.setdefault(row["api_match_id"], clock.now())
+            conn.close()
+            clock.sleep(delay)
+
+    finish_times = {api_id: kickoff + FakeApi.MATCH_LENGTH for _, api_id, kickoff in fixtures}
+    adaptive_delays = [(result_seen[api_id] - finished).total_seconds() / 60
+                       for api_id, finished in finish_times.items()]
+    # Stałe odpytywanie: wyniki co godzinę + pełna synchronizacja raz dziennie, każda liga
+    fixed_calls = (7 * 24 + 7) * len(competition_codes)
+    fixed_delays = [(60 - finished.minute) % 60 for finished in finish_times.values()]
+
+    print(f"\nSymulacja kolejki: {len(fixtures)} meczów, ligi {', '.join(competition_codes)}")
+    print(f"  Stałe odpytywanie (co godzinę): {fixed_calls} zapytań, "
+          f"opóźnienie wyników średnio {sum(fixed_delays) / len(fixed_delays):.0f} min, "
+          f"maks. {max(fixed_delays)} min")
+    print(f"  Harmonogram adaptacyjny:        {scheduler.api_calls} zapytań, "
+          f"opóźnienie wyników średnio {sum(adaptive_delays) / len(adaptive_delays):.0f} min, "
+          f"maks. {max(adaptive_delays):.0f} min")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        simulate(sys.argv[2:] or ("PL", "CL"))
+    else:
+        print("Użycie: python sync_scheduler.py simulate [KOD_LIGI ...]")
+        print("        (tryb daemon: python sync_matches.py daemon)")
+        sys.exit(2)
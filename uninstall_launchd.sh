@@ -13,6 +13,7 @@ echo ""
 echo "1. Zatrzymywanie zadań..."
 launchctl unload "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist" 2>/dev/null
 launchctl unload "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist" 2>/dev/null
+launchctl unload "$LAUNCH_AGENTS_DIR/com.footballpredictions.daemon.plist" 2>/dev/null
 echo "   ✓ Zadania zatrzymane"
 echo ""
 
@@ -20,6 +21,7 @@ echo ""
 echo "2. Usuwanie plików konfiguracyjnych..."
 rm -f "$LAUNCH_AGENTS_DIR/com.footballpredictions.sync.plist"
 rm -f "$LAUNCH_AGENTS_DIR/com.footballpredictions.update.plist"
+rm -f "$LAUNCH_AGENTS_DIR/com.footballpredictions.daemon.plist"
 echo "   ✓ Pliki usunięte"
 echo ""
 
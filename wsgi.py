@@ -0,0 +1,10 @@
+"""
+Punkt wejścia WSGI (gunicorn z workerami sync lub gthread, DEPLOYMENT.md)
+Schemat bazy przygotowuje proces główny gunicorna (on_starting w gunicorn.conf.py)
+
+    gunicorn -c gunicorn.conf.py
+"""
+
+from app import create_app
+
+application = create_app()